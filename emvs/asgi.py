@@ -1,5 +1,9 @@
 """
 ASGI config for Enhanced Merchant Verification System.
+
+Serve with an ASGI server, e.g. `uvicorn emvs.asgi:application`, for the live
+dashboard stream at /api/dashboard/stream/; each open dashboard holds one
+connection without tying up a worker thread.
 """
 
 import os
@@ -9,3 +13,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'emvs.settings')
 
 application = get_asgi_application()
+
+# Build the typeahead index in the background before the first lookup
+from merchant_verification.services.typeahead import merchant_index  # noqa: E402
+
+merchant_index.warm()
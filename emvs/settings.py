@@ -3,6 +3,7 @@ Django settings for Enhanced Merchant Verification System.
 """
 
 import os
+from importlib.util import find_spec
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -79,6 +80,18 @@ DATABASES = {
 }
 
 
+# Cache
+# A cache shared by all workers (e.g. Redis or Memcached) is needed for
+# cross-worker request coalescing; the local-memory default is per-process.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'emvs-default'),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
 
@@ -130,12 +143,113 @@ REST_FRAMEWORK = {
         'rest_framework.authentication.SessionAuthentication',
         'rest_framework.authentication.BasicAuthentication',
     ],
+    # orjson-backed JSON when installed; MessagePack via Accept: application/msgpack
+    'DEFAULT_RENDERER_CLASSES': [
+        'merchant_verification.api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ] + (['merchant_verification.api.renderers.MessagePackRenderer'] if find_spec('msgpack') else []),
+    'DEFAULT_PARSER_CLASSES': [
+        'merchant_verification.api.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ] + (['merchant_verification.api.renderers.MessagePackParser'] if find_spec('msgpack') else []),
 }
 
 # External API Integration
 EXTERNAL_API_KEY = os.getenv('EXTERNAL_API_KEY', '')
 BUSINESS_VERIFICATION_API_URL = os.getenv('BUSINESS_VERIFICATION_API_URL', 'https://api.example.com/business-verification/')
 
+# Shared secret used to sign asynchronous provider callbacks (HMAC-SHA256);
+# required outside DEBUG, where unsigned callbacks are rejected
+EXTERNAL_API_WEBHOOK_SECRET = os.getenv('EXTERNAL_API_WEBHOOK_SECRET', '')
+
+# Token-bucket limits for outbound provider calls, shared by all workers.
+# capacity is the burst size, refill_rate the sustained calls per second.
+PROVIDER_RATE_LIMITS = {
+    'verification': {
+        'capacity': int(os.getenv('VERIFICATION_API_BURST', '10')),
+        'refill_rate': float(os.getenv('VERIFICATION_API_RATE', '5')),
+    },
+    'sanctions': {
+        'capacity': int(os.getenv('SANCTIONS_API_BURST', '10')),
+        'refill_rate': float(os.getenv('SANCTIONS_API_RATE', '5')),
+    },
+}
+
+# Maximum time a caller waits for a provider token (seconds)
+PROVIDER_RATE_LIMIT_TIMEOUT = float(os.getenv('PROVIDER_RATE_LIMIT_TIMEOUT', '5'))
+
+# Maximum number of merchants accepted by one bulk verification request. Without
+# provider batching, the request waits for the verification quota to cover them all
+BULK_VERIFICATION_MAX_MERCHANTS = int(os.getenv('BULK_VERIFICATION_MAX_MERCHANTS', '1000'))
+
+# Maximum number of flags accepted by one bulk resolution request
+BULK_FLAG_RESOLUTION_MAX_FLAGS = int(os.getenv('BULK_FLAG_RESOLUTION_MAX_FLAGS', '10000'))
+
+# Maximum number of records scored by one batch risk assessment request
+RISK_ASSESSMENT_MAX_BATCH = int(os.getenv('RISK_ASSESSMENT_MAX_BATCH', '1000'))
+
+# List pages: results the PostgreSQL planner estimates above this many rows
+# show the estimate instead of an exact COUNT(*); totals are cached for
+# PAGINATOR_COUNT_CACHE_TTL seconds per query and data version
+APPROXIMATE_COUNT_THRESHOLD = int(os.getenv('APPROXIMATE_COUNT_THRESHOLD', '10000'))
+PAGINATOR_COUNT_CACHE_TTL = int(os.getenv('PAGINATOR_COUNT_CACHE_TTL', '300'))
+
+# Rows per page of each related section on the merchant detail page
+MERCHANT_DETAIL_PAGE_SIZE = int(os.getenv('MERCHANT_DETAIL_PAGE_SIZE', '10'))
+
+# Seconds between full rebuilds of each process's in-memory typeahead index;
+# in between, it only syncs merchants changed since the last sync
+TYPEAHEAD_REBUILD_INTERVAL = int(os.getenv('TYPEAHEAD_REBUILD_INTERVAL', '600'))
+
+# Seconds between checks of the data version by each typeahead lookup
+TYPEAHEAD_VERSION_CHECK_INTERVAL = float(os.getenv('TYPEAHEAD_VERSION_CHECK_INTERVAL', '1'))
+
+# Rows fetched per database round trip by streaming exports
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '2000'))
+
+# Bulk merchant import: rows validated and inserted per batch, and the
+# maximum number of row errors returned in an import summary
+MERCHANT_IMPORT_CHUNK_SIZE = int(os.getenv('MERCHANT_IMPORT_CHUNK_SIZE', '1000'))
+MERCHANT_IMPORT_MAX_ERRORS = int(os.getenv('MERCHANT_IMPORT_MAX_ERRORS', '1000'))
+
+# Request coalescing for concurrent verification checks (seconds)
+SINGLE_FLIGHT_LOCK_TIMEOUT = int(os.getenv('SINGLE_FLIGHT_LOCK_TIMEOUT', '60'))
+SINGLE_FLIGHT_WAIT_TIMEOUT = int(os.getenv('SINGLE_FLIGHT_WAIT_TIMEOUT', '30'))
+SINGLE_FLIGHT_RESULT_TTL = int(os.getenv('SINGLE_FLIGHT_RESULT_TTL', '10'))
+
+# Background verification jobs: seconds before a running job is considered
+# abandoned and requeued, attempts before it fails, and the secret used to
+# sign completion notifications sent to a job's callback_url
+VERIFICATION_JOB_TIMEOUT = int(os.getenv('VERIFICATION_JOB_TIMEOUT', '300'))
+VERIFICATION_JOB_MAX_ATTEMPTS = int(os.getenv('VERIFICATION_JOB_MAX_ATTEMPTS', '3'))
+VERIFICATION_JOB_WEBHOOK_SECRET = os.getenv('VERIFICATION_JOB_WEBHOOK_SECRET', '')
+
+# Hosts that client-supplied callback URLs may point at (comma-separated,
+# ALLOWED_HOSTS patterns). When empty, any public HTTPS host is accepted.
+WEBHOOK_ALLOWED_HOSTS = [host.strip() for host in os.getenv('WEBHOOK_ALLOWED_HOSTS', '').split(',') if host.strip()]
+
+# Seconds before a merchant's verification snapshot is refreshed even if
+# its inputs did not change
+VERIFICATION_SNAPSHOT_MAX_AGE = int(os.getenv('VERIFICATION_SNAPSHOT_MAX_AGE', '3600'))
+
+# Flag review queue: hours of waiting each severity step and each risk score
+# point is worth when ordering open flags, and seconds an analyst's claim on
+# a flag lasts before it returns to the queue
+REVIEW_QUEUE_SEVERITY_HOURS = float(os.getenv('REVIEW_QUEUE_SEVERITY_HOURS', '24'))
+REVIEW_QUEUE_RISK_HOURS = float(os.getenv('REVIEW_QUEUE_RISK_HOURS', '12'))
+REVIEW_QUEUE_LEASE_SECONDS = int(os.getenv('REVIEW_QUEUE_LEASE_SECONDS', '900'))
+
+# Dashboard statistics: cache lifetime (seconds) and optional counters table,
+# built with `python manage.py rebuild_dashboard_counters`
+DASHBOARD_STATS_CACHE_TTL = int(os.getenv('DASHBOARD_STATS_CACHE_TTL', '30'))
+DASHBOARD_COUNTERS_ENABLED = os.getenv('DASHBOARD_COUNTERS_ENABLED', 'False') == 'True'
+
+# Live dashboard stream (ASGI only): seconds between data version checks by
+# the shared producer, and between keepalive comments on idle connections
+DASHBOARD_STREAM_POLL_INTERVAL = float(os.getenv('DASHBOARD_STREAM_POLL_INTERVAL', '2'))
+DASHBOARD_STREAM_KEEPALIVE = float(os.getenv('DASHBOARD_STREAM_KEEPALIVE', '15'))
+
 # Login URL
 LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/'
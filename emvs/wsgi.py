@@ -9,3 +9,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'emvs.settings')
 
 application = get_wsgi_application()
+
+# Build the typeahead index in the background before the first lookup
+from merchant_verification.services.typeahead import merchant_index  # noqa: E402
+
+merchant_index.warm()
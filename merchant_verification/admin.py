@@ -4,7 +4,13 @@ from .models import (
     TransactionPattern,
     VerificationFlag,
     VerificationReport,
-    AuditLog
+    AuditLog,
+    ProviderRateLimit,
+    PendingVerification,
+    DataVersion,
+    DashboardCounter,
+    VerificationJob,
+    VerificationSnapshot
 )
 
 @admin.register(Merchant)
@@ -12,7 +18,7 @@ class MerchantAdmin(admin.ModelAdmin):
     list_display = ('name', 'business_type', 'status', 'risk_level', 'created_at')
     list_filter = ('status', 'business_type', 'risk_level', 'country')
     search_fields = ('name', 'registration_number', 'email', 'website')
-    readonly_fields = ('created_at', 'updated_at', 'last_verified_at')
+    readonly_fields = ('created_at', 'updated_at', 'last_verified_at', 'open_flag_count', 'latest_transaction_pattern')
     fieldsets = (
         ('Basic Information', {
             'fields': ('name', 'business_type', 'registration_number', 'tax_id', 'website')
@@ -21,7 +27,7 @@ class MerchantAdmin(admin.ModelAdmin):
             'fields': ('email', 'phone', 'address', 'city', 'state', 'country', 'postal_code')
         }),
         ('Verification Status', {
-            'fields': ('status', 'risk_level', 'risk_score')
+            'fields': ('status', 'risk_level', 'risk_score', 'open_flag_count', 'latest_transaction_pattern')
         }),
         ('Verification Data', {
             'fields': ('verification_data', 'external_api_response')
@@ -44,14 +50,17 @@ class TransactionPatternAdmin(admin.ModelAdmin):
 
 @admin.register(VerificationFlag)
 class VerificationFlagAdmin(admin.ModelAdmin):
-    list_display = ('merchant', 'flag_type', 'severity', 'status', 'created_at')
+    list_display = ('merchant', 'flag_type', 'severity', 'status', 'priority', 'claimed_by', 'created_at')
     list_filter = ('flag_type', 'severity', 'status')
     search_fields = ('merchant__name', 'description')
-    readonly_fields = ('created_at', 'resolved_at')
+    readonly_fields = ('created_at', 'resolved_at', 'priority')
     fieldsets = (
         ('Flag Information', {
             'fields': ('merchant', 'flag_type', 'description', 'severity', 'status')
         }),
+        ('Review Queue', {
+            'fields': ('priority', 'claimed_by', 'claimed_until')
+        }),
         ('Resolution', {
             'fields': ('resolution_notes', 'resolved_at', 'resolved_by')
         }),
@@ -81,3 +90,50 @@ class AuditLogAdmin(admin.ModelAdmin):
     
     def has_change_permission(self, request, obj=None):
         return False
+
+
+
+@admin.register(ProviderRateLimit)
+class ProviderRateLimitAdmin(admin.ModelAdmin):
+    list_display = ('name', 'tokens', 'last_refill', 'allowed_calls', 'throttled_calls')
+    readonly_fields = ('last_refill', 'allowed_calls', 'throttled_calls', 'total_wait_seconds')
+
+
+
+@admin.register(PendingVerification)
+class PendingVerificationAdmin(admin.ModelAdmin):
+    list_display = ('merchant', 'check_type', 'status', 'submitted_at', 'completed_at')
+    list_filter = ('check_type', 'status')
+    search_fields = ('merchant__name', 'provider_request_id')
+    readonly_fields = ('callback_token', 'submitted_at', 'completed_at', 'response')
+
+
+
+@admin.register(DataVersion)
+class DataVersionAdmin(admin.ModelAdmin):
+    list_display = ('name', 'version', 'updated_at')
+    readonly_fields = ('name', 'version', 'updated_at')
+
+
+
+@admin.register(DashboardCounter)
+class DashboardCounterAdmin(admin.ModelAdmin):
+    list_display = ('name', 'value')
+    readonly_fields = ('name', 'value')
+
+
+
+@admin.register(VerificationJob)
+class VerificationJobAdmin(admin.ModelAdmin):
+    list_display = ('merchant', 'status', 'attempts', 'created_at', 'completed_at')
+    list_filter = ('status',)
+    search_fields = ('merchant__name',)
+    readonly_fields = ('request_data', 'result', 'error', 'created_at', 'started_at', 'completed_at')
+
+
+@admin.register(VerificationSnapshot)
+class VerificationSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('merchant', 'is_stale', 'computed_at')
+    list_filter = ('is_stale',)
+    search_fields = ('merchant__name',)
+    readonly_fields = ('risk_data', 'external_data', 'transaction_data', 'input_version', 'computed_at', 'refresh_started_at')
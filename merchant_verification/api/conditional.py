@@ -0,0 +1,74 @@
+"""
+Conditional GET support for the merchant verification API.
+"""
+
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from ..serializers import get_query_param_set
+
+
+class ConditionalGetMixin:
+    """
+    Answer GET requests with 304 Not Modified when the client's copy is current.
+
+    Views implement get_validators() with a cheap lookup returning a version
+    token and a last-modified datetime, and retrieve() to build the full
+    response. The validators are checked first, so unchanged polls skip the
+    queries and serialization behind the full response.
+    """
+
+    def get_validators(self, request, *args, **kwargs):
+        """
+        Get the validators for the current representation.
+
+        Returns:
+            tuple: (version, last_modified), or None to skip conditional handling
+        """
+        raise NotImplementedError
+
+    def get_etag(self, request, version):
+        # Each negotiated format and field selection is a different representation
+        tag = f'{version}-{request.accepted_renderer.format}'
+        selection = [
+            (name, sorted(values))
+            for name, values in (
+                ('fields', get_query_param_set(request, 'fields')),
+                ('expand', get_query_param_set(request, 'expand')),
+            )
+            if values is not None
+        ]
+        if selection:
+            tag += '-' + hashlib.md5(repr(selection).encode('utf-8')).hexdigest()[:12]
+        return quote_etag(tag)
+
+    def handle_conditional_get(self, request, *args, **kwargs):
+        validators = self.get_validators(request, *args, **kwargs)
+        if validators is None:
+            return None, None, None
+
+        version, last_modified = validators
+        etag = self.get_etag(request, version)
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        return response, etag, timestamp
+
+    def get(self, request, *args, **kwargs):
+        not_modified, etag, timestamp = self.handle_conditional_get(request, *args, **kwargs)
+        if not_modified is not None:
+            if not_modified.status_code == 304:
+                not_modified['ETag'] = etag
+            patch_vary_headers(not_modified, ['Accept'])
+            return not_modified
+
+        response = self.retrieve(request, *args, **kwargs)
+        if response.status_code == 200 and etag:
+            response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+            response['Cache-Control'] = 'private, no-cache'
+            patch_vary_headers(response, ['Accept'])
+        return response
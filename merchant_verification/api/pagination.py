@@ -0,0 +1,144 @@
+"""
+Pagination classes for the merchant verification API.
+"""
+
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on a (timestamp, id) key, newest first.
+
+    Each page is fetched with a range condition on the key instead of an
+    OFFSET, so deep pages cost the same as the first one when the key is
+    indexed, and rows inserted while a client pages do not shift results.
+    """
+    ordering_field = 'created_at'
+    # Set here rather than as DRF's global PAGE_SIZE, which is only for
+    # DEFAULT_PAGINATION_CLASS; the review queue and reports inherit it
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(f'-{self.ordering_field}', '-id')
+
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            position, pk = cursor
+            # The first condition is an index range, the second breaks ties on id
+            queryset = queryset.filter(**{f'{self.ordering_field}__lte': position}).filter(
+                Q(**{f'{self.ordering_field}__lt': position}) | Q(id__lt=pk)
+            )
+
+        results = list(queryset[:page_size + 1])
+        self.has_next = len(results) > page_size
+        self.page = results[:page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            decoded = base64.urlsafe_b64decode(encoded.encode('ascii')).decode('ascii')
+            position, pk = decoded.rsplit('|', 1)
+            return datetime.fromisoformat(position), int(pk)
+        except (ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, instance):
+        position = getattr(instance, self.ordering_field).isoformat()
+        raw = f'{position}|{instance.pk}'
+        return base64.urlsafe_b64encode(raw.encode('ascii')).decode('ascii')
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class ReportKeysetPagination(KeysetPagination):
+    """Keyset pagination for verification reports, newest first"""
+    ordering_field = 'report_date'
+
+
+class ReviewQueuePagination(KeysetPagination):
+    """
+    Cursor pagination of the flag review queue, highest priority first.
+
+    Ties on priority are broken by ascending id, matching the partial index
+    the queue is served from.
+    """
+    ordering_field = 'priority'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by('-priority', 'id')
+
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            position, pk = cursor
+            queryset = queryset.filter(priority__lte=position).filter(
+                Q(priority__lt=position) | Q(id__gt=pk)
+            )
+
+        results = list(queryset[:page_size + 1])
+        self.has_next = len(results) > page_size
+        self.page = results[:page_size]
+        return self.page
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            decoded = base64.urlsafe_b64decode(encoded.encode('ascii')).decode('ascii')
+            position, pk = decoded.rsplit('|', 1)
+            return float(position), int(pk)
+        except (ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, instance):
+        raw = f'{instance.priority!r}|{instance.pk}'
+        return base64.urlsafe_b64encode(raw.encode('ascii')).decode('ascii')
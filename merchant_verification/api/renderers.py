@@ -0,0 +1,107 @@
+"""
+Renderers and parsers for the merchant verification API.
+
+FastJSONRenderer and FastJSONParser use orjson when it is installed and fall
+back to DRF's stdlib-based implementations otherwise. MessagePackRenderer and
+MessagePackParser add an application/msgpack content type when msgpack is
+installed. Clients pick a format with the Accept header.
+"""
+
+from rest_framework import renderers, parsers
+from rest_framework.exceptions import ParseError
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+
+_encoder = encoders.JSONEncoder()
+
+
+def encode_default(obj):
+    """
+    Coerce values the fast encoders do not handle natively.
+
+    Delegates to DRF's JSONEncoder so Decimals, datetimes, UUIDs, lazy strings
+    and numpy scalars come out exactly as they do from the stdlib renderer.
+    """
+    return _encoder.default(obj)
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """
+    JSON renderer backed by orjson.
+
+    Produces the same JSON values as JSONRenderer for compact output:
+    datetimes are passed through to DRF's encoder rather than orjson's own
+    formatting, U+2028/U+2029 are escaped as DRF does, and integers wider than
+    64 bits fall back to the stdlib renderer. The bytes can still differ:
+    floats in exponent form are written as 1e16 rather than 1e+16, and NaN
+    and Infinity render as null where DRF raises. Indented output (e.g. for
+    the browsable API) is left to the stdlib renderer.
+    """
+    option = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=encode_default, option=self.option)
+        except orjson.JSONEncodeError:
+            # e.g. integers orjson cannot represent; the stdlib encoder handles them
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+class FastJSONParser(parsers.JSONParser):
+    """JSON parser backed by orjson, falling back to the stdlib parser"""
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    """
+    Renderer which serializes to MessagePack.
+
+    Values are coerced the same way as in the JSON renderers, so a payload
+    decodes to the same structure in either format.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=encode_default, use_bin_type=True)
+
+
+class MessagePackParser(parsers.BaseParser):
+    """Parser for MessagePack request bodies"""
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False, strict_map_key=False)
+        except (ValueError, msgpack.ExtraData, msgpack.FormatError, msgpack.StackError) as exc:
+            raise ParseError('MessagePack parse error - %s' % str(exc))
@@ -0,0 +1,57 @@
+"""
+Server-sent event streams for the merchant verification API.
+
+These views hold a connection open per client and need the ASGI application
+(emvs/asgi.py); under WSGI they answer 501 and clients fall back to polling.
+"""
+
+import json
+import asyncio
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.utils import encoders
+
+from ..services.dashboard_stream import DashboardBroadcaster
+from .views import DASHBOARD_STAT_KEYS
+
+# One producer per process, shared by every open dashboard
+dashboard_broadcaster = DashboardBroadcaster(DASHBOARD_STAT_KEYS)
+
+
+def format_event(event, data):
+    """Encode one server-sent event"""
+    return f'event: {event}\ndata: {json.dumps(data, cls=encoders.JSONEncoder)}\n\n'
+
+
+async def dashboard_event_stream(queue):
+    """Yield a subscriber's events, with comments to keep idle connections open"""
+    try:
+        yield 'retry: 5000\n\n'
+        while True:
+            try:
+                event, data = await asyncio.wait_for(queue.get(), timeout=settings.DASHBOARD_STREAM_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            yield format_event(event, data)
+    finally:
+        dashboard_broadcaster.unsubscribe(queue)
+
+
+async def dashboard_stream(request):
+    """API endpoint streaming dashboard statistics as they change"""
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'detail': 'Live updates require the ASGI server.'}, status=501)
+
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=403)
+
+    queue = await dashboard_broadcaster.subscribe()
+    response = StreamingHttpResponse(dashboard_event_stream(queue), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -1,29 +1,48 @@
 from django.urls import path
-from . import views
+from . import views, streams
 
 urlpatterns = [
     # Merchant endpoints
     path('merchants/', views.MerchantListView.as_view(), name='api_merchant_list'),
+    path('merchants/bulk-verify/', views.BulkMerchantVerificationView.as_view(), name='api_merchant_bulk_verify'),
+    path('merchants/typeahead/', views.MerchantTypeaheadView.as_view(), name='api_merchant_typeahead'),
+    path('merchants/import/', views.MerchantImportView.as_view(), name='api_merchant_import'),
     path('merchants/<int:pk>/', views.MerchantDetailView.as_view(), name='api_merchant_detail'),
     path('merchants/<int:pk>/verify/', views.MerchantVerificationView.as_view(), name='api_merchant_verify'),
+    path('merchants/<int:pk>/verify/async/', views.AsyncMerchantVerificationView.as_view(), name='api_merchant_verify_async'),
+    path('verification-jobs/<int:pk>/', views.VerificationJobDetailView.as_view(), name='api_verification_job'),
+    path('verification-callbacks/<str:token>/', views.VerificationCallbackView.as_view(), name='api_verification_callback'),
     
     # Transaction patterns
     path('merchants/<int:merchant_id>/transactions/', views.TransactionPatternView.as_view(), name='api_transaction_patterns'),
     
     # Flags
     path('merchants/<int:merchant_id>/flags/', views.FlagListView.as_view(), name='api_merchant_flags'),
+    path('flags/queue/', views.FlagQueueView.as_view(), name='api_flag_queue'),
+    path('flags/queue/claim/', views.ClaimFlagsView.as_view(), name='api_claim_flags'),
+    path('flags/bulk-resolve/', views.BulkResolveFlagsView.as_view(), name='api_bulk_resolve_flags'),
     path('flags/<int:pk>/', views.FlagDetailView.as_view(), name='api_flag_detail'),
     path('flags/<int:pk>/resolve/', views.ResolveFlagView.as_view(), name='api_resolve_flag'),
+    path('flags/<int:pk>/release/', views.ReleaseFlagView.as_view(), name='api_release_flag'),
     
     # Reports
     path('merchants/<int:merchant_id>/reports/', views.ReportListView.as_view(), name='api_merchant_reports'),
     path('reports/<int:pk>/', views.ReportDetailView.as_view(), name='api_report_detail'),
     
+    # Streaming exports
+    path('exports/merchants/', views.MerchantExportView.as_view(), name='api_export_merchants'),
+    path('exports/flags/', views.FlagExportView.as_view(), name='api_export_flags'),
+    path('exports/audit-logs/', views.AuditLogExportView.as_view(), name='api_export_audit_logs'),
+    
     # Dashboard data
     path('dashboard/stats/', views.DashboardStatsView.as_view(), name='api_dashboard_stats'),
+    path('dashboard/stream/', streams.dashboard_stream, name='api_dashboard_stream'),
     path('dashboard/risk-distribution/', views.RiskDistributionView.as_view(), name='api_risk_distribution'),
     path('dashboard/business-types/', views.BusinessTypeDistributionView.as_view(), name='api_business_types'),
     
+    # Provider rate limits
+    path('providers/rate-limits/', views.ProviderRateLimitView.as_view(), name='api_provider_rate_limits'),
+    
     # Risk assessment
     path('assess-risk/', views.RiskAssessmentView.as_view(), name='api_assess_risk'),
 ]
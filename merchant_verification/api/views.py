@@ -1,62 +1,133 @@
+import hashlib
+from datetime import datetime, time
+
 from rest_framework import generics, status, permissions
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
-from django.db.models import Count, Q
+from django.urls import reverse
+from django.db import transaction
+from django.db.models import Q, Prefetch
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from django.http import StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from rest_framework.exceptions import ValidationError
 
 from ..models import (
     Merchant, 
     TransactionPattern, 
     VerificationFlag, 
     VerificationReport,
-    AuditLog
+    AuditLog,
+    PendingVerification,
+    VerificationJob
 )
 from ..serializers import (
     MerchantSerializer,
     MerchantListSerializer,
     MerchantVerificationSerializer,
+    BulkVerificationSerializer,
+    BulkFlagResolutionSerializer,
+    AsyncVerificationSerializer,
+    BatchRiskAssessmentSerializer,
+    PendingVerificationSerializer,
+    VerificationJobSerializer,
+    VerificationJobRequestSerializer,
     TransactionPatternSerializer,
     VerificationFlagSerializer,
-    VerificationReportSerializer
+    VerificationReportSerializer,
+    get_expanded_fields
 )
-from ..ml_models.risk_assessment import assess_merchant_risk
+from ..ml_models.risk_assessment import assess_merchant_risk, assess_merchants_risk
 from ..ml_models.transaction_analysis import analyze_transaction_patterns
-from ..services.external_api import verify_merchant_external
+from .pagination import KeysetPagination, ReportKeysetPagination, ReviewQueuePagination
+from .conditional import ConditionalGetMixin
+from ..views import get_client_ip
+from ..services.external_api import verify_merchants_external_bulk
+from ..services.coalescing import coalesce
+from ..services.rate_limiting import get_bucket_levels
+from ..services.data_version import bump_data_version, get_data_version
+from ..services.dashboard import get_dashboard_stats
+from ..services.merchant_import import import_merchants
+from ..services.exports import stream_export, aiter_export, EXPORT_FORMATS
+from ..services.search import search_merchants
+from ..services.flag_resolution import bulk_resolve_flags
+from ..services.review_queue import review_queue, claim_flags, release_flag
+from ..services.typeahead import merchant_index, DEFAULT_LIMIT as TYPEAHEAD_DEFAULT_LIMIT, MAX_LIMIT as TYPEAHEAD_MAX_LIMIT
+from ..services.verification_jobs import (
+    perform_merchant_verification,
+    enqueue_verification_job,
+    VerificationRequestInvalid
+)
+from ..services.async_verification import (
+    submit_async_verification,
+    verify_callback_signature,
+    complete_pending_verification
+)
+
+
+# Most flags one review queue claim may lease
+REVIEW_QUEUE_MAX_CLAIM = 50
+
+DASHBOARD_STAT_KEYS = [
+    'total_merchants',
+    'verified_merchants',
+    'flagged_merchants',
+    'pending_merchants',
+    'rejected_merchants',
+    'recent_merchants',
+    'open_flags',
+    'high_risk_merchants',
+]
+
+
+def filter_merchants(queryset, params):
+    """Apply the merchant list query parameter filters to a queryset"""
+    # Full-text search over name, registration number, website and email
+    query = params.get('q', None)
+    if query:
+        queryset = search_merchants(queryset, query, ranked=False)
+    
+    # Filter by name
+    name = params.get('name', None)
+    if name:
+        queryset = queryset.filter(name__icontains=name)
+    
+    # Filter by business type
+    business_type = params.get('business_type', None)
+    if business_type:
+        queryset = queryset.filter(business_type=business_type)
+    
+    # Filter by status
+    status_param = params.get('status', None)
+    if status_param:
+        queryset = queryset.filter(status=status_param)
+    
+    # Filter by risk level
+    risk_level = params.get('risk_level', None)
+    if risk_level:
+        queryset = queryset.filter(risk_level=risk_level)
+    
+    # Filter by country
+    country = params.get('country', None)
+    if country:
+        queryset = queryset.filter(country__icontains=country)
+    
+    return queryset
 
 
 class MerchantListView(generics.ListCreateAPIView):
     """API endpoint for listing and creating merchants"""
     serializer_class = MerchantListSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
-        queryset = Merchant.objects.all()
-        
-        # Filter by name
-        name = self.request.query_params.get('name', None)
-        if name:
-            queryset = queryset.filter(name__icontains=name)
-        
-        # Filter by business type
-        business_type = self.request.query_params.get('business_type', None)
-        if business_type:
-            queryset = queryset.filter(business_type=business_type)
+        # Large JSON columns are never part of the list representation
+        queryset = Merchant.objects.defer('verification_data', 'external_api_response')
         
-        # Filter by status
-        status_param = self.request.query_params.get('status', None)
-        if status_param:
-            queryset = queryset.filter(status=status_param)
-        
-        # Filter by risk level
-        risk_level = self.request.query_params.get('risk_level', None)
-        if risk_level:
-            queryset = queryset.filter(risk_level=risk_level)
-        
-        # Filter by country
-        country = self.request.query_params.get('country', None)
-        if country:
-            queryset = queryset.filter(country__icontains=country)
+        queryset = filter_merchants(queryset, self.request.query_params)
         
         return queryset.order_by('-created_at')
     
@@ -74,12 +145,87 @@ class MerchantListView(generics.ListCreateAPIView):
         )
 
 
-class MerchantDetailView(generics.RetrieveUpdateAPIView):
+class MerchantTypeaheadView(APIView):
+    """
+    API endpoint suggesting merchants as a name or registration number is typed
+    
+    Answered from an in-memory prefix index; returns only id, name and status.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        limit = request.query_params.get('limit', str(TYPEAHEAD_DEFAULT_LIMIT))
+        if not limit.isdigit() or int(limit) < 1:
+            raise ValidationError({'limit': 'Expected a positive integer.'})
+        
+        results = merchant_index.search(
+            request.query_params.get('q', ''),
+            min(int(limit), TYPEAHEAD_MAX_LIMIT)
+        )
+        return Response({'results': results})
+
+
+class MerchantDetailView(ConditionalGetMixin, generics.RetrieveUpdateAPIView):
     """API endpoint for retrieving and updating a merchant"""
     queryset = Merchant.objects.all()
     serializer_class = MerchantSerializer
     permission_classes = [permissions.IsAuthenticated]
     
+    # Columns of the nested flags and patterns the response shows
+    flag_validator_fields = (
+        'id', 'flag_type', 'description', 'severity', 'status', 'created_at', 'created_by',
+        'resolved_at', 'resolved_by', 'resolution_notes', 'priority', 'claimed_by', 'claimed_until'
+    )
+    pattern_validator_fields = tuple(TransactionPatternSerializer.Meta.fields)
+    
+    def get_validators(self, request, pk):
+        row = Merchant.objects.filter(pk=pk).values_list(
+            'updated_at', 'open_flag_count', 'latest_transaction_pattern'
+        ).first()
+        if row is None:
+            return None
+        
+        # Flags and patterns are written without touching the merchant's
+        # updated_at, so the validator covers the nested rows the response
+        # includes; writes to other merchants leave it alone
+        updated_at = row[0]
+        state = [row]
+        timestamps = [updated_at]
+        expanded = get_expanded_fields(request, MerchantSerializer)
+        if 'verification_flags' in expanded:
+            flags = list(VerificationFlag.objects.filter(merchant_id=pk).order_by('id').values(
+                *self.flag_validator_fields
+            ))
+            state.append(flags)
+            timestamps.extend(flag['resolved_at'] or flag['created_at'] for flag in flags)
+        if 'transaction_patterns' in expanded:
+            patterns = list(TransactionPattern.objects.filter(merchant_id=pk).order_by('id').values(
+                *self.pattern_validator_fields
+            ))
+            state.append(patterns)
+            timestamps.extend(pattern['analysis_date'] for pattern in patterns)
+        
+        digest = hashlib.md5(repr(state).encode('utf-8')).hexdigest()[:16]
+        return f'{pk}-{updated_at.timestamp()}-{digest}', max(timestamps)
+    
+    def get_queryset(self):
+        queryset = Merchant.objects.select_related('created_by', 'verified_by')
+        if self.request.method != 'GET':
+            return queryset
+        
+        # Only prefetch the nested relations the response will include
+        prefetches = {
+            'transaction_patterns': 'transaction_patterns',
+            'verification_flags': Prefetch(
+                'verification_flags',
+                queryset=VerificationFlag.objects.select_related('created_by', 'resolved_by')
+            ),
+        }
+        expanded = get_expanded_fields(self.request, MerchantSerializer)
+        queryset = queryset.prefetch_related(*(prefetches[name] for name in sorted(expanded)))
+        
+        return queryset.defer('verification_data', 'external_api_response')
+    
     def perform_update(self, serializer):
         merchant = serializer.save()
         
@@ -91,48 +237,212 @@ class MerchantDetailView(generics.RetrieveUpdateAPIView):
         )
 
 
+def wants_async(request):
+    """Whether the client asked for a 202 Accepted instead of waiting for the result"""
+    if request.query_params.get('async', '').lower() in ('1', 'true', 'yes'):
+        return True
+    prefer = request.headers.get('Prefer', '')
+    return 'respond-async' in [token.strip() for token in prefer.split(',')]
+
+
 class MerchantVerificationView(APIView):
-    """API endpoint for verifying a merchant"""
+    """
+    API endpoint for verifying a merchant.
+    
+    With ?async=true or a "Prefer: respond-async" header the verification is
+    queued for a background worker and the response is 202 Accepted with the
+    job, whose status URL is in the Location header.
+    """
     permission_classes = [permissions.IsAuthenticated]
     
     def post(self, request, pk):
         merchant = get_object_or_404(Merchant, pk=pk)
+        
+        if wants_async(request):
+            return self.enqueue(request, merchant)
+        
+        try:
+            result = perform_merchant_verification(merchant, request.data, request.user)
+        except VerificationRequestInvalid as e:
+            return Response(e.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(result)
+    
+    def enqueue(self, request, merchant):
         serializer = MerchantVerificationSerializer(merchant, data=request.data, partial=True)
+        job_serializer = VerificationJobRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        if not job_serializer.is_valid():
+            return Response(job_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
-        if serializer.is_valid():
-            # Get risk assessment from ML model
-            risk_data = assess_merchant_risk(merchant)
-            
-            # Get external verification data
-            external_data = verify_merchant_external(merchant)
+        # Store the submitted fields, the worker validates them again when it runs
+        data = {field: request.data[field] for field in serializer.validated_data}
+        job = enqueue_verification_job(
+            merchant,
+            data,
+            request.user,
+            callback_url=job_serializer.validated_data.get('callback_url')
+        )
+        
+        return Response(
+            VerificationJobSerializer(job).data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': request.build_absolute_uri(reverse('api_verification_job', args=[job.pk]))}
+        )
+
+
+class VerificationJobDetailView(generics.RetrieveAPIView):
+    """API endpoint for polling a background verification job"""
+    queryset = VerificationJob.objects.all()
+    serializer_class = VerificationJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+
+class BulkMerchantVerificationView(APIView):
+    """API endpoint for running external verification on many merchants"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        serializer = BulkVerificationSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        merchant_ids = list(dict.fromkeys(serializer.validated_data['merchant_ids']))
+        merchants = Merchant.objects.in_bulk(merchant_ids)
+        
+        # Verify all found merchants through provider batch or pooled calls
+        external_results = verify_merchants_external_bulk(merchants.values())
+        
+        # Results and their audit trail are saved together or not at all
+        now = timezone.now()
+        with transaction.atomic():
+            for merchant in merchants.values():
+                merchant.external_api_response = external_results[merchant.pk]
+                merchant.updated_at = now
+            Merchant.objects.bulk_update(merchants.values(), ['external_api_response', 'updated_at'])
+            bump_data_version()
             
-            # Update merchant with verification data
-            merchant = serializer.save(
-                verified_by=request.user,
-                last_verified_at=timezone.now(),
-                external_api_response=external_data
-            )
+            # Create audit logs
+            AuditLog.objects.bulk_create([
+                AuditLog(
+                    user=request.user,
+                    merchant=merchant,
+                    action='verify',
+                    details={
+                        'bulk': True,
+                        'external_verification_status': merchant.external_api_response.get('verification_status')
+                    }
+                )
+                for merchant in merchants.values()
+            ])
+        
+        results = []
+        for merchant_id in merchant_ids:
+            if merchant_id not in merchants:
+                results.append({
+                    'merchant_id': merchant_id,
+                    'error': f'Merchant with id {merchant_id} not found'
+                })
+                continue
             
-            # Create audit log
-            audit_details = {
-                'status': merchant.status,
-                'risk_level': merchant.risk_level,
-                'risk_score': merchant.risk_score
+            external_data = external_results[merchant_id]
+            result = {
+                'merchant_id': merchant_id,
+                'external_verification': external_data
             }
-            AuditLog.objects.create(
-                user=request.user,
-                merchant=merchant,
-                action='verify',
-                details=audit_details
+            if external_data.get('verification_status') == 'error':
+                result['error'] = external_data.get('error')
+            results.append(result)
+        
+        return Response({'results': results})
+
+
+class MerchantImportView(APIView):
+    """
+    API endpoint for bulk-importing merchants.
+    
+    The request body is CSV with a header row (Content-Type: text/csv) or
+    NDJSON (Content-Type: application/x-ndjson), or a multipart upload with
+    the data in a 'file' field. The body is parsed as it is read.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    CONTENT_TYPES = {
+        'text/csv': 'csv',
+        'application/x-ndjson': 'ndjson',
+        'application/ndjson': 'ndjson',
+        'application/jsonl': 'ndjson',
+    }
+    
+    def post(self, request):
+        content_type = request.content_type.split(';')[0].strip().lower()
+        
+        if content_type == 'multipart/form-data':
+            upload = request.FILES.get('file')
+            if upload is None:
+                return Response({'error': 'No file uploaded'}, status=status.HTTP_400_BAD_REQUEST)
+            import_format = 'csv' if upload.name.lower().endswith('.csv') else 'ndjson'
+            stream = upload
+        elif content_type in self.CONTENT_TYPES:
+            import_format = self.CONTENT_TYPES[content_type]
+            stream = request.stream or []
+        else:
+            return Response(
+                {'error': 'Send text/csv or application/x-ndjson'},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
             )
-            
-            return Response({
-                'merchant': MerchantSerializer(merchant).data,
-                'risk_assessment': risk_data,
-                'external_verification': external_data
-            })
         
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        summary = import_merchants(stream, import_format, request.user)
+        return Response(summary)
+
+
+class AsyncMerchantVerificationView(APIView):
+    """API endpoint for submitting and listing asynchronous verification checks"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request, pk):
+        merchant = get_object_or_404(Merchant, pk=pk)
+        pending = merchant.pending_verifications.all()
+        return Response(PendingVerificationSerializer(pending, many=True).data)
+    
+    def post(self, request, pk):
+        merchant = get_object_or_404(Merchant, pk=pk)
+        serializer = AsyncVerificationSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        def build_callback_url(token):
+            return request.build_absolute_uri(reverse('api_verification_callback', args=[token]))
+        
+        pending = [
+            submit_async_verification(merchant, check_type, request.user, build_callback_url)
+            for check_type in dict.fromkeys(serializer.validated_data['check_types'])
+        ]
+        
+        return Response(
+            PendingVerificationSerializer(pending, many=True).data,
+            status=status.HTTP_202_ACCEPTED
+        )
+
+
+class VerificationCallbackView(APIView):
+    """Webhook endpoint receiving asynchronous verification results from providers"""
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+    
+    def post(self, request, token):
+        pending = get_object_or_404(PendingVerification, callback_token=token)
+        
+        # Read the raw body before parsing so the signature covers the exact bytes
+        if not verify_callback_signature(request.body, request.headers.get('X-Provider-Signature')):
+            return Response({'error': 'Invalid signature'}, status=status.HTTP_403_FORBIDDEN)
+        
+        if not isinstance(request.data, dict) or not isinstance(request.data.get('result') or {}, dict):
+            return Response({'error': 'Callback result must be an object'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        pending = complete_pending_verification(pending, request.data)
+        return Response(PendingVerificationSerializer(pending).data)
 
 
 class TransactionPatternView(APIView):
@@ -149,7 +459,7 @@ class TransactionPatternView(APIView):
         merchant = get_object_or_404(Merchant, pk=merchant_id)
         
         # Analyze transaction patterns
-        transaction_data = analyze_transaction_patterns(merchant)
+        transaction_data = coalesce('transactions', merchant, analyze_transaction_patterns)
         
         # Create or update transaction pattern record
         transaction_pattern, created = TransactionPattern.objects.update_or_create(
@@ -173,10 +483,13 @@ class FlagListView(generics.ListCreateAPIView):
     """API endpoint for listing and creating flags for a merchant"""
     serializer_class = VerificationFlagSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         merchant_id = self.kwargs.get('merchant_id')
-        return VerificationFlag.objects.filter(merchant_id=merchant_id).order_by('-created_at')
+        return VerificationFlag.objects.filter(merchant_id=merchant_id).select_related(
+            'created_by', 'resolved_by', 'claimed_by'
+        ).order_by('-created_at')
     
     def perform_create(self, serializer):
         merchant_id = self.kwargs.get('merchant_id')
@@ -212,6 +525,48 @@ class FlagDetailView(generics.RetrieveUpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
 
+class FlagQueueView(generics.ListAPIView):
+    """API endpoint listing open flags in review priority order"""
+    serializer_class = VerificationFlagSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ReviewQueuePagination
+    
+    def get_queryset(self):
+        return review_queue().select_related('created_by', 'resolved_by', 'claimed_by')
+
+
+class ClaimFlagsView(APIView):
+    """
+    API endpoint leasing the highest priority unclaimed flags to the caller
+    
+    Accepts an optional count (default 1, at most REVIEW_QUEUE_MAX_CLAIM).
+    Claimed flags return to the queue when the lease expires or is released.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        count = str(request.data.get('count', 1))
+        if not count.isdigit() or not 1 <= int(count) <= REVIEW_QUEUE_MAX_CLAIM:
+            raise ValidationError({'count': f'Expected an integer from 1 to {REVIEW_QUEUE_MAX_CLAIM}.'})
+        
+        flags = claim_flags(request.user, int(count))
+        return Response({'results': VerificationFlagSerializer(flags, many=True).data})
+
+
+class ReleaseFlagView(APIView):
+    """API endpoint returning a claimed flag to the review queue"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request, pk):
+        flag = get_object_or_404(VerificationFlag, pk=pk)
+        if not release_flag(flag.pk, request.user):
+            return Response(
+                {'error': 'This flag is not claimed by you.'},
+                status=status.HTTP_409_CONFLICT
+            )
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 class ResolveFlagView(APIView):
     """API endpoint for resolving a verification flag"""
     permission_classes = [permissions.IsAuthenticated]
@@ -236,13 +591,11 @@ class ResolveFlagView(APIView):
         flag.resolution_notes = resolution_notes
         flag.save()
         
-        # Check if there are any more open flags
-        open_flags = merchant.verification_flags.filter(
-            status__in=['open', 'investigating']
-        ).exists()
+        # The flag save updated the merchant's open flag count
+        merchant.refresh_from_db(fields=['open_flag_count'])
         
         # If no more open flags, update merchant status
-        if not open_flags and merchant.status == 'flagged':
+        if not merchant.open_flag_count and merchant.status == 'flagged':
             merchant.status = 'verified'
             merchant.save()
         
@@ -263,18 +616,54 @@ class ResolveFlagView(APIView):
         return Response(serializer.data)
 
 
+class BulkResolveFlagsView(APIView):
+    """
+    API endpoint for resolving or dismissing many flags at once
+    
+    Flags that do not exist or are already closed are reported as skipped;
+    flags another analyst has claimed for review are left open and reported
+    as claimed.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        serializer = BulkFlagResolutionSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        result = bulk_resolve_flags(
+            serializer.validated_data['flag_ids'],
+            request.user,
+            status=serializer.validated_data['status'],
+            notes=serializer.validated_data['resolution_notes'],
+            ip_address=get_client_ip(request)
+        )
+        return Response(result)
+
+
 class ReportListView(generics.ListCreateAPIView):
     """API endpoint for listing and creating reports for a merchant"""
     serializer_class = VerificationReportSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ReportKeysetPagination
     
     def get_queryset(self):
         merchant_id = self.kwargs.get('merchant_id')
-        return VerificationReport.objects.filter(merchant_id=merchant_id).order_by('-report_date')
+        queryset = VerificationReport.objects.filter(merchant_id=merchant_id).select_related(
+            'generated_by'
+        ).prefetch_related(
+            Prefetch('merchant', queryset=Merchant.objects.defer(
+                'verification_data', 'external_api_response'
+            ))
+        ).order_by('-report_date')
+        
+        if 'report_data' not in get_expanded_fields(self.request, VerificationReportSerializer):
+            queryset = queryset.defer('report_data')
+        return queryset
     
     def perform_create(self, serializer):
         merchant_id = self.kwargs.get('merchant_id')
-        merchant = get_object_or_404(Merchant, pk=merchant_id)
+        merchant = get_object_or_404(Merchant.objects.select_related('latest_transaction_pattern'), pk=merchant_id)
         
         # Compile report data
         report_data = {
@@ -291,15 +680,15 @@ class ReportListView(generics.ListCreateAPIView):
         }
         
         # Add transaction pattern data if available
-        try:
-            transaction_pattern = merchant.transaction_patterns.latest('analysis_date')
+        transaction_pattern = merchant.latest_transaction_pattern
+        if transaction_pattern is not None:
             report_data['transaction_pattern'] = {
                 'average_transaction_amount': str(transaction_pattern.average_transaction_amount),
                 'monthly_transaction_volume': transaction_pattern.monthly_transaction_volume,
                 'high_risk_countries_percentage': transaction_pattern.high_risk_countries_percentage,
                 'chargeback_rate': transaction_pattern.chargeback_rate,
             }
-        except TransactionPattern.DoesNotExist:
+        else:
             report_data['transaction_pattern'] = None
         
         # Add flags
@@ -327,45 +716,210 @@ class ReportDetailView(generics.RetrieveAPIView):
     queryset = VerificationReport.objects.all()
     serializer_class = VerificationReportSerializer
     permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        queryset = VerificationReport.objects.select_related('generated_by', 'merchant')
+        if 'report_data' not in get_expanded_fields(self.request, VerificationReportSerializer):
+            queryset = queryset.defer('report_data')
+        return queryset
 
 
-class DashboardStatsView(APIView):
-    """API endpoint for dashboard statistics"""
+class ExportView(APIView):
+    """
+    Base class for streaming NDJSON or CSV exports.
+    
+    ?output=ndjson (default) or ?output=csv selects the format; DRF reserves
+    ?format= for renderer selection. Subclasses define the columns as
+    (column name, field lookup) pairs and a filtered get_queryset().
+    """
     permission_classes = [permissions.IsAuthenticated]
+    columns = []
+    filename = 'export'
+    
+    def get_queryset(self):
+        raise NotImplementedError
+    
+    def perform_content_negotiation(self, request, force=False):
+        # The export format comes from ?output=, so Accept: text/csv must not 406;
+        # the negotiated renderer is only used for error responses
+        return super().perform_content_negotiation(request, force=True)
+    
+    def parse_datetime_param(self, name):
+        value = self.request.query_params.get(name)
+        if not value:
+            return None
+        
+        try:
+            parsed = parse_datetime(value)
+            if parsed is None:
+                date = parse_date(value)
+                parsed = datetime.combine(date, time.min) if date else None
+        except ValueError:
+            parsed = None
+        
+        if parsed is None:
+            raise ValidationError({name: 'Expected an ISO 8601 date or datetime.'})
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+    
+    def parse_id_param(self, name):
+        value = self.request.query_params.get(name)
+        if not value:
+            return None
+        if not value.isdigit():
+            raise ValidationError({name: 'Expected an id.'})
+        return int(value)
     
     def get(self, request):
-        total_merchants = Merchant.objects.count()
-        verified_merchants = Merchant.objects.filter(status='verified').count()
-        flagged_merchants = Merchant.objects.filter(status='flagged').count()
-        pending_merchants = Merchant.objects.filter(status='pending').count()
-        rejected_merchants = Merchant.objects.filter(status='rejected').count()
-        
-        # Recent merchants (last 30 days)
-        thirty_days_ago = timezone.now() - timezone.timedelta(days=30)
-        recent_merchants = Merchant.objects.filter(
-            created_at__gte=thirty_days_ago
-        ).count()
-        
-        # Open flags
-        open_flags = VerificationFlag.objects.filter(
-            status__in=['open', 'investigating']
-        ).count()
-        
-        # High risk merchants
-        high_risk_merchants = Merchant.objects.filter(
-            risk_level__in=['high', 'extreme']
-        ).count()
-        
-        return Response({
-            'total_merchants': total_merchants,
-            'verified_merchants': verified_merchants,
-            'flagged_merchants': flagged_merchants,
-            'pending_merchants': pending_merchants,
-            'rejected_merchants': rejected_merchants,
-            'recent_merchants': recent_merchants,
-            'open_flags': open_flags,
-            'high_risk_merchants': high_risk_merchants
-        })
+        export_format = request.query_params.get('output', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {'output': f"Choose one of: {', '.join(EXPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        queryset = self.get_queryset().order_by('id')
+        content = stream_export(queryset, self.columns, export_format)
+        if isinstance(request._request, ASGIRequest):
+            # A sync iterator would be read to the end before the first byte is sent
+            content = aiter_export(content)
+        response = StreamingHttpResponse(content, content_type=EXPORT_FORMATS[export_format])
+        response['Content-Disposition'] = f'attachment; filename="{self.filename}.{export_format}"'
+        return response
+
+
+class MerchantExportView(ExportView):
+    """API endpoint streaming merchants, filtered like the merchant list"""
+    filename = 'merchants'
+    columns = [
+        ('id', 'id'),
+        ('name', 'name'),
+        ('business_type', 'business_type'),
+        ('registration_number', 'registration_number'),
+        ('tax_id', 'tax_id'),
+        ('website', 'website'),
+        ('email', 'email'),
+        ('phone', 'phone'),
+        ('address', 'address'),
+        ('city', 'city'),
+        ('state', 'state'),
+        ('country', 'country'),
+        ('postal_code', 'postal_code'),
+        ('status', 'status'),
+        ('risk_level', 'risk_level'),
+        ('risk_score', 'risk_score'),
+        ('created_at', 'created_at'),
+        ('updated_at', 'updated_at'),
+        ('last_verified_at', 'last_verified_at'),
+        ('created_by', 'created_by__username'),
+        ('verified_by', 'verified_by__username'),
+    ]
+    
+    def get_queryset(self):
+        queryset = filter_merchants(Merchant.objects.all(), self.request.query_params)
+        
+        created_after = self.parse_datetime_param('created_after')
+        if created_after:
+            queryset = queryset.filter(created_at__gte=created_after)
+        created_before = self.parse_datetime_param('created_before')
+        if created_before:
+            queryset = queryset.filter(created_at__lt=created_before)
+        
+        return queryset
+
+
+class FlagExportView(ExportView):
+    """API endpoint streaming verification flags"""
+    filename = 'flags'
+    columns = [
+        ('id', 'id'),
+        ('merchant_id', 'merchant_id'),
+        ('merchant_name', 'merchant__name'),
+        ('flag_type', 'flag_type'),
+        ('description', 'description'),
+        ('severity', 'severity'),
+        ('status', 'status'),
+        ('created_at', 'created_at'),
+        ('created_by', 'created_by__username'),
+        ('resolved_at', 'resolved_at'),
+        ('resolved_by', 'resolved_by__username'),
+        ('resolution_notes', 'resolution_notes'),
+    ]
+    
+    def get_queryset(self):
+        queryset = VerificationFlag.objects.all()
+        params = self.request.query_params
+        
+        for field in ['status', 'severity', 'flag_type']:
+            if params.get(field):
+                queryset = queryset.filter(**{field: params[field]})
+        merchant_id = self.parse_id_param('merchant')
+        if merchant_id:
+            queryset = queryset.filter(merchant_id=merchant_id)
+        
+        created_after = self.parse_datetime_param('created_after')
+        if created_after:
+            queryset = queryset.filter(created_at__gte=created_after)
+        created_before = self.parse_datetime_param('created_before')
+        if created_before:
+            queryset = queryset.filter(created_at__lt=created_before)
+        
+        return queryset
+
+
+class AuditLogExportView(ExportView):
+    """API endpoint streaming audit log entries"""
+    filename = 'audit-logs'
+    columns = [
+        ('id', 'id'),
+        ('timestamp', 'timestamp'),
+        ('action', 'action'),
+        ('merchant_id', 'merchant_id'),
+        ('merchant_name', 'merchant__name'),
+        ('user', 'user__username'),
+        ('ip_address', 'ip_address'),
+        ('details', 'details'),
+    ]
+    
+    def get_queryset(self):
+        queryset = AuditLog.objects.all()
+        params = self.request.query_params
+        
+        if params.get('action'):
+            queryset = queryset.filter(action=params['action'])
+        merchant_id = self.parse_id_param('merchant')
+        if merchant_id:
+            queryset = queryset.filter(merchant_id=merchant_id)
+        if params.get('user'):
+            queryset = queryset.filter(user__username=params['user'])
+        
+        since = self.parse_datetime_param('since')
+        if since:
+            queryset = queryset.filter(timestamp__gte=since)
+        until = self.parse_datetime_param('until')
+        if until:
+            queryset = queryset.filter(timestamp__lt=until)
+        
+        return queryset
+
+
+class DashboardStatsView(ConditionalGetMixin, APIView):
+    """API endpoint for dashboard statistics"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_validators(self, request):
+        version, updated_at = get_data_version()
+        
+        # recent_merchants depends on the date as well as the data
+        start_of_day = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+        last_modified = max(updated_at, start_of_day) if updated_at else start_of_day
+        return f'{start_of_day.date().isoformat()}-{version}', last_modified
+    
+    def retrieve(self, request):
+        stats = get_dashboard_stats()
+        
+        return Response({key: stats[key] for key in DASHBOARD_STAT_KEYS})
 
 
 class RiskDistributionView(APIView):
@@ -373,13 +927,7 @@ class RiskDistributionView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request):
-        risk_levels = Merchant.objects.filter(
-            risk_level__isnull=False
-        ).values('risk_level').annotate(
-            count=Count('id')
-        ).order_by('risk_level')
-        
-        return Response(risk_levels)
+        return Response(get_dashboard_stats()['risk_levels'])
 
 
 class BusinessTypeDistributionView(APIView):
@@ -387,18 +935,47 @@ class BusinessTypeDistributionView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request):
-        business_types = Merchant.objects.values('business_type').annotate(
-            count=Count('id')
-        ).order_by('business_type')
-        
-        return Response(business_types)
+        return Response(get_dashboard_stats()['business_types'])
+
+
+class ProviderRateLimitView(APIView):
+    """API endpoint for provider rate limit levels and throttling metrics"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request):
+        return Response(get_bucket_levels())
+
+
+PROSPECT_FIELDS = [
+    'name', 'business_type', 'registration_number', 'website', 'email',
+    'phone', 'address', 'city', 'state', 'country'
+]
+
+
+def prospect_from_data(merchant_data):
+    """Build an unsaved Merchant from prospect data for ad-hoc assessment"""
+    fields = {field: merchant_data[field] for field in PROSPECT_FIELDS if merchant_data.get(field)}
+    fields.setdefault('name', 'Unknown')
+    fields.setdefault('business_type', 'other')
+    return Merchant(**fields)
 
 
 class RiskAssessmentView(APIView):
-    """API endpoint for assessing merchant risk"""
+    """
+    API endpoint for assessing merchant risk.
+    
+    Accepts a single 'merchant_data' object, or a batch of prospect records
+    in 'merchants' and/or stored merchants in 'merchant_ids'. Batches are
+    scored together and answered with one result per record, in input order
+    (merchants first, then merchant_ids), each carrying an 'error' instead of
+    an assessment if the record could not be scored.
+    """
     permission_classes = [permissions.IsAuthenticated]
     
     def post(self, request):
+        if 'merchants' in request.data or 'merchant_ids' in request.data:
+            return self.post_batch(request)
+        
         # Extract data from request
         merchant_data = request.data.get('merchant_data', {})
         
@@ -420,15 +997,48 @@ class RiskAssessmentView(APIView):
                 )
         else:
             # Create a temporary merchant object for assessment
-            merchant = Merchant(
-                name=merchant_data.get('name', 'Unknown'),
-                business_type=merchant_data.get('business_type', 'other'),
-                website=merchant_data.get('website'),
-                country=merchant_data.get('country'),
-                # Add other fields as needed
-            )
+            merchant = prospect_from_data(merchant_data)
         
         # Assess risk
         risk_data = assess_merchant_risk(merchant)
         
         return Response(risk_data)
+    
+    def post_batch(self, request):
+        serializer = BatchRiskAssessmentSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        records = list(serializer.validated_data.get('merchants', []))
+        records += [{'id': merchant_id} for merchant_id in serializer.validated_data.get('merchant_ids', [])]
+        
+        # Stored merchants are loaded in one query
+        business_types = dict(Merchant.BUSINESS_TYPE_CHOICES)
+        stored = Merchant.objects.in_bulk([
+            record['id'] for record in records
+            if isinstance(record, dict) and isinstance(record.get('id'), int)
+        ])
+        
+        results = [{} for _ in records]
+        to_assess = []
+        for result, record in zip(results, records):
+            if not isinstance(record, dict):
+                result['error'] = 'Expected an object'
+            elif record.get('id') is not None:
+                result['merchant_id'] = record['id']
+                if not isinstance(record['id'], int):
+                    result['error'] = 'Invalid merchant id'
+                elif record['id'] in stored:
+                    to_assess.append((result, stored[record['id']]))
+                else:
+                    result['error'] = f"Merchant with id {record['id']} not found"
+            elif record.get('business_type') and record['business_type'] not in business_types:
+                result['error'] = f"Invalid business_type: {record['business_type']}"
+            else:
+                to_assess.append((result, prospect_from_data(record)))
+        
+        assessments = assess_merchants_risk([merchant for _, merchant in to_assess])
+        for (result, _), assessment in zip(to_assess, assessments):
+            result.update(assessment)
+        
+        return Response({'results': results})
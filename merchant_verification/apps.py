@@ -5,3 +5,6 @@ class MerchantVerificationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'merchant_verification'
     verbose_name = 'Enhanced Merchant Verification System'
+
+    def ready(self):
+        from . import signals  # noqa: F401
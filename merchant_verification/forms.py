@@ -71,6 +71,17 @@ class ResolveFlagForm(forms.ModelForm):
         }
 
 
+class BulkResolveFlagsForm(forms.Form):
+    status = forms.ChoiceField(
+        choices=[('resolved', 'Resolved'), ('dismissed', 'Dismissed')],
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    resolution_notes = forms.CharField(
+        required=False,
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Resolution notes'})
+    )
+
+
 class VerificationReportForm(forms.ModelForm):
     class Meta:
         model = VerificationReport
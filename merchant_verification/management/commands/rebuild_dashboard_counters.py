@@ -0,0 +1,19 @@
+"""
+Rebuild the precomputed dashboard counters from the merchant and flag tables.
+
+Run once before setting DASHBOARD_COUNTERS_ENABLED, and after any bulk change
+that bypasses model saves.
+"""
+
+from django.core.management.base import BaseCommand
+
+from ...services.dashboard import rebuild_dashboard_counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute the precomputed dashboard counters'
+
+    def handle(self, *args, **options):
+        counts = rebuild_dashboard_counters()
+        self.stdout.write(f"Rebuilt {len(counts)} counters ({counts['total']} merchants, "
+                          f"{counts['open_flags']} open flags)")
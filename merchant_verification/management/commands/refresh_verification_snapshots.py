@@ -0,0 +1,33 @@
+"""
+Background refresher for merchant verification snapshots.
+
+Recomputes the snapshots behind the verification page whenever their inputs
+change or they age out. Several refreshers can run side by side; each claims
+snapshots with SKIP LOCKED.
+"""
+
+from django.core.management.base import BaseCommand
+
+from ...services.verification_snapshots import run_snapshot_refresher
+
+
+class Command(BaseCommand):
+    help = 'Refresh stale merchant verification snapshots'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll-interval', type=float, default=5.0,
+                            help='Seconds to wait when no snapshot needs a refresh')
+        parser.add_argument('--batch-size', type=int, default=50,
+                            help='Snapshots claimed per batch')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once no snapshot needs a refresh')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Snapshot refresher started')
+
+        try:
+            refreshed = run_snapshot_refresher(options['poll_interval'], options['batch_size'], options['once'])
+        except KeyboardInterrupt:
+            return
+
+        self.stdout.write(f'Refreshed {refreshed} verification snapshots')
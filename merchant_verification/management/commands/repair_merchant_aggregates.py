@@ -0,0 +1,22 @@
+"""
+Recompute the denormalized open flag counts and latest transaction patterns
+stored on merchants.
+
+Run after any bulk change to flags or transaction patterns that bypasses
+model saves, or to correct drift.
+"""
+
+from django.core.management.base import BaseCommand
+
+from ...services.merchant_aggregates import repair_merchant_aggregates
+
+
+class Command(BaseCommand):
+    help = 'Recompute the open flag count and latest transaction pattern of every merchant'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Merchants updated per statement')
+
+    def handle(self, *args, **options):
+        updated = repair_merchant_aggregates(options['batch_size'])
+        self.stdout.write(f"Repaired aggregates of {updated} merchants")
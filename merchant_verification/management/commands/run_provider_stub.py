@@ -0,0 +1,263 @@
+"""
+Local stand-in for the external verification and sanctions providers.
+
+Serves the same response shapes as simulate_verification_response and
+simulate_sanctions_response over HTTP, with configurable latency, error
+rates and throttling, so the pooled client, caches and rate limiters can be
+load-tested without a network. Point the app at it with:
+
+    EXTERNAL_API_MODE=http
+    BUSINESS_VERIFICATION_API_URL=http://127.0.0.1:8081/
+    SANCTIONS_API_URL=http://127.0.0.1:8081/
+
+Asynchronous checks (POST /verify/async) are acknowledged immediately and
+answered by a signed POST to the request's callback_url after a delay.
+"""
+
+import hashlib
+import hmac
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from urllib.parse import urlparse, parse_qs
+
+import requests
+from django.core.management.base import BaseCommand
+
+from ...services.external_api import simulate_verification_response, simulate_sanctions_response
+
+LATENCY_DISTRIBUTIONS = ['fixed', 'uniform', 'normal', 'lognormal', 'exponential']
+
+
+def sample_latency(distribution, mean_ms, jitter_ms):
+    """
+    Sample a response latency.
+
+    Args:
+        distribution (str): One of LATENCY_DISTRIBUTIONS
+        mean_ms (float): Mean latency in milliseconds
+        jitter_ms (float): Spread in milliseconds (half-width for uniform, stddev otherwise)
+
+    Returns:
+        float: Latency in seconds
+    """
+    if distribution == 'uniform':
+        latency = random.uniform(mean_ms - jitter_ms, mean_ms + jitter_ms)
+    elif distribution == 'normal':
+        latency = random.gauss(mean_ms, jitter_ms)
+    elif distribution == 'lognormal':
+        # Long-tailed latency with the requested mean and standard deviation
+        sigma2 = 0.0 if mean_ms <= 0 else math.log(1 + (jitter_ms / mean_ms) ** 2)
+        mu = math.log(max(mean_ms, 1e-9)) - sigma2 / 2
+        latency = random.lognormvariate(mu, sigma2 ** 0.5)
+    elif distribution == 'exponential':
+        latency = random.expovariate(1 / mean_ms) if mean_ms > 0 else 0
+    else:
+        latency = mean_ms
+
+    return max(0.0, latency) / 1000
+
+
+def merchant_from_params(params):
+    """Build a merchant-like object from provider request parameters"""
+    return SimpleNamespace(
+        name=params.get('business_name') or '',
+        registration_number=params.get('registration_number') or '',
+        country=params.get('country') or '',
+        business_type=params.get('business_type') or 'other',
+        website=params.get('website') or None,
+    )
+
+
+class ProviderStubServer(ThreadingHTTPServer):
+    """HTTP server holding the stub's latency, error and throttling settings"""
+
+    daemon_threads = True
+
+    def __init__(self, address, latency='fixed', latency_ms=200, jitter_ms=50,
+                 error_rate=0.0, rate_limit=0, callback_delay_ms=2000, webhook_secret=''):
+        super().__init__(address, ProviderStubHandler)
+        self.latency = latency
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.callback_delay_ms = callback_delay_ms
+        self.webhook_secret = webhook_secret
+        # Rates below one request per second still need room for a whole token
+        self._capacity = max(1.0, float(rate_limit))
+        self._tokens = self._capacity
+        self._last_refill = time.monotonic()
+        self._throttle_lock = threading.Lock()
+
+    def take_token(self):
+        """Take a request token, returning False when the caller is throttled"""
+        if not self.rate_limit:
+            return True
+
+        with self._throttle_lock:
+            now = time.monotonic()
+            self._tokens = min(self._capacity, self._tokens + (now - self._last_refill) * self.rate_limit)
+            self._last_refill = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def send_callback(self, request, request_id):
+        """POST the result of an asynchronous check to its callback URL"""
+        if random.random() < self.error_rate:
+            payload = {'request_id': request_id, 'status': 'failed', 'error': 'Check could not be completed'}
+        else:
+            result = simulate_verification_response(merchant_from_params(request))
+            if request.get('check_type') == 'registry':
+                result = {'registry_information': result['registry_information']}
+            elif request.get('check_type') == 'license':
+                result = {'license_information': result['license_information']}
+            payload = {'request_id': request_id, 'status': 'completed', 'result': result}
+
+        body = json.dumps(payload).encode('utf-8')
+        headers = {'Content-Type': 'application/json'}
+        if self.webhook_secret:
+            headers['X-Provider-Signature'] = hmac.new(
+                self.webhook_secret.encode('utf-8'), body, hashlib.sha256
+            ).hexdigest()
+
+        try:
+            requests.post(request['callback_url'], data=body, headers=headers, timeout=10)
+        except requests.RequestException:
+            pass
+
+
+class ProviderStubHandler(BaseHTTPRequestHandler):
+    """Request handler serving the verification and sanctions endpoints"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        if url.path.rstrip('/').endswith('/verify'):
+            self._respond(lambda: simulate_verification_response(merchant_from_params(params)))
+        elif url.path.rstrip('/').endswith('/check'):
+            self._respond(lambda: simulate_sanctions_response(merchant_from_params(params)))
+        else:
+            self._send_json(404, {'error': 'Not found'})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+
+        try:
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._send_json(400, {'error': 'Invalid JSON'})
+            return
+
+        if url.path.rstrip('/').endswith('/verify/batch'):
+            self._respond(lambda: {'results': [
+                dict(simulate_verification_response(merchant_from_params(business)),
+                     reference=business.get('reference'))
+                for business in body.get('businesses', [])
+            ]})
+        elif url.path.rstrip('/').endswith('/verify/async'):
+            self._respond_async(body)
+        else:
+            self._send_json(404, {'error': 'Not found'})
+
+    def _respond(self, build_response):
+        server = self.server
+
+        if not server.take_token():
+            self._send_json(429, {'error': 'Too many requests'}, {'Retry-After': '1'})
+            return
+
+        time.sleep(sample_latency(server.latency, server.latency_ms, server.jitter_ms))
+
+        if random.random() < server.error_rate:
+            self._send_json(503, {'error': 'Provider unavailable'})
+            return
+
+        self._send_json(200, build_response())
+
+    def _respond_async(self, body):
+        server = self.server
+
+        if not server.take_token():
+            self._send_json(429, {'error': 'Too many requests'}, {'Retry-After': '1'})
+            return
+        if not body.get('callback_url'):
+            self._send_json(400, {'error': 'callback_url is required'})
+            return
+
+        request_id = f"req-{random.randint(10000000, 99999999)}"
+        delay = sample_latency(server.latency, server.callback_delay_ms, server.jitter_ms)
+        timer = threading.Timer(delay, server.send_callback, args=(body, request_id))
+        timer.daemon = True
+        timer.start()
+
+        self._send_json(202, {'request_id': request_id})
+
+    def _send_json(self, status, data, headers=None):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Per-request logging would dominate load-test output
+        pass
+
+
+class Command(BaseCommand):
+    help = 'Run a local stand-in for the verification and sanctions providers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8081)
+        parser.add_argument('--latency', choices=LATENCY_DISTRIBUTIONS, default='fixed',
+                            help='Latency distribution')
+        parser.add_argument('--latency-ms', type=float, default=200,
+                            help='Mean response latency in milliseconds')
+        parser.add_argument('--jitter-ms', type=float, default=50,
+                            help='Latency spread in milliseconds')
+        parser.add_argument('--error-rate', type=float, default=0.0,
+                            help='Fraction of requests answered with 503')
+        parser.add_argument('--rate-limit', type=float, default=0,
+                            help='Requests per second before answering 429 (0 for unlimited)')
+        parser.add_argument('--callback-delay-ms', type=float, default=2000,
+                            help='Mean delay before answering asynchronous checks')
+        parser.add_argument('--webhook-secret', default='',
+                            help='Secret used to sign asynchronous callbacks')
+
+    def handle(self, *args, **options):
+        server = ProviderStubServer(
+            (options['host'], options['port']),
+            latency=options['latency'],
+            latency_ms=options['latency_ms'],
+            jitter_ms=options['jitter_ms'],
+            error_rate=options['error_rate'],
+            rate_limit=options['rate_limit'],
+            callback_delay_ms=options['callback_delay_ms'],
+            webhook_secret=options['webhook_secret'],
+        )
+
+        host, port = server.server_address[:2]
+        self.stdout.write(f"Provider stub listening on http://{host}:{port}/ "
+                          f"({options['latency']} latency, mean {options['latency_ms']}ms)")
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,30 @@
+"""
+Worker process running queued merchant verification jobs.
+
+Start as many workers as needed; each claims jobs with SKIP LOCKED so they
+never run the same job twice or wait on each other.
+"""
+
+from django.core.management.base import BaseCommand
+
+from ...services.verification_jobs import run_worker
+
+
+class Command(BaseCommand):
+    help = 'Run queued merchant verification jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds to wait when the queue is empty')
+        parser.add_argument('--max-jobs', type=int, default=None,
+                            help='Exit after this many jobs or once the queue is empty')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Verification worker started')
+
+        try:
+            processed = run_worker(options['poll_interval'], options['max_jobs'])
+        except KeyboardInterrupt:
+            return
+
+        self.stdout.write(f'Processed {processed} verification jobs')
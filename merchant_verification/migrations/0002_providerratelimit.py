@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('merchant_verification', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProviderRateLimit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('tokens', models.FloatField()),
+                ('last_refill', models.DateTimeField()),
+                ('allowed_calls', models.PositiveBigIntegerField(default=0)),
+                ('throttled_calls', models.PositiveBigIntegerField(default=0)),
+                ('total_wait_seconds', models.FloatField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Provider Rate Limit',
+                'verbose_name_plural': 'Provider Rate Limits',
+                'ordering': ['name'],
+            },
+        ),
+    ]
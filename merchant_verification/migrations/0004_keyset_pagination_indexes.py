@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('merchant_verification', '0003_pendingverification'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='merchant',
+            index=models.Index(fields=['-created_at', '-id'], name='merchant_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='verificationflag',
+            index=models.Index(fields=['merchant', '-created_at', '-id'], name='flag_merchant_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='verificationreport',
+            index=models.Index(fields=['merchant', '-report_date', '-id'], name='report_merchant_date_id_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('merchant_verification', '0007_verificationjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VerificationSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('risk_data', models.JSONField(blank=True, null=True)),
+                ('external_data', models.JSONField(blank=True, null=True)),
+                ('transaction_data', models.JSONField(blank=True, null=True)),
+                ('input_version', models.PositiveIntegerField(default=0)),
+                ('is_stale', models.BooleanField(default=True)),
+                ('computed_at', models.DateTimeField(blank=True, null=True)),
+                ('refresh_started_at', models.DateTimeField(blank=True, null=True)),
+                ('merchant', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='verification_snapshot', to='merchant_verification.merchant')),
+            ],
+            options={
+                'verbose_name': 'Verification Snapshot',
+                'verbose_name_plural': 'Verification Snapshots',
+                'ordering': ['-computed_at'],
+                'indexes': [models.Index(fields=['is_stale', 'computed_at'], name='snapshot_stale_computed_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Merchant search indexes, created on PostgreSQL only
+
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    table = schema_editor.quote_name(apps.get_model('merchant_verification', 'Merchant')._meta.db_table)
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # Kept current by the database on every insert and update
+    schema_editor.execute(f"""
+        ALTER TABLE {table} ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(registration_number, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(website, '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce(email, '')), 'B')
+        ) STORED
+    """)
+    schema_editor.execute(f'CREATE INDEX merchant_search_vector_idx ON {table} USING gin (search_vector)')
+    # Matches the UPPER(name::text) that name__icontains compiles to
+    schema_editor.execute(f'CREATE INDEX merchant_name_trgm_idx ON {table} USING gin ((UPPER(name::text)) gin_trgm_ops)')
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    table = schema_editor.quote_name(apps.get_model('merchant_verification', 'Merchant')._meta.db_table)
+    schema_editor.execute('DROP INDEX IF EXISTS merchant_name_trgm_idx')
+    schema_editor.execute('DROP INDEX IF EXISTS merchant_search_vector_idx')
+    schema_editor.execute(f'ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('merchant_verification', '0008_verificationsnapshot'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:55
+
+from datetime import datetime, timezone
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# The priority formula as of this migration (services.review_queue.flag_priority)
+SEVERITY_RANKS = {'low': 0, 'medium': 1, 'high': 2, 'critical': 3}
+PRIORITY_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def flag_priority(severity, risk_score, created_at):
+    severity_hours = getattr(settings, 'REVIEW_QUEUE_SEVERITY_HOURS', 24)
+    risk_hours = getattr(settings, 'REVIEW_QUEUE_RISK_HOURS', 12)
+    return (
+        SEVERITY_RANKS.get(severity, 0) * severity_hours
+        + (risk_score or 0) * risk_hours
+        - (created_at - PRIORITY_EPOCH).total_seconds() / 3600
+    )
+
+
+def backfill_priorities(apps, schema_editor):
+    VerificationFlag = apps.get_model('merchant_verification', 'VerificationFlag')
+    flags = VerificationFlag.objects.filter(status__in=['open', 'investigating']).select_related('merchant')
+    batch = []
+    for flag in flags.iterator(chunk_size=2000):
+        flag.priority = flag_priority(flag.severity, flag.merchant.risk_score, flag.created_at)
+        batch.append(flag)
+        if len(batch) >= 2000:
+            VerificationFlag.objects.bulk_update(batch, ['priority'])
+            batch = []
+    VerificationFlag.objects.bulk_update(batch, ['priority'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('merchant_verification', '0009_merchant_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='verificationflag',
+            name='claimed_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='claimed_flags', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='verificationflag',
+            name='claimed_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='verificationflag',
+            name='priority',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='verificationflag',
+            index=models.Index(condition=models.Q(('status__in', ['open', 'investigating'])), fields=['-priority', 'id'], name='flag_open_priority_idx'),
+        ),
+        migrations.RunPython(backfill_priorities, migrations.RunPython.noop),
+    ]
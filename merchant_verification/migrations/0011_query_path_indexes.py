@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_country_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    table = schema_editor.quote_name(apps.get_model('merchant_verification', 'Merchant')._meta.db_table)
+    # country is filtered with icontains, which no B-tree index can serve;
+    # pg_trgm is installed by migration 0009
+    schema_editor.execute(f'CREATE INDEX merchant_country_trgm_idx ON {table} USING gin ((UPPER(country::text)) gin_trgm_ops)')
+
+
+def drop_country_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute('DROP INDEX IF EXISTS merchant_country_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('merchant_verification', '0010_review_queue'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['merchant', '-timestamp', '-id'], name='audit_merchant_time_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='merchant',
+            index=models.Index(fields=['status', '-created_at'], name='merchant_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='merchant',
+            index=models.Index(fields=['risk_level', '-created_at'], name='merchant_risk_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='merchant',
+            index=models.Index(fields=['business_type', '-created_at'], name='merchant_type_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='verificationflag',
+            index=models.Index(fields=['status', '-created_at'], name='flag_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='verificationflag',
+            index=models.Index(condition=models.Q(('status__in', ['open', 'investigating'])), fields=['merchant'], name='flag_open_merchant_idx'),
+        ),
+        migrations.RunPython(create_country_index, drop_country_index),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 19:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F, Func, OuterRef, Subquery, IntegerField
+from django.db.models.functions import Coalesce
+
+
+def backfill_aggregates(apps, schema_editor):
+    Merchant = apps.get_model('merchant_verification', 'Merchant')
+    TransactionPattern = apps.get_model('merchant_verification', 'TransactionPattern')
+    VerificationFlag = apps.get_model('merchant_verification', 'VerificationFlag')
+
+    open_flags = VerificationFlag.objects.filter(
+        merchant=OuterRef('pk'), status__in=['open', 'investigating']
+    ).order_by().annotate(count=Func(F('id'), function='COUNT')).values('count')
+    latest = TransactionPattern.objects.filter(merchant=OuterRef('pk')).order_by('-analysis_date', '-id').values('pk')[:1]
+
+    Merchant.objects.update(
+        open_flag_count=Coalesce(Subquery(open_flags, output_field=IntegerField()), 0),
+        latest_transaction_pattern=Subquery(latest)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('merchant_verification', '0011_query_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='merchant',
+            name='latest_transaction_pattern',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='merchant_verification.transactionpattern'),
+        ),
+        migrations.AddField(
+            model_name='merchant',
+            name='open_flag_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_aggregates, migrations.RunPython.noop),
+    ]
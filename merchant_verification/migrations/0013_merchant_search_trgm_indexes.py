@@ -0,0 +1,38 @@
+# Trigram indexes for substring search, created on PostgreSQL only
+
+from django.db import migrations
+
+# Columns searched with icontains alongside the search_vector match
+SEARCH_COLUMNS = ('registration_number', 'email', 'website')
+
+
+def create_trgm_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    table = schema_editor.quote_name(apps.get_model('merchant_verification', 'Merchant')._meta.db_table)
+    # Match the UPPER(column::text) that icontains compiles to; pg_trgm is
+    # installed by migration 0009
+    for column in SEARCH_COLUMNS:
+        schema_editor.execute(
+            f'CREATE INDEX merchant_{column}_trgm_idx ON {table} USING gin ((UPPER({column}::text)) gin_trgm_ops)'
+        )
+
+
+def drop_trgm_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    for column in SEARCH_COLUMNS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS merchant_{column}_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('merchant_verification', '0012_merchant_aggregates'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trgm_indexes, drop_trgm_indexes),
+    ]
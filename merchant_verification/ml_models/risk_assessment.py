@@ -10,6 +10,7 @@ from sklearn.preprocessing import OneHotEncoder
 import pandas as pd
 import re
 import logging
+from ..models import Merchant, TransactionPattern
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -42,6 +43,22 @@ BUSINESS_TYPE_RISK = {
     'other': 2.5
 }
 
+# Weights of each risk factor in the overall score, in scoring order
+RISK_FACTOR_WEIGHTS = {
+    'business_type_risk': 0.25,
+    'country_risk': 0.20,
+    'website_risk': 0.20,
+    'completeness_risk': 0.15,
+    'business_age_risk': 0.10,
+    'transaction_risk': 0.10
+}
+
+# Required fields for a complete merchant profile
+REQUIRED_FIELDS = [
+    'name', 'business_type', 'registration_number', 
+    'email', 'phone', 'address', 'city', 'state', 'country'
+]
+
 
 def assess_merchant_risk(merchant):
     """
@@ -55,73 +72,214 @@ def assess_merchant_risk(merchant):
     """
     logger.info(f"Assessing risk for merchant: {merchant.name}")
     
-    # Initialize risk factors
-    risk_factors = {}
+    risk_assessment = build_risk_assessment(merchant, get_latest_transaction_pattern(merchant))
     
-    # 1. Business type risk
-    business_type_score = BUSINESS_TYPE_RISK.get(merchant.business_type, 2.5)
-    risk_factors['business_type_risk'] = business_type_score
+    logger.info(
+        f"Risk assessment completed for {merchant.name}. "
+        f"Score: {risk_assessment['risk_score']}, Level: {risk_assessment['risk_level']}"
+    )
     
-    # 2. Country risk
-    country_risk = 1.0
-    if merchant.country and merchant.country.lower() in HIGH_RISK_COUNTRIES:
-        country_risk = 5.0
-    risk_factors['country_risk'] = country_risk
-    
-    # 3. Website content analysis (if website exists)
-    website_risk = analyze_website_risk(merchant.website)
-    risk_factors['website_risk'] = website_risk
-    
-    # 4. Registration information completeness
-    completeness_risk = assess_information_completeness(merchant)
-    risk_factors['completeness_risk'] = completeness_risk
+    return risk_assessment
+
+
+def build_risk_assessment(merchant, transaction_pattern):
+    """
+    Build a merchant's risk assessment from its latest transaction pattern.
     
-    # 5. Business age risk
-    # For demo purposes, assume all are new businesses with higher risk
-    business_age_risk = 3.0
-    risk_factors['business_age_risk'] = business_age_risk
-    
-    # 6. Transaction pattern risk (if available)
-    if hasattr(merchant, 'transaction_patterns') and merchant.transaction_patterns.exists():
-        try:
-            transaction_pattern = merchant.transaction_patterns.latest('analysis_date')
-            transaction_risk = assess_transaction_risk(transaction_pattern)
-            risk_factors['transaction_risk'] = transaction_risk
-        except Exception as e:
-            logger.error(f"Error assessing transaction risk: {str(e)}")
-            risk_factors['transaction_risk'] = 2.5
-    else:
-        # No transaction data available
-        risk_factors['transaction_risk'] = 2.5
+    Args:
+        merchant (Merchant): Merchant object with attributes
+        transaction_pattern (TransactionPattern): Latest pattern, or None
+        
+    Returns:
+        dict: Risk assessment data including risk score and level
+    """
+    risk_factors = calculate_risk_factors(merchant, transaction_pattern)
     
     # Calculate the overall risk score (weighted average)
-    weights = {
-        'business_type_risk': 0.25,
-        'country_risk': 0.20,
-        'website_risk': 0.20,
-        'completeness_risk': 0.15,
-        'business_age_risk': 0.10,
-        'transaction_risk': 0.10
-    }
-    
-    risk_score = sum(risk_factors[factor] * weights[factor] for factor in risk_factors)
+    risk_score = calculate_risk_score(risk_factors)
     
     # Determine risk level based on score
     risk_level = determine_risk_level(risk_score)
     
-    # Generate risk assessment details
-    risk_assessment = {
+    return {
         'risk_score': risk_score,
         'risk_level': risk_level,
         'suggested_risk_level': risk_level,
         'risk_factors': risk_factors,
-        'high_risk_flags': identify_high_risk_flags(risk_factors, merchant),
+        'high_risk_flags': identify_high_risk_flags(risk_factors, merchant, transaction_pattern),
         'recommendations': generate_recommendations(risk_level, risk_factors, merchant)
     }
+
+
+def calculate_risk_factors(merchant, transaction_pattern):
+    """
+    Score each risk factor of a merchant.
     
-    logger.info(f"Risk assessment completed for {merchant.name}. Score: {risk_score}, Level: {risk_level}")
+    Args:
+        merchant (Merchant): Merchant object with attributes
+        transaction_pattern (TransactionPattern): Latest pattern, or None
+        
+    Returns:
+        dict: Risk factor scores in RISK_FACTOR_WEIGHTS order
+    """
+    return {
+        # 1. Business type risk
+        'business_type_risk': assess_business_type_risk(merchant),
+        # 2. Country risk
+        'country_risk': assess_country_risk(merchant),
+        # 3. Website content analysis (if website exists)
+        'website_risk': analyze_website_risk(merchant.website),
+        # 4. Registration information completeness
+        'completeness_risk': assess_information_completeness(merchant),
+        # 5. Business age risk
+        'business_age_risk': assess_business_age_risk(merchant),
+        # 6. Transaction pattern risk (if available)
+        'transaction_risk': assess_pattern_risk(transaction_pattern),
+    }
+
+
+def calculate_risk_score(risk_factors):
+    """
+    Calculate the weighted risk score, adding the factors in RISK_FACTOR_WEIGHTS order.
     
-    return risk_assessment
+    Args:
+        risk_factors (dict): Risk factor scores
+        
+    Returns:
+        float: Overall risk score
+    """
+    return sum(risk_factors[factor] * weight for factor, weight in RISK_FACTOR_WEIGHTS.items())
+
+
+def assess_business_type_risk(merchant):
+    """
+    Assess risk based on the merchant's business type.
+    
+    Args:
+        merchant (Merchant): Merchant object with attributes
+        
+    Returns:
+        float: Risk score for the business type
+    """
+    return BUSINESS_TYPE_RISK.get(merchant.business_type, 2.5)
+
+
+def assess_country_risk(merchant):
+    """
+    Assess risk based on the merchant's country.
+    
+    Args:
+        merchant (Merchant): Merchant object with attributes
+        
+    Returns:
+        float: 5.0 for high-risk countries, 1.0 otherwise
+    """
+    if merchant.country and merchant.country.lower() in HIGH_RISK_COUNTRIES:
+        return 5.0
+    return 1.0
+
+
+def assess_business_age_risk(merchant):
+    """
+    Assess risk based on the merchant's business age.
+    
+    Args:
+        merchant (Merchant): Merchant object with attributes
+        
+    Returns:
+        float: Risk score for the business age
+    """
+    # For demo purposes, assume all are new businesses with higher risk
+    return 3.0
+
+
+def assess_pattern_risk(transaction_pattern):
+    """
+    Assess transaction risk, falling back to a moderate score without usable data.
+    
+    Args:
+        transaction_pattern (TransactionPattern): Latest pattern, or None
+        
+    Returns:
+        float: Risk score for transaction patterns
+    """
+    if transaction_pattern is None:
+        # No transaction data available
+        return 2.5
+    try:
+        return assess_transaction_risk(transaction_pattern)
+    except Exception as e:
+        logger.error(f"Error assessing transaction risk: {str(e)}")
+        return 2.5
+
+
+def get_latest_transaction_pattern(merchant):
+    """
+    Get a saved merchant's latest transaction pattern.
+    
+    Uses the pattern loaded with select_related('latest_transaction_pattern')
+    when there is one; otherwise reads the merchant's stored pointer in one
+    query, so an instance loaded before its latest analysis still sees it.
+    
+    Args:
+        merchant (Merchant): The merchant, saved or unsaved
+        
+    Returns:
+        TransactionPattern: The latest pattern, or None if there is none
+    """
+    if getattr(merchant, 'pk', None) is None:
+        return None
+    if Merchant.latest_transaction_pattern.is_cached(merchant):
+        return merchant.latest_transaction_pattern
+    return TransactionPattern.objects.filter(
+        pk__in=Merchant.objects.filter(pk=merchant.pk).values('latest_transaction_pattern')
+    ).first()
+
+
+def latest_transaction_patterns(merchant_ids):
+    """
+    Get the latest transaction pattern of each merchant in one query.
+    
+    Args:
+        merchant_ids (list): Merchant primary keys
+        
+    Returns:
+        dict: Latest TransactionPattern keyed by merchant id
+    """
+    patterns = TransactionPattern.objects.filter(
+        pk__in=Merchant.objects.filter(id__in=merchant_ids).values('latest_transaction_pattern')
+    )
+    return {pattern.merchant_id: pattern for pattern in patterns}
+
+
+def assess_merchants_risk(merchants):
+    """
+    Assess the risk of many merchants at once.
+    
+    Produces the same assessment as assess_merchant_risk for each merchant,
+    but loads the latest transaction pattern of every saved merchant in a
+    single query. Unsaved merchants (prospects) are scored without
+    transaction data.
+    
+    Args:
+        merchants (list): Merchant objects, saved or unsaved
+        
+    Returns:
+        list: Risk assessments in the same order as the merchants
+    """
+    merchants = list(merchants)
+    if not merchants:
+        return []
+    
+    logger.info(f"Assessing risk for {len(merchants)} merchants")
+    
+    saved_ids = [merchant.pk for merchant in merchants if merchant.pk is not None]
+    patterns = latest_transaction_patterns(saved_ids) if saved_ids else {}
+    
+    return [
+        build_risk_assessment(merchant, patterns.get(merchant.pk) if merchant.pk is not None else None)
+        for merchant in merchants
+    ]
 
 
 def analyze_website_risk(website_url):
@@ -166,15 +324,9 @@ def assess_information_completeness(merchant):
     Returns:
         float: Risk score based on information completeness
     """
-    # Required fields for a complete merchant profile
-    required_fields = [
-        'name', 'business_type', 'registration_number', 
-        'email', 'phone', 'address', 'city', 'state', 'country'
-    ]
-    
     # Count filled required fields
-    filled_fields = sum(1 for field in required_fields if getattr(merchant, field))
-    completeness_ratio = filled_fields / len(required_fields)
+    filled_fields = sum(1 for field in REQUIRED_FIELDS if getattr(merchant, field))
+    completeness_ratio = filled_fields / len(REQUIRED_FIELDS)
     
     # Convert to risk score (lower completeness = higher risk)
     completeness_risk = 5.0 - (completeness_ratio * 4.0)
@@ -258,13 +410,14 @@ def determine_risk_level(risk_score):
         return 'low'
 
 
-def identify_high_risk_flags(risk_factors, merchant):
+def identify_high_risk_flags(risk_factors, merchant, transaction_pattern=None):
     """
     Identify specific high-risk flags for a merchant.
     
     Args:
         risk_factors (dict): Risk factor scores
         merchant (Merchant): Merchant object
+        transaction_pattern (TransactionPattern): Latest pattern if already loaded
         
     Returns:
         list: List of specific risk flags
@@ -292,9 +445,11 @@ def identify_high_risk_flags(risk_factors, merchant):
         flags.append("Suspicious transaction patterns")
         
         # Get more specific transaction flags
-        if hasattr(merchant, 'transaction_patterns') and merchant.transaction_patterns.exists():
-            tp = merchant.transaction_patterns.latest('analysis_date')
-            
+        tp = transaction_pattern
+        if tp is None:
+            tp = get_latest_transaction_pattern(merchant)
+        
+        if tp is not None:
             if tp.high_risk_countries_percentage and tp.high_risk_countries_percentage > 25:
                 flags.append(f"High percentage ({tp.high_risk_countries_percentage}%) of transactions from high-risk countries")
                 
@@ -30,6 +30,13 @@ class Merchant(models.Model):
         ('extreme', 'Extreme Risk'),
     ]
     
+    # On PostgreSQL, name, registration_number, website and email also feed
+    # the search_vector column that migration 0009 adds with raw SQL and this
+    # model does not declare. PostgreSQL refuses to change the type of a
+    # column a generated column depends on, so a migration altering one of
+    # these four fields must first drop search_vector (and its index) and
+    # recreate both afterwards, as 0009 does.
+    
     # Basic Information
     name = models.CharField(max_length=255)
     business_type = models.CharField(max_length=50, choices=BUSINESS_TYPE_CHOICES)
@@ -69,6 +76,17 @@ class Merchant(models.Model):
     verification_data = models.JSONField(blank=True, null=True)
     external_api_response = models.JSONField(blank=True, null=True)
     
+    # Denormalized from flags and transaction patterns by their write paths;
+    # repair with `python manage.py repair_merchant_aggregates`
+    open_flag_count = models.PositiveIntegerField(default=0)
+    latest_transaction_pattern = models.ForeignKey(
+        'TransactionPattern',
+        on_delete=models.SET_NULL,
+        related_name='+',
+        null=True,
+        blank=True
+    )
+    
     # Foreign keys
     created_by = models.ForeignKey(
         User,
@@ -87,15 +105,35 @@ class Merchant(models.Model):
     def __str__(self):
         return f"{self.name} ({self.get_status_display()})"
     
+    # Maintained with UPDATEs by the flag and pattern write paths; a save
+    # only writes them when they are named in update_fields
+    DENORMALIZED_FIELDS = ('open_flag_count', 'latest_transaction_pattern')
+    
     def save(self, *args, **kwargs):
         if self.status == 'verified' and not self.last_verified_at:
             self.last_verified_at = timezone.now()
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.DENORMALIZED_FIELDS
+                and field.attname not in deferred
+            ]
         super().save(*args, **kwargs)
     
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Merchant'
         verbose_name_plural = 'Merchants'
+        indexes = [
+            # Keyset pagination of the merchant list
+            models.Index(fields=['-created_at', '-id'], name='merchant_created_id_idx'),
+            # Merchant lists filtered on one dimension, newest first
+            models.Index(fields=['status', '-created_at'], name='merchant_status_created_idx'),
+            models.Index(fields=['risk_level', '-created_at'], name='merchant_risk_created_idx'),
+            models.Index(fields=['business_type', '-created_at'], name='merchant_type_created_idx'),
+        ]
 
 
 class TransactionPattern(models.Model):
@@ -154,6 +192,9 @@ class VerificationFlag(models.Model):
         ('dismissed', 'Dismissed'),
     ]
     
+    # Statuses of flags that still need review
+    OPEN_STATUSES = ['open', 'investigating']
+    
     merchant = models.ForeignKey(
         Merchant,
         on_delete=models.CASCADE,
@@ -179,10 +220,26 @@ class VerificationFlag(models.Model):
         blank=True
     )
     resolution_notes = models.TextField(blank=True, null=True)
+    # Review queue order, maintained on save from the severity, merchant risk
+    # score and creation time; see services.review_queue.flag_priority
+    priority = models.FloatField(default=0)
+    claimed_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        related_name='claimed_flags',
+        null=True,
+        blank=True
+    )
+    claimed_until = models.DateTimeField(blank=True, null=True)
     
     def __str__(self):
         return f"{self.get_flag_type_display()} Flag for {self.merchant.name}"
     
+    @property
+    def is_claimed(self):
+        """Whether an analyst holds an unexpired lease on this flag"""
+        return self.claimed_by_id is not None and self.claimed_until is not None and self.claimed_until > timezone.now()
+    
     def resolve(self, user, notes):
         self.status = 'resolved'
         self.resolved_at = timezone.now()
@@ -194,6 +251,24 @@ class VerificationFlag(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Verification Flag'
         verbose_name_plural = 'Verification Flags'
+        indexes = [
+            # Keyset pagination of a merchant's flags
+            models.Index(fields=['merchant', '-created_at', '-id'], name='flag_merchant_created_id_idx'),
+            # Flag lists and exports filtered by status, newest first
+            models.Index(fields=['status', '-created_at'], name='flag_status_created_idx'),
+            # Does a merchant have open flags, and how many
+            models.Index(
+                fields=['merchant'],
+                name='flag_open_merchant_idx',
+                condition=models.Q(status__in=['open', 'investigating'])
+            ),
+            # Top of the review queue
+            models.Index(
+                fields=['-priority', 'id'],
+                name='flag_open_priority_idx',
+                condition=models.Q(status__in=['open', 'investigating'])
+            ),
+        ]
 
 
 class VerificationReport(models.Model):
@@ -220,6 +295,10 @@ class VerificationReport(models.Model):
         ordering = ['-report_date']
         verbose_name = 'Verification Report'
         verbose_name_plural = 'Verification Reports'
+        indexes = [
+            # Keyset pagination of a merchant's reports
+            models.Index(fields=['merchant', '-report_date', '-id'], name='report_merchant_date_id_idx'),
+        ]
 
 
 class AuditLog(models.Model):
@@ -256,3 +335,167 @@ class AuditLog(models.Model):
         ordering = ['-timestamp']
         verbose_name = 'Audit Log'
         verbose_name_plural = 'Audit Logs'
+        indexes = [
+            # A merchant's audit trail, newest first
+            models.Index(fields=['merchant', '-timestamp', '-id'], name='audit_merchant_time_id_idx'),
+        ]
+
+
+class ProviderRateLimit(models.Model):
+    """Model holding the shared token-bucket state for an external provider"""
+    name = models.CharField(max_length=50, unique=True)
+    tokens = models.FloatField()
+    last_refill = models.DateTimeField()
+    allowed_calls = models.PositiveBigIntegerField(default=0)
+    throttled_calls = models.PositiveBigIntegerField(default=0)
+    total_wait_seconds = models.FloatField(default=0)
+    
+    def __str__(self):
+        return f"Rate limit for {self.name} ({self.tokens:.1f} tokens)"
+    
+    class Meta:
+        ordering = ['name']
+        verbose_name = 'Provider Rate Limit'
+        verbose_name_plural = 'Provider Rate Limits'
+
+
+class PendingVerification(models.Model):
+    """Model for verification checks awaiting an asynchronous provider callback"""
+    CHECK_TYPE_CHOICES = [
+        ('verification', 'Business Verification'),
+        ('registry', 'Business Registry Check'),
+        ('license', 'License Check'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    merchant = models.ForeignKey(
+        Merchant,
+        on_delete=models.CASCADE,
+        related_name='pending_verifications'
+    )
+    check_type = models.CharField(max_length=20, choices=CHECK_TYPE_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    callback_token = models.CharField(max_length=64, unique=True)
+    provider_request_id = models.CharField(max_length=100, blank=True, null=True)
+    response = models.JSONField(blank=True, null=True)
+    submitted_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(blank=True, null=True)
+    requested_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True
+    )
+    
+    def __str__(self):
+        return f"{self.get_check_type_display()} for {self.merchant.name} ({self.get_status_display()})"
+    
+    class Meta:
+        ordering = ['-submitted_at']
+        verbose_name = 'Pending Verification'
+        verbose_name_plural = 'Pending Verifications'
+
+
+class DataVersion(models.Model):
+    """Model for a counter bumped whenever the data it tracks changes"""
+    name = models.CharField(max_length=50, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+    
+    class Meta:
+        ordering = ['name']
+        verbose_name = 'Data Version'
+        verbose_name_plural = 'Data Versions'
+
+
+class DashboardCounter(models.Model):
+    """Model for a precomputed dashboard count maintained on writes"""
+    name = models.CharField(max_length=100, unique=True)
+    value = models.BigIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+    
+    class Meta:
+        ordering = ['name']
+        verbose_name = 'Dashboard Counter'
+        verbose_name_plural = 'Dashboard Counters'
+
+
+class VerificationJob(models.Model):
+    """Model for a merchant verification queued for a background worker"""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    merchant = models.ForeignKey(
+        Merchant,
+        on_delete=models.CASCADE,
+        related_name='verification_jobs'
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    request_data = models.JSONField(default=dict, blank=True)
+    result = models.JSONField(blank=True, null=True)
+    error = models.TextField(blank=True, null=True)
+    callback_url = models.URLField(blank=True, null=True)
+    attempts = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    completed_at = models.DateTimeField(blank=True, null=True)
+    requested_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True
+    )
+    
+    def __str__(self):
+        return f"Verification job {self.pk} for {self.merchant.name} ({self.get_status_display()})"
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Verification Job'
+        verbose_name_plural = 'Verification Jobs'
+        indexes = [
+            # Workers claim the oldest queued job
+            models.Index(fields=['status', 'created_at'], name='job_status_created_idx'),
+        ]
+
+
+class VerificationSnapshot(models.Model):
+    """Model for the precomputed checks shown on a merchant's verification page"""
+    merchant = models.OneToOneField(
+        Merchant,
+        on_delete=models.CASCADE,
+        related_name='verification_snapshot'
+    )
+    risk_data = models.JSONField(blank=True, null=True)
+    external_data = models.JSONField(blank=True, null=True)
+    transaction_data = models.JSONField(blank=True, null=True)
+    # Bumped whenever the merchant or its transaction patterns change; a
+    # refresh only clears is_stale if no change arrived while it ran
+    input_version = models.PositiveIntegerField(default=0)
+    is_stale = models.BooleanField(default=True)
+    computed_at = models.DateTimeField(blank=True, null=True)
+    refresh_started_at = models.DateTimeField(blank=True, null=True)
+    
+    def __str__(self):
+        return f"Verification snapshot for {self.merchant.name}"
+    
+    class Meta:
+        ordering = ['-computed_at']
+        verbose_name = 'Verification Snapshot'
+        verbose_name_plural = 'Verification Snapshots'
+        indexes = [
+            # The refresher scans stale and expired snapshots
+            models.Index(fields=['is_stale', 'computed_at'], name='snapshot_stale_computed_idx'),
+        ]
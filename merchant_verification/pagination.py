@@ -0,0 +1,173 @@
+"""
+Paginators for the merchant verification views.
+"""
+
+import json
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator, Page, PageNotAnInteger, EmptyPage
+from django.db import connections, DatabaseError
+from django.utils.functional import cached_property
+
+from .services.data_version import get_data_version
+
+logger = logging.getLogger(__name__)
+
+# Page links shown on either side of the current page
+PAGE_WINDOW = 2
+
+
+def estimate_count(queryset):
+    """
+    Get the PostgreSQL planner's row estimate for a queryset.
+
+    Args:
+        queryset (QuerySet): The rows to estimate
+
+    Returns:
+        int: Estimated row count, or None if no estimate is available
+    """
+    if connections[queryset.db].vendor != 'postgresql':
+        return None
+
+    try:
+        plan = json.loads(queryset.order_by().explain(format='json'))
+    except (DatabaseError, ValueError) as e:
+        logger.warning(f"Could not estimate row count: {str(e)}")
+        return None
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class ApproximatePage(Page):
+    """Page that works out its neighbours without an exact total"""
+
+    has_more = False
+
+    def has_next(self):
+        if self.paginator.is_approximate:
+            return self.has_more
+        return super().has_next()
+
+    def end_index(self):
+        if self.paginator.is_approximate:
+            return self.start_index() + len(self.object_list) - 1
+        return super().end_index()
+
+    @property
+    def nearby_pages(self):
+        """Page numbers around this one, for the pagination links"""
+        if self.paginator.is_approximate:
+            # Only the next page is known to exist; the estimate may be too high
+            last = self.number + 1 if self.has_more else self.number
+        else:
+            last = self.paginator.num_pages
+        return range(max(1, self.number - PAGE_WINDOW), min(last, self.number + PAGE_WINDOW) + 1)
+
+
+class ApproximatePaginator(Paginator):
+    """
+    Paginator that avoids an exact COUNT(*) over large result sets.
+
+    On PostgreSQL, results the planner estimates above
+    APPROXIMATE_COUNT_THRESHOLD rows use that estimate as their total; smaller
+    ones are counted exactly. Totals are cached per query and data version, so
+    paging through the same list counts it once. An estimate can be too high,
+    so approximate pages link no further than the next page, and a page past
+    the end of the data falls back to the first.
+    """
+
+    def __init__(self, object_list, per_page, threshold=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.threshold = settings.APPROXIMATE_COUNT_THRESHOLD if threshold is None else threshold
+
+    def _cache_key(self):
+        sql, params = self.object_list.query.sql_with_params()
+        digest = hashlib.md5(f'{sql}{params!r}'.encode('utf-8')).hexdigest()
+        version, _ = get_data_version()
+        return f'paginator_count:{version}:{digest}'
+
+    @cached_property
+    def _count(self):
+        """(count, is_approximate) for the object list"""
+        if not hasattr(self.object_list, 'query'):
+            return super().count, False
+
+        try:
+            cache_key = self._cache_key()
+        except EmptyResultSet:
+            # e.g. queryset.none(); there is nothing to count
+            return 0, False
+
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        estimate = estimate_count(self.object_list)
+        if estimate is not None and estimate > self.threshold:
+            result = (estimate, True)
+        else:
+            result = (self.object_list.count(), False)
+
+        cache.set(cache_key, result, settings.PAGINATOR_COUNT_CACHE_TTL)
+        return result
+
+    @cached_property
+    def count(self):
+        return self._count[0]
+
+    @property
+    def is_approximate(self):
+        return self._count[1]
+
+    @property
+    def display_count(self):
+        """The total for display, marked when it is an estimate"""
+        if self.is_approximate:
+            return f'about {self.count:,}'
+        return f'{self.count:,}'
+
+    def validate_number(self, number):
+        if not self.is_approximate:
+            return super().validate_number(number)
+
+        # An estimate may be too low, so pages past it are still served
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages['invalid_page'])
+        if number < 1:
+            raise EmptyPage(self.error_messages['min_page'])
+        return number
+
+    def page(self, number):
+        if not self.is_approximate:
+            return super().page(number)
+
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        # One extra row tells whether a next page exists
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage(self.error_messages['no_results'])
+        page = self._get_page(rows[:self.per_page], number, self)
+        page.has_more = len(rows) > self.per_page
+        return page
+
+    def get_page(self, number):
+        if not self.is_approximate:
+            return super().get_page(number)
+
+        try:
+            return self.page(number)
+        except (PageNotAnInteger, EmptyPage):
+            # Where the data really ends is unknown, so start over
+            return self.page(1)
+
+    def _get_page(self, *args, **kwargs):
+        return ApproximatePage(*args, **kwargs)
@@ -1,10 +1,71 @@
+from django.conf import settings
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
 from .models import (
     Merchant, 
     TransactionPattern, 
     VerificationFlag, 
-    VerificationReport
+    VerificationReport,
+    PendingVerification,
+    VerificationJob
 )
+from .services.webhooks import check_callback_url, UnsafeCallbackURL
+
+
+def get_query_param_set(request, name):
+    """Parse a comma-separated query parameter into a set, or None when absent"""
+    value = request.query_params.get(name) if request is not None else None
+    if value is None:
+        return None
+    return {field.strip() for field in value.split(',') if field.strip()}
+
+
+def get_expanded_fields(request, serializer_class):
+    """
+    Get the expandable fields a request asks for.
+    
+    Expandable fields are expanded with ?expand=, or by naming them in
+    ?fields=. Requests using neither parameter get every expandable field.
+    """
+    expandable = set(serializer_class.expandable_fields)
+    fields = get_query_param_set(request, 'fields')
+    expand = get_query_param_set(request, 'expand')
+    
+    if fields is None and expand is None:
+        return expandable
+    return expandable & ((expand or set()) | (fields or set()))
+
+
+class DynamicFieldsMixin:
+    """
+    Serializer mixin supporting sparse fieldsets on read requests.
+    
+    ?fields=a,b limits the response to the listed fields, and ?expand=x
+    includes the heavy fields listed in expandable_fields, which are left
+    out whenever either parameter is used. Only the top-level serializer of
+    a GET request is pruned.
+    """
+    expandable_fields = ()
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS:
+            return
+        
+        fields = get_query_param_set(request, 'fields')
+        if fields is None and get_query_param_set(request, 'expand') is None:
+            return
+        
+        expanded = get_expanded_fields(request, type(self))
+        for name in list(self.fields):
+            if name in self.expandable_fields:
+                keep = name in expanded
+            else:
+                keep = fields is None or name in fields
+            if not keep:
+                self.fields.pop(name)
 
 
 class TransactionPatternSerializer(serializers.ModelSerializer):
@@ -24,17 +85,21 @@ class VerificationFlagSerializer(serializers.ModelSerializer):
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     created_by = serializers.StringRelatedField()
     resolved_by = serializers.StringRelatedField()
+    claimed_by = serializers.StringRelatedField()
     
     class Meta:
         model = VerificationFlag
         fields = [
             'id', 'flag_type', 'flag_type_display', 'description', 'severity', 
             'severity_display', 'status', 'status_display', 'created_at', 
-            'created_by', 'resolved_at', 'resolved_by', 'resolution_notes'
+            'created_by', 'resolved_at', 'resolved_by', 'resolution_notes',
+            'priority', 'claimed_by', 'claimed_until'
         ]
+        read_only_fields = ['priority', 'claimed_until']
 
 
-class MerchantSerializer(serializers.ModelSerializer):
+class MerchantSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = ('transaction_patterns', 'verification_flags')
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     business_type_display = serializers.CharField(source='get_business_type_display', read_only=True)
     risk_level_display = serializers.CharField(source='get_risk_level_display', read_only=True)
@@ -55,7 +120,7 @@ class MerchantSerializer(serializers.ModelSerializer):
         ]
 
 
-class MerchantListSerializer(serializers.ModelSerializer):
+class MerchantListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     business_type_display = serializers.CharField(source='get_business_type_display', read_only=True)
     risk_level_display = serializers.CharField(source='get_risk_level_display', read_only=True)
@@ -71,10 +136,23 @@ class MerchantListSerializer(serializers.ModelSerializer):
         ]
     
     def get_flag_count(self, obj):
-        return obj.verification_flags.filter(status__in=['open', 'investigating']).count()
+        # Stored on the merchant by the flag write paths
+        return obj.open_flag_count
 
 
-class VerificationReportSerializer(serializers.ModelSerializer):
+class MerchantImportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Merchant
+        fields = [
+            'name', 'business_type', 'registration_number', 'tax_id', 'website',
+            'email', 'phone', 'address', 'city', 'state', 'country', 'postal_code'
+        ]
+        # Uniqueness is checked once per import batch instead of once per row
+        extra_kwargs = {'registration_number': {'validators': []}}
+
+
+class VerificationReportSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = ('report_data',)
     merchant = MerchantListSerializer(read_only=True)
     generated_by = serializers.StringRelatedField()
     
@@ -90,3 +168,86 @@ class MerchantVerificationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Merchant
         fields = ['status', 'risk_level', 'risk_score', 'verification_data']
+
+
+class BulkVerificationSerializer(serializers.Serializer):
+    merchant_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.BULK_VERIFICATION_MAX_MERCHANTS
+    )
+
+
+class BulkFlagResolutionSerializer(serializers.Serializer):
+    flag_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.BULK_FLAG_RESOLUTION_MAX_FLAGS
+    )
+    status = serializers.ChoiceField(choices=['resolved', 'dismissed'], default='resolved')
+    resolution_notes = serializers.CharField(allow_blank=True, required=False, default='')
+
+
+class BatchRiskAssessmentSerializer(serializers.Serializer):
+    merchants = serializers.ListField(
+        child=serializers.JSONField(),
+        required=False,
+        max_length=settings.RISK_ASSESSMENT_MAX_BATCH
+    )
+    merchant_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        max_length=settings.RISK_ASSESSMENT_MAX_BATCH
+    )
+    
+    def validate(self, attrs):
+        count = len(attrs.get('merchants', [])) + len(attrs.get('merchant_ids', []))
+        if count == 0:
+            raise serializers.ValidationError('Provide merchants or merchant_ids to assess.')
+        if count > settings.RISK_ASSESSMENT_MAX_BATCH:
+            raise serializers.ValidationError(
+                f'At most {settings.RISK_ASSESSMENT_MAX_BATCH} records can be assessed per request.'
+            )
+        return attrs
+
+
+class VerificationJobRequestSerializer(serializers.Serializer):
+    callback_url = serializers.URLField(required=False, allow_null=True)
+    
+    def validate_callback_url(self, value):
+        if value:
+            try:
+                check_callback_url(value)
+            except UnsafeCallbackURL as e:
+                raise serializers.ValidationError(str(e))
+        return value
+
+
+class VerificationJobSerializer(serializers.ModelSerializer):
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    
+    class Meta:
+        model = VerificationJob
+        fields = [
+            'id', 'merchant', 'status', 'status_display', 'result', 'error', 'attempts',
+            'callback_url', 'created_at', 'started_at', 'completed_at'
+        ]
+
+
+class PendingVerificationSerializer(serializers.ModelSerializer):
+    check_type_display = serializers.CharField(source='get_check_type_display', read_only=True)
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    
+    class Meta:
+        model = PendingVerification
+        fields = [
+            'id', 'merchant', 'check_type', 'check_type_display', 'status',
+            'status_display', 'provider_request_id', 'submitted_at', 'completed_at'
+        ]
+
+
+class AsyncVerificationSerializer(serializers.Serializer):
+    check_types = serializers.ListField(
+        child=serializers.ChoiceField(choices=PendingVerification.CHECK_TYPE_CHOICES),
+        allow_empty=False
+    )
@@ -0,0 +1,140 @@
+"""
+Asynchronous verification checks answered by provider callbacks.
+This module submits long-running checks, records them as pending and stores
+the provider's callback results on the merchant when they arrive.
+"""
+
+import hmac
+import hashlib
+import secrets
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import Merchant, PendingVerification, AuditLog
+from .external_api import request_async_verification
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def submit_async_verification(merchant, check_type, user, build_callback_url):
+    """
+    Submit a verification check whose result will arrive by callback.
+
+    Args:
+        merchant (Merchant): The merchant to verify
+        check_type (str): One of PendingVerification.CHECK_TYPE_CHOICES
+        user (User): The user requesting the check
+        build_callback_url (callable): Maps a callback token to an absolute URL
+
+    Returns:
+        PendingVerification: The pending verification record
+    """
+    token = secrets.token_urlsafe(32)
+    pending = PendingVerification.objects.create(
+        merchant=merchant,
+        check_type=check_type,
+        callback_token=token,
+        requested_by=user
+    )
+
+    try:
+        pending.provider_request_id = request_async_verification(
+            merchant, check_type, build_callback_url(token)
+        )
+    except Exception as e:
+        logger.error(f"Error submitting async verification: {str(e)}")
+        pending.status = 'failed'
+        pending.completed_at = timezone.now()
+        pending.response = {'error': str(e)}
+
+    pending.save(update_fields=['provider_request_id', 'status', 'completed_at', 'response'])
+    return pending
+
+
+def verify_callback_signature(body, signature):
+    """
+    Check a provider callback signature.
+
+    Callbacks are signed with an HMAC-SHA256 of the raw body using
+    EXTERNAL_API_WEBHOOK_SECRET. Without a secret, callbacks are only
+    accepted in DEBUG, on the strength of the callback token in the URL.
+
+    Args:
+        body (bytes): Raw request body
+        signature (str): Hex digest sent by the provider
+
+    Returns:
+        bool: Whether the signature is valid
+    """
+    secret = settings.EXTERNAL_API_WEBHOOK_SECRET
+    if not secret:
+        if not settings.DEBUG:
+            logger.warning("Rejected provider callback: EXTERNAL_API_WEBHOOK_SECRET is not set")
+        return settings.DEBUG
+
+    expected = hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature or '')
+
+
+def complete_pending_verification(pending, payload):
+    """
+    Store a provider callback result on the merchant for review.
+
+    The payload's 'result' is kept under
+    Merchant.external_api_response['async_checks'][check_type], so it cannot
+    overwrite the synchronous verification data. The risk model does not read
+    provider results, so the merchant's risk rating is left as it is. Repeated
+    callbacks for a verification that is no longer pending are ignored.
+
+    Args:
+        pending (PendingVerification): The verification being completed
+        payload (dict): Callback body with 'status' and a dict 'result'
+
+    Returns:
+        PendingVerification: The updated record
+    """
+    with transaction.atomic():
+        pending = PendingVerification.objects.select_for_update().get(pk=pending.pk)
+        if pending.status != 'pending':
+            return pending
+
+        pending.response = payload
+        pending.completed_at = timezone.now()
+
+        if payload.get('status') == 'failed':
+            pending.status = 'failed'
+            pending.save(update_fields=['status', 'response', 'completed_at'])
+            return pending
+
+        merchant = Merchant.objects.select_for_update().get(pk=pending.merchant_id)
+        external_data = dict(merchant.external_api_response or {})
+        async_checks = dict(external_data.get('async_checks') or {})
+        async_checks[pending.check_type] = {
+            'request_id': pending.provider_request_id,
+            'completed_at': pending.completed_at.isoformat(),
+            'result': payload.get('result') or {},
+        }
+        external_data['async_checks'] = async_checks
+        merchant.external_api_response = external_data
+        merchant.save(update_fields=['external_api_response', 'updated_at'])
+
+        pending.status = 'completed'
+        pending.save(update_fields=['status', 'response', 'completed_at'])
+
+        AuditLog.objects.create(
+            merchant=merchant,
+            action='verify',
+            details={
+                'source': 'provider_callback',
+                'check_type': pending.check_type,
+                'request_id': pending.provider_request_id
+            }
+        )
+
+    logger.info(f"Async {pending.check_type} check completed for merchant {pending.merchant_id}")
+    return pending
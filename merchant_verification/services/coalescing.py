@@ -0,0 +1,159 @@
+"""
+Request coalescing (single-flight) for expensive verification checks.
+This module makes concurrent callers asking for the same check on the same
+merchant wait on, and share, a single in-flight computation.
+"""
+
+import threading
+import time
+import uuid
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# How long a worker may hold the cross-process lock before it expires (seconds)
+LOCK_TIMEOUT = getattr(settings, 'SINGLE_FLIGHT_LOCK_TIMEOUT', 60)
+
+# How long a waiting caller blocks before computing the result itself (seconds)
+WAIT_TIMEOUT = getattr(settings, 'SINGLE_FLIGHT_WAIT_TIMEOUT', 30)
+
+# How long a published result stays available to waiters in other workers (seconds)
+RESULT_TTL = getattr(settings, 'SINGLE_FLIGHT_RESULT_TTL', 10)
+
+# How often waiters in other workers poll the cache for the result (seconds)
+POLL_INTERVAL = 0.1
+
+
+class _Call:
+    """An in-flight computation that threads in this process can wait on"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.done = False
+
+
+class SingleFlight:
+    """
+    Deduplicate concurrent calls that share a key.
+
+    Within a process, the first caller for a key runs the function and every
+    other thread waits on its result. Across workers, a short-lived cache lock
+    elects one leader and the others poll the cache for the published result.
+    Cross-worker sharing only works with a cache backend shared by all workers
+    (see CACHES in settings); with the default local-memory cache it degrades
+    to per-process deduplication.
+    """
+
+    def __init__(self, namespace):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs) once for all concurrent callers sharing key.
+
+        Args:
+            key (str): Deduplication key
+            fn (callable): The computation to run
+
+        Returns:
+            The result of the shared computation
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.event.wait(WAIT_TIMEOUT)
+            if call.done:
+                if call.error is not None:
+                    raise call.error
+                return call.result
+
+            logger.warning(f"Timed out waiting for in-flight call {self.namespace}:{key}")
+            return fn(*args, **kwargs)
+
+        try:
+            call.result = self._run_across_workers(key, fn, args, kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            call.done = True
+            call.event.set()
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def _run_across_workers(self, key, fn, args, kwargs):
+        lock_key = f"single-flight:{self.namespace}:lock:{key}"
+        result_key = f"single-flight:{self.namespace}:result:{key}"
+        token = uuid.uuid4().hex
+
+        if cache.add(lock_key, token, LOCK_TIMEOUT):
+            try:
+                result = fn(*args, **kwargs)
+                cache.set(result_key, {'token': token, 'value': result}, RESULT_TTL)
+                return result
+            finally:
+                # If our lock expired, a later leader may hold it now
+                if cache.get(lock_key) == token:
+                    cache.delete(lock_key)
+
+        # Another worker is computing this result, wait for it to be published
+        leader_token = cache.get(lock_key)
+        if leader_token is None:
+            # The leader finished between our add and get; use its result if published
+            published = cache.get(result_key)
+            if published is not None:
+                return published['value']
+            return fn(*args, **kwargs)
+
+        deadline = time.monotonic() + WAIT_TIMEOUT
+        while time.monotonic() < deadline:
+            published = cache.get(result_key)
+            if published is not None and published['token'] == leader_token:
+                return published['value']
+            if cache.get(lock_key) != leader_token:
+                # The leader finished without publishing or its lock expired
+                published = cache.get(result_key)
+                if published is not None and published['token'] == leader_token:
+                    return published['value']
+                break
+            time.sleep(POLL_INTERVAL)
+
+        return fn(*args, **kwargs)
+
+
+# Shared single-flight group for merchant verification checks
+verification_flight = SingleFlight('verification')
+
+
+def coalesce(check_type, merchant, fn):
+    """
+    Run a verification check for a merchant, sharing concurrent calls.
+
+    Args:
+        check_type (str): Name of the check, e.g. 'external' or 'transactions'
+        merchant (Merchant): The merchant being checked
+        fn (callable): Function taking the merchant and returning the check result
+
+    Returns:
+        The result of fn(merchant), possibly computed by another caller
+    """
+    if merchant.pk is None:
+        # Unsaved merchants have no stable identity to coalesce on
+        return fn(merchant)
+
+    return verification_flight.do(f"{check_type}:{merchant.pk}", fn, merchant)
@@ -0,0 +1,197 @@
+"""
+Dashboard statistics shared by the HTML dashboard and the API.
+This module computes every dashboard count in one conditional-aggregation
+query, caches the result per data version and optionally maintains a table of
+precomputed counters so reads stay constant-time as merchants grow.
+"""
+
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max, Q, F, Func, Subquery
+from django.utils import timezone
+
+from ..models import Merchant, VerificationFlag, DashboardCounter
+from .data_version import get_data_version
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+HIGH_RISK_LEVELS = ['high', 'extreme']
+RECENT_DAYS = 30
+
+
+def merchant_counter_keys(status, risk_level, business_type):
+    """
+    Get the counter names a merchant contributes to.
+
+    Args:
+        status (str): Merchant status
+        risk_level (str): Merchant risk level, may be None
+        business_type (str): Merchant business type
+
+    Returns:
+        list: Counter names
+    """
+    keys = ['total', f'status:{status}', f'business_type:{business_type}']
+    if risk_level:
+        keys.append(f'risk_level:{risk_level}')
+    return keys
+
+
+def _recent_threshold():
+    # Counted from the start of today, so the count only moves with the data
+    # and the date, which is what the dashboard validators cover
+    start_of_day = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+    return start_of_day - timezone.timedelta(days=RECENT_DAYS)
+
+
+def _build_stats(counts, recent_merchants):
+    """Shape raw counts keyed by counter name into the dashboard statistics"""
+    return {
+        'total_merchants': counts.get('total', 0),
+        'verified_merchants': counts.get('status:verified', 0),
+        'flagged_merchants': counts.get('status:flagged', 0),
+        'pending_merchants': counts.get('status:pending', 0),
+        'rejected_merchants': counts.get('status:rejected', 0),
+        'recent_merchants': recent_merchants,
+        'open_flags': counts.get('open_flags', 0),
+        'high_risk_merchants': sum(counts.get(f'risk_level:{level}', 0) for level in HIGH_RISK_LEVELS),
+        # Same shape as a values().annotate(count=...) GROUP BY, without empty groups
+        'risk_levels': [
+            {'risk_level': value, 'count': counts[f'risk_level:{value}']}
+            for value, _ in sorted(Merchant.RISK_LEVEL_CHOICES)
+            if counts.get(f'risk_level:{value}')
+        ],
+        'business_types': [
+            {'business_type': value, 'count': counts[f'business_type:{value}']}
+            for value, _ in sorted(Merchant.BUSINESS_TYPE_CHOICES)
+            if counts.get(f'business_type:{value}')
+        ],
+    }
+
+
+def count_dashboard_totals():
+    """
+    Count merchants per dashboard dimension and open flags in one query.
+
+    Returns:
+        dict: Counts keyed by counter name, plus 'recent' for merchants
+        created since the start of the day RECENT_DAYS days ago
+    """
+    aggregates = {
+        'total': Count('id'),
+        'recent': Count('id', filter=Q(created_at__gte=_recent_threshold())),
+    }
+    for value, _ in Merchant.VERIFICATION_STATUS_CHOICES:
+        aggregates[f'status:{value}'] = Count('id', filter=Q(status=value))
+    for value, _ in Merchant.RISK_LEVEL_CHOICES:
+        aggregates[f'risk_level:{value}'] = Count('id', filter=Q(risk_level=value))
+    for value, _ in Merchant.BUSINESS_TYPE_CHOICES:
+        aggregates[f'business_type:{value}'] = Count('id', filter=Q(business_type=value))
+
+    # The flag count rides along as a scalar subquery; Max() only lifts it
+    # into the aggregate, it has the same value on every row
+    open_flags = VerificationFlag.objects.filter(
+        status__in=VerificationFlag.OPEN_STATUSES
+    ).order_by().annotate(count=Func(F('id'), function='COUNT')).values('count')
+    aggregates['open_flags'] = Max(Subquery(open_flags))
+
+    counts = Merchant.objects.order_by().aggregate(**aggregates)
+    counts['open_flags'] = counts['open_flags'] or 0
+    return counts
+
+
+def compute_dashboard_stats():
+    """
+    Compute the dashboard statistics from the merchant and flag tables.
+
+    Returns:
+        dict: Dashboard statistics
+    """
+    counts = count_dashboard_totals()
+    return _build_stats(counts, counts.pop('recent'))
+
+
+def read_dashboard_counters():
+    """
+    Read the dashboard statistics from the precomputed counters table.
+
+    Returns:
+        dict: Dashboard statistics, or None if the counters were never built
+    """
+    counts = dict(DashboardCounter.objects.values_list('name', 'value'))
+    if 'total' not in counts:
+        return None
+
+    # A bounded index range on created_at, independent of table size
+    recent_merchants = Merchant.objects.filter(created_at__gte=_recent_threshold()).count()
+    return _build_stats(counts, recent_merchants)
+
+
+def get_dashboard_stats():
+    """
+    Get the dashboard statistics.
+
+    Reads the counters table when DASHBOARD_COUNTERS_ENABLED is set and the
+    counters have been built. Otherwise the aggregate query result is cached
+    per data version for DASHBOARD_STATS_CACHE_TTL seconds, so concurrent
+    dashboards share one computation and writes invalidate it immediately.
+
+    Returns:
+        dict: Dashboard statistics
+    """
+    if settings.DASHBOARD_COUNTERS_ENABLED:
+        stats = read_dashboard_counters()
+        if stats is not None:
+            return stats
+
+    version, _ = get_data_version()
+    # recent_merchants depends on the date as well as the data
+    cache_key = f'dashboard_stats:{timezone.localdate().isoformat()}:{version}'
+
+    stats = cache.get(cache_key)
+    if stats is None:
+        stats = compute_dashboard_stats()
+        cache.set(cache_key, stats, settings.DASHBOARD_STATS_CACHE_TTL)
+    return stats
+
+
+def apply_counter_deltas(deltas):
+    """
+    Adjust dashboard counters in the current transaction.
+
+    Counters that do not exist yet are left alone; they are created by
+    rebuild_dashboard_counters.
+
+    Args:
+        deltas (dict): Amount to add keyed by counter name
+    """
+    for name, delta in deltas.items():
+        if delta:
+            DashboardCounter.objects.filter(name=name).update(value=F('value') + delta)
+
+
+def rebuild_dashboard_counters():
+    """
+    Recompute every dashboard counter from the source tables.
+
+    Returns:
+        dict: The new counter values keyed by name
+    """
+    with transaction.atomic():
+        # Lock out concurrent deltas while the table is replaced
+        list(DashboardCounter.objects.select_for_update())
+        counts = count_dashboard_totals()
+        counts.pop('recent')
+
+        DashboardCounter.objects.all().delete()
+        DashboardCounter.objects.bulk_create([
+            DashboardCounter(name=name, value=value) for name, value in counts.items()
+        ])
+
+    logger.info(f"Rebuilt {len(counts)} dashboard counters")
+    return counts
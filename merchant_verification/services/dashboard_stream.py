@@ -0,0 +1,132 @@
+"""
+Live dashboard statistics for server-sent event subscribers.
+One producer per process watches the global data version and, only when it
+moves, recomputes the dashboard statistics and fans the changed values out to
+every connected dashboard. Polling cost no longer grows with open tabs.
+"""
+
+import asyncio
+import logging
+import contextvars
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .dashboard import get_dashboard_stats
+from .data_version import get_data_version
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Events a slow subscriber may fall behind by before its backlog is
+# replaced with the full statistics
+SUBSCRIBER_QUEUE_SIZE = 16
+
+
+def _current_version():
+    # recent_merchants depends on the date as well as the data
+    version, _ = get_data_version()
+    return f'{timezone.localdate().isoformat()}-{version}'
+
+
+class DashboardBroadcaster:
+    """
+    Shares one dashboard statistics producer between all subscribers.
+
+    Subscribers get a queue of (event, data) pairs: a 'stats' event with every
+    statistic when they join or fall behind, then 'delta' events with only
+    the statistics that changed. The producer runs while anyone is subscribed.
+    """
+
+    def __init__(self, keys, poll_interval=None):
+        self.keys = keys
+        self.poll_interval = poll_interval
+        self.subscribers = set()
+        self.version = None
+        self.stats = None
+        self.task = None
+        self._lock = None
+
+    def _get_lock(self):
+        # Created lazily so the lock binds to the server's event loop
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def refresh(self):
+        """
+        Recompute the statistics if the data version moved.
+
+        Returns:
+            dict: The statistics that changed, empty if none did
+        """
+        async with self._get_lock():
+            version = await sync_to_async(_current_version)()
+            if version == self.version:
+                return {}
+
+            stats = await sync_to_async(get_dashboard_stats)()
+            stats = {key: stats[key] for key in self.keys}
+            previous = self.stats or {}
+            self.version, self.stats = version, stats
+            return {key: value for key, value in stats.items() if previous.get(key) != value}
+
+    async def subscribe(self):
+        """
+        Join the broadcast.
+
+        Returns:
+            asyncio.Queue: Events for this subscriber, starting with the full statistics
+        """
+        # With no producer running the last statistics may be out of date
+        if not self.subscribers:
+            await self.refresh()
+
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        queue.put_nowait(('stats', self.stats))
+        self.subscribers.add(queue)
+
+        if self.task is None or self.task.done():
+            # The producer outlives this request, so it must not inherit the
+            # request's context: its sync_to_async calls would stay bound to
+            # the request's thread-sensitive executor after the request ends
+            self.task = asyncio.get_running_loop().create_task(self.run(), context=contextvars.Context())
+        return queue
+
+    def unsubscribe(self, queue):
+        """Leave the broadcast, stopping the producer after the last subscriber"""
+        self.subscribers.discard(queue)
+        if not self.subscribers and self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def publish(self, delta):
+        """Queue changed statistics for every subscriber"""
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(('delta', delta))
+            except asyncio.QueueFull:
+                # The backlog is superseded by the current statistics
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(('stats', self.stats))
+
+    async def run(self):
+        """Poll the data version and publish changes while there are subscribers"""
+        interval = self.poll_interval or settings.DASHBOARD_STREAM_POLL_INTERVAL
+        while self.subscribers:
+            await asyncio.sleep(interval)
+            try:
+                delta = await self.refresh()
+            except Exception as e:
+                logger.error(f"Error refreshing live dashboard statistics: {str(e)}")
+                continue
+            finally:
+                # Like the end of a request: drop a broken or expired
+                # connection instead of holding it open between polls
+                await sync_to_async(close_old_connections)()
+            if delta:
+                self.publish(delta)
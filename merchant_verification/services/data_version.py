@@ -0,0 +1,62 @@
+"""
+Global data version used to validate cached API responses.
+This module bumps a DataVersion counter whenever merchants, flags, patterns
+or reports change, so clients can revalidate responses with one lookup.
+"""
+
+import logging
+
+from django.db import transaction, IntegrityError
+from django.db.models import F
+from django.utils import timezone
+
+from ..models import DataVersion
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+GLOBAL_VERSION = 'global'
+
+
+def _increment(name):
+    updated = DataVersion.objects.filter(name=name).update(
+        version=F('version') + 1,
+        updated_at=timezone.now()
+    )
+    if updated:
+        return
+
+    try:
+        with transaction.atomic():
+            DataVersion.objects.create(name=name, version=1)
+    except IntegrityError:
+        # Another worker created the row first
+        _increment(name)
+
+
+def bump_data_version(name=GLOBAL_VERSION):
+    """
+    Bump a data version once the current transaction commits.
+
+    Bumping after commit guarantees that a client never sees the new version
+    together with data from before the write.
+
+    Args:
+        name (str): Name of the version counter
+    """
+    transaction.on_commit(lambda: _increment(name))
+
+
+def get_data_version(name=GLOBAL_VERSION):
+    """
+    Get a data version and when it last changed.
+
+    Args:
+        name (str): Name of the version counter
+
+    Returns:
+        tuple: (version, updated_at), or (0, None) if never bumped
+    """
+    row = DataVersion.objects.filter(name=name).values_list('version', 'updated_at').first()
+    return row or (0, None)
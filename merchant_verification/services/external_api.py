@@ -4,12 +4,21 @@ This module handles integration with external data sources to verify merchant in
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import os
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import random
 
+from django.conf import settings
+from django.db import connection
+
+from .rate_limiting import get_bucket
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -17,17 +26,80 @@ logger = logging.getLogger(__name__)
 # Get API key from environment variables
 API_KEY = os.getenv('EXTERNAL_API_KEY', '')
 API_BASE_URL = os.getenv('BUSINESS_VERIFICATION_API_URL', 'https://api.example.com/business-verification/')
+SANCTIONS_API_URL = os.getenv('SANCTIONS_API_URL', 'https://api.example.com/sanctions/')
+
+# 'simulate' generates responses in-process, 'http' calls the provider at API_BASE_URL
+API_MODE = os.getenv('EXTERNAL_API_MODE', 'simulate')
+
+# Whether the provider accepts batched verification requests at {API_BASE_URL}verify/batch
+API_SUPPORTS_BATCH = os.getenv('EXTERNAL_API_SUPPORTS_BATCH', 'False') == 'True'
+
+# Maximum number of merchants per provider batch request
+API_BATCH_SIZE = int(os.getenv('EXTERNAL_API_BATCH_SIZE', '100'))
 
+# Number of pooled connections, and concurrent requests when batching is unavailable
+API_POOL_SIZE = int(os.getenv('EXTERNAL_API_POOL_SIZE', '10'))
 
-def verify_merchant_external(merchant):
+# Timeout for provider requests (seconds)
+API_TIMEOUT = float(os.getenv('EXTERNAL_API_TIMEOUT', '10'))
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """
+    Get the shared HTTP session used for provider calls.
+    
+    The session keeps a pool of keep-alive connections so that repeated and
+    concurrent verification calls reuse TCP/TLS connections.
+    
+    Returns:
+        requests.Session: The pooled session
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=API_POOL_SIZE, pool_maxsize=API_POOL_SIZE)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers['Authorization'] = f'Bearer {API_KEY}'
+            _session = session
+    return _session
+
+
+def _verification_params(merchant):
+    return {
+        'business_name': merchant.name,
+        'registration_number': merchant.registration_number,
+        'country': merchant.country,
+        'business_type': merchant.business_type,
+        'website': merchant.website,
+    }
+
+
+def _verification_error(error):
+    return {
+        'error': str(error),
+        'timestamp': datetime.now().isoformat(),
+        'verification_status': 'error',
+        'message': 'Failed to verify with external API'
+    }
+
+
+def verify_merchant_external(merchant, rate_limit_timeout=None):
     """
     Verify merchant information with external business verification service.
     
-    In a production environment, this would make real API calls to verification services.
-    For this demo, we simulate API responses based on merchant attributes.
+    With EXTERNAL_API_MODE=http this calls the provider through the pooled
+    session. By default (simulate), we simulate API responses based on
+    merchant attributes.
     
     Args:
         merchant (Merchant): The merchant to verify
+        rate_limit_timeout (float): Maximum seconds to wait for a provider
+            token, defaults to PROVIDER_RATE_LIMIT_TIMEOUT
         
     Returns:
         dict: Verification data from external sources
@@ -35,34 +107,132 @@ def verify_merchant_external(merchant):
     logger.info(f"Verifying merchant {merchant.name} with external APIs")
     
     try:
-        # In a real system, we would call actual external APIs
-        # For this demo, simulate API responses based on merchant attributes
-        
-        # Simulate an API call with delay (commented out for demo)
-        # response = requests.get(
-        #     f"{API_BASE_URL}verify",
-        #     params={
-        #         'business_name': merchant.name,
-        #         'registration_number': merchant.registration_number,
-        #         'country': merchant.country
-        #     },
-        #     headers={'Authorization': f'Bearer {API_KEY}'}
-        # )
-        # verification_data = response.json()
-        
-        verification_data = simulate_verification_response(merchant)
+        if API_MODE == 'http':
+            # Wait for a token from the provider quota shared by all workers
+            get_bucket('verification').acquire(timeout=rate_limit_timeout)
+            response = get_session().get(
+                f"{API_BASE_URL}verify",
+                params=_verification_params(merchant),
+                timeout=API_TIMEOUT
+            )
+            response.raise_for_status()
+            verification_data = response.json()
+        else:
+            verification_data = simulate_verification_response(merchant)
         
         logger.info(f"External verification completed for {merchant.name}")
         return verification_data
         
     except Exception as e:
         logger.error(f"Error during external verification: {str(e)}")
-        return {
-            'error': str(e),
-            'timestamp': datetime.now().isoformat(),
-            'verification_status': 'error',
-            'message': 'Failed to verify with external API'
+        return _verification_error(e)
+
+
+def verify_merchants_external_bulk(merchants):
+    """
+    Verify many merchants with the external business verification service.
+    
+    Merchants are grouped into provider batch requests of API_BATCH_SIZE when
+    the provider supports batching. Otherwise each merchant is verified with
+    its own request, running API_POOL_SIZE requests concurrently over the
+    pooled session; the requests then share one deadline for provider
+    tokens, long enough for the quota to cover the whole batch. A failure
+    only affects the merchants it concerns.
+    
+    Args:
+        merchants (list): The merchants to verify
+        
+    Returns:
+        dict: Verification data keyed by merchant id
+    """
+    merchants = list(merchants)
+    logger.info(f"Verifying {len(merchants)} merchants with external APIs")
+    
+    if API_MODE == 'http' and API_SUPPORTS_BATCH:
+        results = {}
+        for start in range(0, len(merchants), API_BATCH_SIZE):
+            results.update(_verify_batch(merchants[start:start + API_BATCH_SIZE]))
+        return results
+    
+    if API_MODE != 'http':
+        # Simulated responses are computed in-process, there is no I/O to overlap
+        return {merchant.pk: verify_merchant_external(merchant) for merchant in merchants}
+    
+    # Beyond the burst, every merchant waits for the quota to refill
+    bucket = get_bucket('verification')
+    deadline = time.monotonic() + settings.PROVIDER_RATE_LIMIT_TIMEOUT + max(
+        0.0, len(merchants) - bucket.capacity
+    ) / bucket.refill_rate
+    
+    with ThreadPoolExecutor(max_workers=API_POOL_SIZE) as executor:
+        responses = executor.map(lambda merchant: _verify_in_worker(merchant, deadline), merchants)
+        return {merchant.pk: response for merchant, response in zip(merchants, responses)}
+
+
+def _verify_in_worker(merchant, deadline):
+    """Verify one merchant on a pool thread, closing the thread's database connection"""
+    try:
+        return verify_merchant_external(merchant, rate_limit_timeout=max(0.0, deadline - time.monotonic()))
+    finally:
+        # The rate limiter opened a connection for this thread; nothing else will close it
+        connection.close()
+
+
+def _verify_batch(merchants):
+    """Send one provider batch request and map its results back to merchants"""
+    try:
+        get_bucket('verification').acquire()
+        response = get_session().post(
+            f"{API_BASE_URL}verify/batch",
+            json={'businesses': [
+                dict(_verification_params(merchant), reference=str(merchant.pk))
+                for merchant in merchants
+            ]},
+            timeout=API_TIMEOUT
+        )
+        response.raise_for_status()
+        by_reference = {
+            item.get('reference'): item for item in response.json().get('results', [])
         }
+    except Exception as e:
+        logger.error(f"Error during external batch verification: {str(e)}")
+        return {merchant.pk: _verification_error(e) for merchant in merchants}
+    
+    return {
+        merchant.pk: by_reference.get(str(merchant.pk)) or _verification_error('Missing from batch response')
+        for merchant in merchants
+    }
+
+
+def request_async_verification(merchant, check_type, callback_url):
+    """
+    Submit a long-running verification check to be answered by callback.
+    
+    The provider acknowledges the request immediately and later POSTs the
+    result to callback_url. In simulate mode no provider is called and no
+    callback is sent; run the provider stub in http mode for an end-to-end flow.
+    
+    Args:
+        merchant (Merchant): The merchant to verify
+        check_type (str): The check to run, e.g. 'registry' or 'license'
+        callback_url (str): URL the provider should POST results to
+        
+    Returns:
+        str: The provider's request id
+    """
+    logger.info(f"Submitting async {check_type} check for merchant {merchant.name}")
+    
+    if API_MODE != 'http':
+        return f"req-{random.randint(10000000, 99999999)}"
+    
+    get_bucket('verification').acquire()
+    response = get_session().post(
+        f"{API_BASE_URL}verify/async",
+        json=dict(_verification_params(merchant), check_type=check_type, callback_url=callback_url),
+        timeout=API_TIMEOUT
+    )
+    response.raise_for_status()
+    return response.json()['request_id']
 
 
 def simulate_verification_response(merchant):
@@ -196,19 +366,50 @@ def check_business_sanctions(merchant):
     """
     Check if a business is on any sanctions lists.
     
-    In a production environment, this would call real sanctions APIs.
+    With EXTERNAL_API_MODE=http this calls the sanctions provider at
+    SANCTIONS_API_URL, otherwise responses are simulated.
     
     Args:
         merchant (Merchant): The merchant to check
         
     Returns:
-        dict: Sanctions check results
+        dict: Sanctions check results, or an error description if the check failed
     """
     logger.info(f"Checking sanctions for merchant {merchant.name}")
     
-    # In a real system, we would call actual sanctions APIs
-    # For this demo, we'll simulate responses
+    try:
+        if API_MODE == 'http':
+            get_bucket('sanctions').acquire()
+            response = get_session().get(
+                f"{SANCTIONS_API_URL}check",
+                params={'business_name': merchant.name, 'country': merchant.country},
+                timeout=API_TIMEOUT
+            )
+            response.raise_for_status()
+            return response.json()
+        
+        return simulate_sanctions_response(merchant)
+        
+    except Exception as e:
+        logger.error(f"Error during sanctions check: {str(e)}")
+        return {
+            'error': str(e),
+            'timestamp': datetime.now().isoformat(),
+            'is_sanctioned': None,
+            'message': 'Failed to check sanctions lists'
+        }
+
+
+def simulate_sanctions_response(merchant):
+    """
+    Simulate responses from sanctions screening APIs for demonstration.
     
+    Args:
+        merchant (Merchant): The merchant to generate responses for
+        
+    Returns:
+        dict: Simulated sanctions check results
+    """
     # Simulate some merchants being on sanctions lists
     is_sanctioned = merchant.country.lower() in HIGH_RISK_COUNTRIES and random.random() < 0.3
     
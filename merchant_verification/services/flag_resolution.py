@@ -0,0 +1,163 @@
+"""
+Bulk flag resolution.
+This module resolves or dismisses many flags at once with set-based UPDATEs:
+the flags are closed in chunks, the merchants' open flag counts are lowered,
+the merchants left without open flags are verified with one UPDATE, and the
+audit entries are bulk inserted, all in a single transaction.
+"""
+
+import logging
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from ..models import Merchant, VerificationFlag, AuditLog
+from .data_version import bump_data_version
+from .dashboard import merchant_counter_keys, apply_counter_deltas
+from .verification_snapshots import mark_snapshots_stale
+from .merchant_aggregates import adjust_open_flag_counts
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RESOLUTION_STATUSES = ('resolved', 'dismissed')
+
+# Flags locked and updated per statement
+CHUNK_SIZE = 1000
+
+
+def _close_flags(flag_ids, user, status, notes, now):
+    """
+    Close the open flags among flag_ids that no other analyst has claimed.
+
+    flag_ids must be sorted: chunks are then locked in id order across the
+    whole call, which keeps concurrent bulk resolutions from deadlocking.
+
+    Returns:
+        tuple: (id, merchant_id, flag_type) rows of the closed flags, and the
+            IDs of the open flags left alone because of another analyst's lease
+    """
+    closed = []
+    claimed = []
+    for start in range(0, len(flag_ids), CHUNK_SIZE):
+        chunk = flag_ids[start:start + CHUNK_SIZE]
+        rows = list(VerificationFlag.objects.select_for_update().filter(
+            id__in=chunk, status__in=VerificationFlag.OPEN_STATUSES
+        ).order_by('id').values_list('id', 'merchant_id', 'flag_type', 'claimed_by_id', 'claimed_until'))
+
+        leased = {
+            flag_id for flag_id, _, _, claimed_by_id, claimed_until in rows
+            if claimed_by_id not in (None, user.pk) and claimed_until and claimed_until > now
+        }
+        rows = [(flag_id, merchant_id, flag_type) for flag_id, merchant_id, flag_type, _, _ in rows if flag_id not in leased]
+        claimed.extend(sorted(leased))
+
+        VerificationFlag.objects.filter(id__in=[flag_id for flag_id, _, _ in rows]).update(
+            status=status,
+            resolved_by=user,
+            resolved_at=now,
+            resolution_notes=notes,
+            claimed_by=None,
+            claimed_until=None
+        )
+        closed.extend(rows)
+    return closed, claimed
+
+
+def _verify_cleared_merchants(merchant_ids, now):
+    """Verify flagged merchants with no open flags left, returning their counter keys"""
+    cleared = list(Merchant.objects.filter(
+        id__in=merchant_ids, status='flagged', open_flag_count=0
+    ).values_list('id', 'risk_level', 'business_type'))
+
+    Merchant.objects.filter(id__in=[merchant_id for merchant_id, _, _ in cleared], status='flagged').update(
+        status='verified',
+        last_verified_at=Coalesce(F('last_verified_at'), Value(now)),
+        updated_at=now
+    )
+    return cleared
+
+
+def bulk_resolve_flags(flag_ids, user, status='resolved', notes='', ip_address=None):
+    """
+    Resolve or dismiss many flags in one transaction.
+
+    Flags that are missing or already closed are skipped, and open flags
+    under another analyst's unexpired review lease are reported as claimed
+    and left open. As with a single resolution, flagged merchants left
+    without open flags become verified.
+    The updates bypass save(), so this keeps the merchants' open flag counts,
+    the dashboard counters, the verification snapshots and the data version
+    up to date itself.
+
+    Args:
+        flag_ids (list): IDs of the flags to close
+        user (User): The analyst resolving the flags
+        status (str): 'resolved' or 'dismissed'
+        notes (str): Resolution notes recorded on every flag
+        ip_address (str): Client address recorded in the audit log
+
+    Returns:
+        dict: IDs of the closed, skipped and claimed flags, and of the
+            merchants verified
+    """
+    if status not in RESOLUTION_STATUSES:
+        raise ValueError(f"Invalid resolution status: {status}")
+
+    requested_ids = list(dict.fromkeys(flag_ids))
+    now = timezone.now()
+
+    with transaction.atomic():
+        closed, claimed = _close_flags(sorted(requested_ids), user, status, notes, now)
+        closed_per_merchant = Counter(merchant_id for _, merchant_id, _ in closed)
+        merchant_ids = set(closed_per_merchant)
+        adjust_open_flag_counts({merchant_id: -count for merchant_id, count in closed_per_merchant.items()})
+        cleared = _verify_cleared_merchants(merchant_ids, now) if merchant_ids else []
+
+        AuditLog.objects.bulk_create([
+            AuditLog(
+                user=user,
+                merchant_id=merchant_id,
+                action='review',
+                ip_address=ip_address,
+                details={
+                    'flag_id': flag_id,
+                    'flag_type': flag_type,
+                    'status': status,
+                    'resolution_notes': notes,
+                    'bulk': True
+                }
+            )
+            for flag_id, merchant_id, flag_type in closed
+        ], batch_size=CHUNK_SIZE)
+
+        if settings.DASHBOARD_COUNTERS_ENABLED:
+            deltas = Counter({'open_flags': -len(closed)})
+            for _, risk_level, business_type in cleared:
+                deltas.subtract(merchant_counter_keys('flagged', risk_level, business_type))
+                deltas.update(merchant_counter_keys('verified', risk_level, business_type))
+            apply_counter_deltas(deltas)
+
+        if cleared:
+            mark_snapshots_stale([merchant_id for merchant_id, _, _ in cleared])
+        if closed:
+            bump_data_version()
+
+    closed_ids = {flag_id for flag_id, _, _ in closed}
+    handled_ids = closed_ids.union(claimed)
+    logger.info(
+        f"{user} bulk {status} {len(closed_ids)} flags; left {len(claimed)} claimed flags; "
+        f"verified {len(cleared)} merchants"
+    )
+
+    return {
+        'closed': sorted(closed_ids),
+        'skipped': [flag_id for flag_id in requested_ids if flag_id not in handled_ids],
+        'claimed': claimed,
+        'verified_merchants': sorted(merchant_id for merchant_id, _, _ in cleared),
+    }
@@ -0,0 +1,117 @@
+"""
+Denormalized merchant aggregates.
+Each merchant stores its number of open flags and a pointer to its latest
+transaction pattern, so list, detail, risk and report code read a column
+instead of recounting flags or sorting patterns. The flag and pattern write
+paths keep both current with single-statement UPDATEs; repair_merchant_aggregates
+recomputes them in bulk after writes that bypassed those paths.
+"""
+
+import logging
+from collections import defaultdict
+
+from django.db.models import F, Func, OuterRef, Subquery, IntegerField
+from django.db.models.functions import Coalesce
+
+from ..models import Merchant, TransactionPattern, VerificationFlag
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def open_flag_count_subquery():
+    """Subquery counting the open flags of the outer merchant"""
+    count = VerificationFlag.objects.filter(
+        merchant=OuterRef('pk'), status__in=VerificationFlag.OPEN_STATUSES
+    ).order_by().annotate(count=Func(F('id'), function='COUNT')).values('count')
+    return Coalesce(Subquery(count, output_field=IntegerField()), 0)
+
+
+def latest_pattern_subquery():
+    """Subquery selecting the latest transaction pattern of the outer merchant"""
+    return Subquery(
+        TransactionPattern.objects.filter(merchant=OuterRef('pk')).order_by('-analysis_date', '-id').values('pk')[:1]
+    )
+
+
+def adjust_open_flag_counts(deltas):
+    """
+    Add to the open flag counts of merchants.
+
+    Merchants with the same delta are updated in one statement, so a bulk
+    change touching many merchants runs only a few UPDATEs.
+
+    Args:
+        deltas (dict): Amount to add keyed by merchant id
+    """
+    merchants_by_delta = defaultdict(list)
+    for merchant_id, delta in deltas.items():
+        if delta:
+            merchants_by_delta[delta].append(merchant_id)
+
+    for delta, merchant_ids in merchants_by_delta.items():
+        Merchant.objects.filter(id__in=merchant_ids).update(open_flag_count=F('open_flag_count') + delta)
+
+
+def recount_open_flags(merchant_id):
+    """
+    Recount a merchant's open flags from its flags.
+
+    Args:
+        merchant_id (int): The merchant to recount
+    """
+    Merchant.objects.filter(pk=merchant_id).update(open_flag_count=open_flag_count_subquery())
+
+
+def point_to_latest_pattern(pattern):
+    """
+    Make a just saved pattern its merchant's latest, unless a newer one is.
+
+    Args:
+        pattern (TransactionPattern): The saved pattern
+    """
+    newer = TransactionPattern.objects.filter(merchant_id=pattern.merchant_id, analysis_date__gt=pattern.analysis_date)
+    Merchant.objects.filter(pk=pattern.merchant_id).exclude(
+        latest_transaction_pattern__in=newer
+    ).update(latest_transaction_pattern=pattern)
+
+
+def repoint_latest_pattern(merchant_id):
+    """
+    Point a merchant at its latest pattern after its latest was deleted.
+
+    Args:
+        merchant_id (int): The merchant whose pattern was deleted
+    """
+    # Deleting the latest pattern cleared the pointer (SET_NULL)
+    Merchant.objects.filter(pk=merchant_id, latest_transaction_pattern__isnull=True).update(
+        latest_transaction_pattern=latest_pattern_subquery()
+    )
+
+
+def repair_merchant_aggregates(batch_size=1000):
+    """
+    Recompute every merchant's open flag count and latest pattern.
+
+    Args:
+        batch_size (int): Merchants updated per statement
+
+    Returns:
+        int: Number of merchants updated
+    """
+    updated = 0
+    last_id = 0
+    while True:
+        ids = list(Merchant.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+
+        updated += Merchant.objects.filter(id__in=ids).update(
+            open_flag_count=open_flag_count_subquery(),
+            latest_transaction_pattern=latest_pattern_subquery()
+        )
+        last_id = ids[-1]
+
+    logger.info(f"Repaired aggregates of {updated} merchants")
+    return updated
@@ -0,0 +1,235 @@
+"""
+Bulk merchant import service.
+This module stream-parses CSV or NDJSON merchant records, validates them in
+batches and inserts each batch of merchants and audit logs with bulk_create,
+so large partner portfolios load in constant memory.
+"""
+
+import csv
+import json
+import time
+import codecs
+import logging
+from collections import Counter
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction, IntegrityError
+
+from ..models import Merchant, AuditLog
+from ..serializers import MerchantImportSerializer
+from .data_version import bump_data_version
+from .dashboard import merchant_counter_keys, apply_counter_deltas
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = ['csv', 'ndjson']
+
+
+class InvalidRecord:
+    """A record that could not be parsed from the input"""
+
+    def __init__(self, error):
+        self.error = error
+
+
+def iter_csv_records(stream):
+    """
+    Parse merchant records from a CSV byte stream with a header row.
+
+    Args:
+        stream: Iterable of encoded lines
+
+    Yields:
+        dict: One record per data row, without empty columns
+    """
+    for row in csv.DictReader(codecs.iterdecode(stream, 'utf-8-sig')):
+        yield {key: value for key, value in row.items() if key and value not in ('', None)}
+
+
+def iter_ndjson_records(stream):
+    """
+    Parse merchant records from a newline-delimited JSON byte stream.
+
+    Args:
+        stream: Iterable of encoded lines
+
+    Yields:
+        dict: One record per non-empty line, or InvalidRecord if it is not a JSON object
+    """
+    for line in codecs.iterdecode(stream, 'utf-8-sig'):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield InvalidRecord(f'Invalid JSON: {str(e)}')
+            continue
+        yield record if isinstance(record, dict) else InvalidRecord('Expected a JSON object')
+
+
+def iter_records(stream, import_format):
+    """
+    Parse merchant records in the given format.
+
+    Args:
+        stream: Iterable of encoded lines
+        import_format (str): One of IMPORT_FORMATS
+
+    Returns:
+        iterator: Parsed records
+    """
+    if import_format == 'csv':
+        return iter_csv_records(stream)
+    return iter_ndjson_records(stream)
+
+
+class MerchantImport:
+    """
+    Imports merchant records in batches and collects a summary.
+
+    Rows that fail validation or duplicate an existing or earlier registration
+    number are reported with their 1-based row number and skipped; the rest of
+    the batch is still inserted.
+    """
+
+    def __init__(self, user, chunk_size=None, max_errors=None):
+        self.user = user
+        self.chunk_size = chunk_size or settings.MERCHANT_IMPORT_CHUNK_SIZE
+        self.max_errors = settings.MERCHANT_IMPORT_MAX_ERRORS if max_errors is None else max_errors
+        self.total_rows = 0
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+        self.seen_registration_numbers = set()
+
+    def add_error(self, row, errors):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'row': row, 'errors': errors})
+
+    def run(self, records):
+        """
+        Import every record.
+
+        Args:
+            records: Iterable of record dicts
+
+        Returns:
+            dict: Import summary with counts, row errors and throughput
+        """
+        started = time.monotonic()
+        records = enumerate(records, start=1)
+
+        while True:
+            chunk = list(islice(records, self.chunk_size))
+            if not chunk:
+                break
+            self.import_chunk(chunk)
+
+        if self.created:
+            bump_data_version()
+
+        elapsed = time.monotonic() - started
+        summary = {
+            'total_rows': self.total_rows,
+            'created': self.created,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+            'elapsed_seconds': round(elapsed, 3),
+            'rows_per_second': round(self.total_rows / elapsed, 1) if elapsed > 0 else None,
+        }
+        logger.info(f"Imported {self.created}/{self.total_rows} merchants in {elapsed:.1f}s "
+                    f"({summary['rows_per_second']} rows/s)")
+        return summary
+
+    def validate_chunk(self, chunk):
+        valid = []
+        for row, record in chunk:
+            self.total_rows += 1
+            if isinstance(record, InvalidRecord):
+                self.add_error(row, {'non_field_errors': [record.error]})
+                continue
+
+            serializer = MerchantImportSerializer(data=record)
+            if serializer.is_valid():
+                valid.append((row, serializer.validated_data))
+            else:
+                self.add_error(row, serializer.errors)
+
+        # One query checks the whole batch against existing merchants
+        numbers = {data['registration_number'] for _, data in valid}
+        existing = set(Merchant.objects.filter(
+            registration_number__in=numbers
+        ).values_list('registration_number', flat=True))
+
+        unique = []
+        for row, data in valid:
+            number = data['registration_number']
+            if number in existing or number in self.seen_registration_numbers:
+                self.add_error(row, {'registration_number': ['merchant with this registration number already exists.']})
+                continue
+            self.seen_registration_numbers.add(number)
+            unique.append((row, data))
+        return unique
+
+    def import_chunk(self, chunk):
+        rows = self.validate_chunk(chunk)
+        if not rows:
+            return
+
+        merchants = [Merchant(**data, status='pending', created_by=self.user) for _, data in rows]
+        try:
+            with transaction.atomic():
+                created = Merchant.objects.bulk_create(merchants)
+                self.record_created(created)
+        except IntegrityError:
+            # A concurrent writer took a registration number after the batch
+            # check; insert row by row so only the conflicting rows fail
+            for (row, data), merchant in zip(rows, merchants):
+                merchant.pk = None
+                try:
+                    with transaction.atomic():
+                        merchant.save()
+                        self.record_created([merchant], bulk=False)
+                except IntegrityError:
+                    self.add_error(row, {'registration_number': ['merchant with this registration number already exists.']})
+
+    def record_created(self, merchants, bulk=True):
+        AuditLog.objects.bulk_create([
+            AuditLog(
+                user=self.user,
+                merchant=merchant,
+                action='create',
+                details={'source': 'bulk_import'}
+            )
+            for merchant in merchants
+        ])
+
+        # bulk_create skips the save signals that maintain the counters
+        if bulk and settings.DASHBOARD_COUNTERS_ENABLED:
+            deltas = Counter()
+            for merchant in merchants:
+                deltas.update(merchant_counter_keys(merchant.status, merchant.risk_level, merchant.business_type))
+            apply_counter_deltas(deltas)
+
+        self.created += len(merchants)
+
+
+def import_merchants(stream, import_format, user, chunk_size=None):
+    """
+    Import merchants from a CSV or NDJSON byte stream.
+
+    Args:
+        stream: Iterable of encoded lines, e.g. an open file or request stream
+        import_format (str): One of IMPORT_FORMATS
+        user (User): The user recorded as creator
+        chunk_size (int): Rows per batch, defaults to MERCHANT_IMPORT_CHUNK_SIZE
+
+    Returns:
+        dict: Import summary with counts, row errors and throughput
+    """
+    return MerchantImport(user, chunk_size).run(iter_records(stream, import_format))
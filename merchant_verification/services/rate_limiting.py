@@ -0,0 +1,168 @@
+"""
+Shared rate limiting for outbound provider calls.
+This module implements a token bucket whose state lives in a database row, so
+every worker process draws from the same per-account provider quota.
+"""
+
+import time
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from ..models import ProviderRateLimit
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a caller could not get a token before its deadline"""
+
+
+class TokenBucket:
+    """
+    A token bucket shared across processes through a ProviderRateLimit row.
+
+    The bucket holds up to `capacity` tokens and refills at `refill_rate`
+    tokens per second. Each attempt locks the row, refills it for the time
+    elapsed since the last refill and takes a token if one is available.
+
+    The row lock is held until the transaction that took it commits. Call
+    try_acquire and acquire outside any transaction (in autocommit), so the
+    lock is released as soon as the token is taken; inside an outer
+    transaction it would stay locked until that commits and serialize every
+    caller of the provider.
+
+    Raises:
+        ValueError: If refill_rate is not positive
+    """
+
+    def __init__(self, name, capacity, refill_rate):
+        if float(refill_rate) <= 0:
+            raise ValueError(f"Provider {name} needs a positive refill_rate, got {refill_rate}")
+        self.name = name
+        self.capacity = float(capacity)
+        self.refill_rate = float(refill_rate)
+
+    def _refilled_tokens(self, bucket, now):
+        elapsed = max(0.0, (now - bucket.last_refill).total_seconds())
+        return min(self.capacity, bucket.tokens + elapsed * self.refill_rate)
+
+    def try_acquire(self, tokens=1):
+        """
+        Try to take tokens from the bucket without waiting.
+
+        Args:
+            tokens (int): Number of tokens to take
+
+        Returns:
+            float: 0 if the tokens were taken, otherwise the seconds until they
+            are expected to be available
+        """
+        with transaction.atomic():
+            now = timezone.now()
+            bucket, _ = ProviderRateLimit.objects.select_for_update().get_or_create(
+                name=self.name,
+                defaults={'tokens': self.capacity, 'last_refill': now}
+            )
+
+            bucket.tokens = self._refilled_tokens(bucket, now)
+            bucket.last_refill = now
+
+            if bucket.tokens >= tokens:
+                bucket.tokens -= tokens
+                bucket.save(update_fields=['tokens', 'last_refill'])
+                return 0.0
+
+            bucket.save(update_fields=['tokens', 'last_refill'])
+            return (tokens - bucket.tokens) / self.refill_rate
+
+    def acquire(self, tokens=1, timeout=None):
+        """
+        Take tokens from the bucket, waiting up to a deadline.
+
+        Waiting callers sleep until the tokens they lacked are expected and
+        try again. Callers are not queued: whichever retries first after a
+        refill gets the token, so a new caller can overtake one that has
+        waited longer.
+
+        Args:
+            tokens (int): Number of tokens to take
+            timeout (float): Maximum seconds to wait, defaults to PROVIDER_RATE_LIMIT_TIMEOUT
+
+        Raises:
+            RateLimitExceeded: If the tokens are not available before the deadline
+        """
+        if timeout is None:
+            timeout = settings.PROVIDER_RATE_LIMIT_TIMEOUT
+
+        started = time.monotonic()
+        deadline = started + timeout
+
+        while True:
+            wait = self.try_acquire(tokens)
+            now = time.monotonic()
+
+            if wait == 0:
+                ProviderRateLimit.objects.filter(name=self.name).update(
+                    allowed_calls=F('allowed_calls') + 1,
+                    total_wait_seconds=F('total_wait_seconds') + (now - started)
+                )
+                return
+
+            if now + wait > deadline:
+                ProviderRateLimit.objects.filter(name=self.name).update(
+                    throttled_calls=F('throttled_calls') + 1
+                )
+                logger.warning(f"Rate limit exceeded for provider {self.name}")
+                raise RateLimitExceeded(f"Rate limit exceeded for provider {self.name}")
+
+            time.sleep(wait)
+
+    def level(self):
+        """
+        Get the current state of the bucket without taking tokens.
+
+        Returns:
+            dict: Token level, configuration and call metrics
+        """
+        now = timezone.now()
+        bucket = ProviderRateLimit.objects.filter(name=self.name).first()
+
+        return {
+            'name': self.name,
+            'tokens': self._refilled_tokens(bucket, now) if bucket else self.capacity,
+            'capacity': self.capacity,
+            'refill_rate': self.refill_rate,
+            'allowed_calls': bucket.allowed_calls if bucket else 0,
+            'throttled_calls': bucket.throttled_calls if bucket else 0,
+            'total_wait_seconds': bucket.total_wait_seconds if bucket else 0.0,
+        }
+
+
+def get_bucket(name):
+    """
+    Get the token bucket configured for a provider in PROVIDER_RATE_LIMITS.
+
+    Args:
+        name (str): Provider name, e.g. 'verification' or 'sanctions'
+
+    Returns:
+        TokenBucket: The provider's bucket
+    """
+    config = settings.PROVIDER_RATE_LIMITS[name]
+    return TokenBucket(name, config['capacity'], config['refill_rate'])
+
+
+def get_bucket_levels():
+    """
+    Get the state of every configured provider bucket.
+
+    Returns:
+        list: Bucket states as returned by TokenBucket.level
+    """
+    return [get_bucket(name).level() for name in settings.PROVIDER_RATE_LIMITS]
@@ -0,0 +1,178 @@
+"""
+Flag review queue.
+Open flags are reviewed in order of a stored priority combining severity, the
+merchant's risk score and the flag's age, served from a partial index so the
+top of the queue is a single index range scan. Analysts claim flags under a
+time-limited lease, so two analysts working the queue never get the same flag.
+"""
+
+import logging
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, F
+from django.utils import timezone
+
+from ..models import Merchant, VerificationFlag
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Severity steps above 'low'
+SEVERITY_RANKS = {'low': 0, 'medium': 1, 'high': 2, 'critical': 3}
+
+# Ages are measured in hours from this instant
+PRIORITY_EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _hours_since_epoch(moment):
+    return (moment - PRIORITY_EPOCH).total_seconds() / 3600
+
+
+def flag_priority(severity, risk_score, created_at):
+    """
+    Compute the stored queue priority of a flag.
+
+    A flag's priority is its severity and merchant risk score expressed as
+    hours of waiting (REVIEW_QUEUE_SEVERITY_HOURS per severity step,
+    REVIEW_QUEUE_RISK_HOURS per risk score point) plus its age in hours.
+    Every open flag ages at the same rate, so the age term is stored as minus
+    the creation time: the ordering never changes as time passes and the
+    stored value needs no periodic recomputation.
+
+    Args:
+        severity (str): The flag's severity
+        risk_score (float): The merchant's risk score, or None if not assessed
+        created_at (datetime): When the flag was raised
+
+    Returns:
+        float: The priority; higher is reviewed sooner
+    """
+    return (
+        SEVERITY_RANKS.get(severity, 0) * settings.REVIEW_QUEUE_SEVERITY_HOURS
+        + (risk_score or 0) * settings.REVIEW_QUEUE_RISK_HOURS
+        - _hours_since_epoch(created_at)
+    )
+
+
+def current_priority(flag):
+    """
+    Get a flag's priority as of now, in hours of waiting.
+
+    Args:
+        flag (VerificationFlag): The flag
+
+    Returns:
+        float: Stored priority plus the hours elapsed since PRIORITY_EPOCH
+    """
+    return flag.priority + _hours_since_epoch(timezone.now())
+
+
+def update_flag_priority(flag):
+    """
+    Set a flag's priority from its severity and merchant before it is saved.
+
+    Uses the flag's merchant if it is already loaded; otherwise only the
+    merchant's risk score is read.
+
+    Args:
+        flag (VerificationFlag): The flag being saved
+    """
+    if VerificationFlag.merchant.is_cached(flag):
+        risk_score = flag.merchant.risk_score
+    else:
+        risk_score = Merchant.objects.filter(pk=flag.merchant_id).values_list('risk_score', flat=True).first()
+    flag.priority = flag_priority(flag.severity, risk_score, flag.created_at or timezone.now())
+
+
+def adjust_priorities_for_risk_score(merchant_id, old_score, new_score):
+    """
+    Shift the priorities of a merchant's open flags after its risk score changed.
+
+    Args:
+        merchant_id (int): The merchant
+        old_score (float): Risk score the priorities were computed with
+        new_score (float): The merchant's new risk score
+
+    Returns:
+        int: Number of flags updated
+    """
+    delta = ((new_score or 0) - (old_score or 0)) * settings.REVIEW_QUEUE_RISK_HOURS
+    if not delta:
+        return 0
+    return VerificationFlag.objects.filter(
+        merchant_id=merchant_id, status__in=VerificationFlag.OPEN_STATUSES
+    ).update(priority=F('priority') + delta)
+
+
+def review_queue():
+    """
+    Get the open flags in review order.
+
+    Returns:
+        QuerySet: Open flags, highest priority first
+    """
+    return VerificationFlag.objects.filter(
+        status__in=VerificationFlag.OPEN_STATUSES
+    ).order_by('-priority', 'id')
+
+
+def available_flags(user):
+    """
+    Get the open flags a user may claim.
+
+    Args:
+        user (User): The analyst
+
+    Returns:
+        QuerySet: Queued flags not leased to another analyst, in review order
+    """
+    return review_queue().filter(
+        Q(claimed_until__isnull=True) | Q(claimed_until__lt=timezone.now()) | Q(claimed_by=user)
+    )
+
+
+def claim_flags(user, count=1):
+    """
+    Lease the highest priority available flags to an analyst.
+
+    Flags already leased to the analyst are renewed if they are still at the
+    top of the queue. Rows locked by analysts claiming at the same time are
+    skipped, so concurrent claims never return the same flag.
+
+    Args:
+        user (User): The analyst claiming flags
+        count (int): Maximum number of flags to claim
+
+    Returns:
+        list: The claimed flags, in review order
+    """
+    lease_until = timezone.now() + timezone.timedelta(seconds=settings.REVIEW_QUEUE_LEASE_SECONDS)
+
+    with transaction.atomic():
+        flag_ids = list(available_flags(user).select_for_update(skip_locked=True).values_list(
+            'id', flat=True
+        )[:count])
+        VerificationFlag.objects.filter(id__in=flag_ids).update(claimed_by=user, claimed_until=lease_until)
+
+    if flag_ids:
+        logger.info(f"Leased flags {flag_ids} to {user} until {lease_until.isoformat()}")
+    return list(review_queue().filter(id__in=flag_ids).select_related('merchant', 'claimed_by'))
+
+
+def release_flag(flag_id, user):
+    """
+    Return a claimed flag to the queue.
+
+    Args:
+        flag_id (int): The flag to release
+        user (User): The analyst holding the lease
+
+    Returns:
+        bool: Whether the user held the flag's lease
+    """
+    return VerificationFlag.objects.filter(id=flag_id, claimed_by=user).update(
+        claimed_by=None, claimed_until=None
+    ) > 0
@@ -0,0 +1,126 @@
+"""
+Merchant search.
+On PostgreSQL, merchants are matched against a generated tsvector column with
+a GIN index and a trigram index on the name, and ranked by text rank plus
+name similarity, so search stays fast on large tables and tolerates typos.
+Registration numbers, emails and websites also match on any substring, through
+trigram indexes, since the tsvector keeps emails and URLs as whole tokens.
+Other databases fall back to substring matching with a simple ranking.
+"""
+
+import logging
+
+from django.db import connections
+from django.db.models import Q, Func, Value, Case, When, BooleanField, FloatField, IntegerField
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Upper
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Text search configuration of the search_vector column; 'simple' does not
+# stem, so names, registration numbers and emails match as written
+SEARCH_CONFIG = 'simple'
+
+
+class TextMatch(Func):
+    """vector @@ tsquery"""
+    arg_joiner = ' @@ '
+    template = '(%(expressions)s)'
+    output_field = BooleanField()
+
+
+class TrigramMatch(Func):
+    """a % b: trigram similarity above pg_trgm.similarity_threshold"""
+    arg_joiner = ' %% '
+    template = '(%(expressions)s)'
+    output_field = BooleanField()
+
+
+def build_prefix_tsquery(query):
+    """
+    Build a to_tsquery() expression matching every term of a query as a prefix.
+
+    Args:
+        query (str): The user's search text
+
+    Returns:
+        str: Terms quoted as tsquery lexemes, joined with AND
+    """
+    terms = []
+    for term in query.split():
+        # Quoted lexemes go through the same parser as the indexed text
+        escaped = term.replace('\\', '\\\\').replace("'", "''")
+        terms.append(f"'{escaped}':*")
+    return ' & '.join(terms)
+
+
+def _search_postgresql(queryset, query, ranked):
+    table = connections[queryset.db].ops.quote_name(queryset.model._meta.db_table)
+    # search_vector is a generated column maintained by the database and
+    # not declared on the model; see migration 0009
+    vector = RawSQL(f'{table}.search_vector', ())
+    tsquery = Func(Value(SEARCH_CONFIG), Value(build_prefix_tsquery(query)), function='to_tsquery')
+    # Same expression as the trigram index, which also serves name__icontains
+    name = Upper('name')
+    search_name = Value(query.upper())
+
+    queryset = queryset.filter(
+        Q(TextMatch(vector, tsquery)) |
+        Q(TrigramMatch(name, search_name)) |
+        Q(name__icontains=query) |
+        # Served by the trigram indexes of migration 0013
+        Q(registration_number__icontains=query) |
+        Q(website__icontains=query) |
+        Q(email__icontains=query)
+    )
+    if not ranked:
+        return queryset
+
+    return queryset.annotate(
+        search_rank=Func(vector, tsquery, function='ts_rank', output_field=FloatField())
+        + Func(name, search_name, function='similarity', output_field=FloatField())
+    ).order_by('-search_rank', '-created_at')
+
+
+def _search_fallback(queryset, query, ranked):
+    queryset = queryset.filter(
+        Q(name__icontains=query) |
+        Q(registration_number__icontains=query) |
+        Q(website__icontains=query) |
+        Q(email__icontains=query)
+    )
+    if not ranked:
+        return queryset
+
+    return queryset.annotate(
+        search_rank=Case(
+            When(Q(name__iexact=query) | Q(registration_number__iexact=query), then=Value(3)),
+            When(name__istartswith=query, then=Value(2)),
+            default=Value(1),
+            output_field=IntegerField()
+        )
+    ).order_by('-search_rank', '-created_at')
+
+
+def search_merchants(queryset, query, ranked=True):
+    """
+    Filter merchants by name, registration number, website or email.
+
+    Args:
+        queryset (QuerySet): Merchants to search
+        query (str): The user's search text
+        ranked (bool): Order by relevance, best matches first; otherwise the
+            queryset's ordering is kept
+
+    Returns:
+        QuerySet: Matching merchants
+    """
+    query = query.strip()
+    if not query:
+        return queryset.none()
+
+    if connections[queryset.db].vendor == 'postgresql':
+        return _search_postgresql(queryset, query, ranked)
+    return _search_fallback(queryset, query, ranked)
@@ -0,0 +1,271 @@
+"""
+Merchant typeahead.
+This module keeps an in-process prefix index of normalized merchant names and
+registration numbers in sorted arrays, so suggestions are a binary search
+instead of a database query. The index syncs the merchants changed since its
+last sync whenever the global data version moves, and is rebuilt from scratch
+every TYPEAHEAD_REBUILD_INTERVAL seconds to drop deleted merchants. Syncs and
+rebuilds run on a background thread while lookups keep using the current
+arrays, and the data version is checked at most every
+TYPEAHEAD_VERSION_CHECK_INTERVAL seconds.
+
+Syncs find changed merchants by updated_at, so set-based updates of names,
+registration numbers or statuses must set it too; changes that do not are
+picked up by the next rebuild.
+"""
+
+import os
+import re
+import time
+import logging
+import threading
+import unicodedata
+from bisect import bisect_left
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from ..models import Merchant
+from .data_version import get_data_version
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+# Rows saved shortly before a sync can commit after it; re-reading this
+# window on every sync picks them up
+SYNC_OVERLAP = timezone.timedelta(seconds=60)
+
+# Beyond this many changed merchants a rebuild is cheaper than a sync
+MAX_SYNC_ROWS = 5000
+
+WORD_RE = re.compile(r'\w+')
+
+
+def normalize_name(value):
+    """
+    Normalize a name for prefix matching: no accents, case or punctuation.
+
+    Args:
+        value (str): A merchant name or typed query
+
+    Returns:
+        str: Lowercase words separated by single spaces
+    """
+    value = unicodedata.normalize('NFKD', value or '')
+    value = ''.join(char for char in value if not unicodedata.combining(char))
+    return ' '.join(WORD_RE.findall(value.casefold()))
+
+
+def normalize_registration_number(value):
+    """
+    Normalize a registration number for prefix matching, ignoring separators.
+
+    Args:
+        value (str): A registration number or typed query
+
+    Returns:
+        str: Lowercase letters and digits only
+    """
+    return ''.join(WORD_RE.findall((value or '').casefold()))
+
+
+def name_keys(name):
+    """Index keys for a name: the full name and the name from each later word"""
+    words = normalize_name(name).split()
+    return {' '.join(words[start:]) for start in range(len(words))}
+
+
+class MerchantPrefixIndex:
+    """
+    Sorted (key, merchant id) arrays over merchant names and registration numbers.
+
+    Lookups do not take the lock, which is held by the refresh in progress.
+    Syncs and rebuilds never edit the published arrays: they build new ones
+    and swap them in, so a lookup only ever sees complete arrays. Until the
+    first build completes, lookups return no suggestions.
+
+    Args:
+        background (bool): Refresh on a background thread; with False,
+            lookups refresh the index inline
+    """
+
+    def __init__(self, background=True):
+        self.background = background
+        self._lock = threading.Lock()
+        self.clear()
+        # A refresh running when a server forks its workers never finishes in them
+        os.register_at_fork(after_in_child=self._reset_lock)
+
+    def _reset_lock(self):
+        self._lock = threading.Lock()
+
+    def clear(self):
+        """Drop the index; the next lookup rebuilds it"""
+        self._merchants = {}
+        self._name_keys = []
+        self._registration_keys = []
+        self._version = None
+        self._synced_until = None
+        self._built_at = None
+        self._version_checked_at = None
+
+    def _rows(self, queryset):
+        return queryset.values_list('id', 'name', 'registration_number', 'status', 'updated_at').iterator(
+            chunk_size=settings.EXPORT_CHUNK_SIZE
+        )
+
+    def _entry(self, name, registration_number, status):
+        return (name, status, name_keys(name), normalize_registration_number(registration_number))
+
+    def rebuild(self, version):
+        """Load every merchant into new arrays"""
+        started = time.monotonic()
+        merchants = {}
+        names = []
+        registrations = []
+        synced_until = None
+
+        for merchant_id, name, registration_number, status, updated_at in self._rows(Merchant.objects.all()):
+            entry = self._entry(name, registration_number, status)
+            merchants[merchant_id] = entry
+            names.extend((key, merchant_id) for key in entry[2])
+            registrations.append((entry[3], merchant_id))
+            if synced_until is None or updated_at > synced_until:
+                synced_until = updated_at
+
+        names.sort()
+        registrations.sort()
+        self._merchants, self._name_keys, self._registration_keys = merchants, names, registrations
+        self._version = version
+        self._synced_until = synced_until
+        self._built_at = time.monotonic()
+
+        logger.info(f"Built typeahead index of {len(merchants)} merchants in {self._built_at - started:.2f}s")
+
+    def sync(self, version):
+        """Apply the merchants saved since the last sync to copies of the arrays"""
+        queryset = Merchant.objects.all()
+        if self._synced_until is not None:
+            queryset = queryset.filter(updated_at__gte=self._synced_until - SYNC_OVERLAP)
+
+        rows = list(self._rows(queryset[:MAX_SYNC_ROWS + 1]))
+        if len(rows) > MAX_SYNC_ROWS:
+            self.rebuild(version)
+            return
+
+        merchants = dict(self._merchants)
+        changed = {row[0] for row in rows}
+        names = [item for item in self._name_keys if item[1] not in changed]
+        registrations = [item for item in self._registration_keys if item[1] not in changed]
+        synced_until = self._synced_until
+
+        for merchant_id, name, registration_number, status, updated_at in rows:
+            entry = self._entry(name, registration_number, status)
+            merchants[merchant_id] = entry
+            names.extend((key, merchant_id) for key in entry[2])
+            registrations.append((entry[3], merchant_id))
+            if synced_until is None or updated_at > synced_until:
+                synced_until = updated_at
+
+        names.sort()
+        registrations.sort()
+        self._merchants, self._name_keys, self._registration_keys = merchants, names, registrations
+        self._version = version
+        self._synced_until = synced_until
+
+    def _expired(self):
+        return self._built_at is None or time.monotonic() - self._built_at > settings.TYPEAHEAD_REBUILD_INTERVAL
+
+    def refresh(self):
+        """Sync or rebuild the index now if merchants may have changed"""
+        version, _ = get_data_version()
+        if self._expired():
+            self.rebuild(version)
+        elif version != self._version:
+            self.sync(version)
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.error(f"Error refreshing typeahead index: {str(e)}")
+        finally:
+            # This thread's connection would otherwise stay open
+            connection.close()
+            self._lock.release()
+
+    def ensure_current(self):
+        """Start a sync or rebuild if merchants may have changed"""
+        if not self._expired():
+            now = time.monotonic()
+            if (self._version_checked_at is not None
+                    and now - self._version_checked_at < settings.TYPEAHEAD_VERSION_CHECK_INTERVAL):
+                return
+            self._version_checked_at = now
+            version, _ = get_data_version()
+            if version == self._version:
+                return
+
+        if not self._lock.acquire(blocking=False):
+            # A refresh is already running
+            return
+
+        if not self.background:
+            try:
+                self.refresh()
+            finally:
+                self._lock.release()
+            return
+
+        threading.Thread(target=self._refresh_in_background, name='typeahead-refresh', daemon=True).start()
+
+    def warm(self):
+        """Start building the index before the first lookup needs it"""
+        self.ensure_current()
+
+    def _collect(self, keys, prefix, limit, results, seen):
+        position = bisect_left(keys, (prefix,))
+        while position < len(keys) and len(results) < limit:
+            key, merchant_id = keys[position]
+            if not key.startswith(prefix):
+                break
+            entry = self._merchants.get(merchant_id)
+            if entry is not None and merchant_id not in seen:
+                seen.add(merchant_id)
+                results.append({'id': merchant_id, 'name': entry[0], 'status': entry[1]})
+            position += 1
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        """
+        Suggest merchants whose registration number or a word of whose name
+        starts with the query.
+
+        Args:
+            query (str): The text typed so far
+            limit (int): Maximum number of suggestions
+
+        Returns:
+            list: Dicts with id, name and status; registration number
+            matches first, then names in alphabetical order
+        """
+        registration_prefix = normalize_registration_number(query)
+        name_prefix = normalize_name(query)
+        if not name_prefix:
+            return []
+
+        self.ensure_current()
+
+        results = []
+        seen = set()
+        self._collect(self._registration_keys, registration_prefix, limit, results, seen)
+        self._collect(self._name_keys, name_prefix, limit, results, seen)
+        return results
+
+
+# One index per process, shared by all requests
+merchant_index = MerchantPrefixIndex()
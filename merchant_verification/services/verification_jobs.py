@@ -0,0 +1,272 @@
+"""
+Background merchant verification jobs.
+This module runs merchant verifications either inline or as queued jobs that
+a worker process claims, runs and reports back on, so slow provider checks
+and model scoring do not hold API requests open.
+"""
+
+import hmac
+import json
+import time
+import hashlib
+import logging
+
+import requests
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, F
+from django.utils import timezone
+from rest_framework.utils import encoders
+
+from ..models import Merchant, AuditLog, VerificationJob
+from ..serializers import MerchantSerializer, MerchantVerificationSerializer
+from ..ml_models.risk_assessment import assess_merchant_risk
+from .coalescing import coalesce
+from .external_api import verify_merchant_external, API_TIMEOUT
+from .webhooks import post_webhook, UnsafeCallbackURL
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class VerificationRequestInvalid(Exception):
+    """Raised when verification request data does not validate"""
+
+    def __init__(self, errors):
+        super().__init__(str(errors))
+        self.errors = errors
+
+
+def perform_merchant_verification(merchant, data, user):
+    """
+    Verify a merchant: score it, run the external check and save the outcome.
+
+    Args:
+        merchant (Merchant): The merchant to verify
+        data (dict): Verification fields accepted by MerchantVerificationSerializer
+        user (User): The user the verification is recorded against
+
+    Returns:
+        dict: The updated merchant, risk assessment and external verification
+
+    Raises:
+        VerificationRequestInvalid: If the data does not validate
+    """
+    serializer = MerchantVerificationSerializer(merchant, data=data, partial=True)
+    if not serializer.is_valid():
+        raise VerificationRequestInvalid(serializer.errors)
+
+    # Get risk assessment from ML model
+    risk_data = assess_merchant_risk(merchant)
+
+    # Get external verification data
+    external_data = coalesce('external', merchant, verify_merchant_external)
+
+    # Update merchant with verification data
+    merchant = serializer.save(
+        verified_by=user,
+        last_verified_at=timezone.now(),
+        external_api_response=external_data
+    )
+
+    # Create audit log
+    AuditLog.objects.create(
+        user=user,
+        merchant=merchant,
+        action='verify',
+        details={
+            'status': merchant.status,
+            'risk_level': merchant.risk_level,
+            'risk_score': merchant.risk_score
+        }
+    )
+
+    return {
+        'merchant': MerchantSerializer(merchant).data,
+        'risk_assessment': risk_data,
+        'external_verification': external_data
+    }
+
+
+def enqueue_verification_job(merchant, data, user, callback_url=None):
+    """
+    Queue a merchant verification for a background worker.
+
+    Args:
+        merchant (Merchant): The merchant to verify
+        data (dict): Verification fields accepted by MerchantVerificationSerializer
+        user (User): The user requesting the verification
+        callback_url (str): Optional URL notified when the job finishes
+
+    Returns:
+        VerificationJob: The queued job
+    """
+    return VerificationJob.objects.create(
+        merchant=merchant,
+        request_data=data,
+        callback_url=callback_url or None,
+        requested_by=user
+    )
+
+
+def _fail_exhausted_jobs(stale, now):
+    """Fail running jobs past their timeout that have no attempts left"""
+    jobs = list(VerificationJob.objects.select_for_update(skip_locked=True).filter(
+        status='running', started_at__lt=stale, attempts__gte=settings.VERIFICATION_JOB_MAX_ATTEMPTS
+    ))
+    for job in jobs:
+        logger.error(f"Verification job {job.pk} was abandoned after {job.attempts} attempts")
+        job.status = 'failed'
+        job.error = f'Worker did not finish the job within {settings.VERIFICATION_JOB_TIMEOUT} seconds'
+        job.completed_at = now
+    VerificationJob.objects.bulk_update(jobs, ['status', 'error', 'completed_at'])
+    return jobs
+
+
+def claim_next_job():
+    """
+    Claim the oldest runnable job for this worker.
+
+    Queued jobs are runnable, as are running jobs whose worker has not
+    finished them within VERIFICATION_JOB_TIMEOUT seconds and that have
+    attempts left; abandoned jobs without attempts left are failed instead.
+    A reclaimed job's first worker may still be running it, so the timeout
+    must be longer than any verification. Rows locked by other workers are
+    skipped, so workers never block on each other.
+
+    Returns:
+        VerificationJob: The claimed job, or None if there is nothing to run
+    """
+    now = timezone.now()
+    stale = now - timezone.timedelta(seconds=settings.VERIFICATION_JOB_TIMEOUT)
+
+    with transaction.atomic():
+        exhausted = _fail_exhausted_jobs(stale, now)
+
+        job = VerificationJob.objects.select_for_update(skip_locked=True).filter(
+            Q(status='queued') |
+            Q(status='running', started_at__lt=stale, attempts__lt=settings.VERIFICATION_JOB_MAX_ATTEMPTS)
+        ).order_by('created_at').first()
+
+        if job is not None:
+            job.status = 'running'
+            job.started_at = now
+            job.attempts = F('attempts') + 1
+            job.save(update_fields=['status', 'started_at', 'attempts'])
+
+    for failed in exhausted:
+        if failed.callback_url:
+            notify_job_callback(failed)
+
+    if job is None:
+        return None
+
+    job.refresh_from_db(fields=['attempts'])
+    return job
+
+
+def run_verification_job(job):
+    """
+    Run a claimed job and record its outcome.
+
+    Failed attempts are requeued until VERIFICATION_JOB_MAX_ATTEMPTS is
+    reached. The job's callback_url is notified once it completes or fails.
+
+    Args:
+        job (VerificationJob): A job claimed with claim_next_job
+
+    Returns:
+        VerificationJob: The updated job
+    """
+    try:
+        merchant = Merchant.objects.get(pk=job.merchant_id)
+        result = perform_merchant_verification(merchant, job.request_data, job.requested_by)
+        # Normalize numpy and Decimal values the way API responses do
+        job.result = json.loads(json.dumps(result, cls=encoders.JSONEncoder))
+        job.status = 'completed'
+        job.error = None
+    except VerificationRequestInvalid as e:
+        job.status = 'failed'
+        job.error = json.dumps(e.errors)
+    except Exception as e:
+        logger.error(f"Error running verification job {job.pk}: {str(e)}")
+        job.error = str(e)
+        job.status = 'failed' if job.attempts >= settings.VERIFICATION_JOB_MAX_ATTEMPTS else 'queued'
+
+    job.completed_at = timezone.now() if job.status != 'queued' else None
+    job.save(update_fields=['status', 'result', 'error', 'completed_at'])
+
+    if job.status != 'queued' and job.callback_url:
+        notify_job_callback(job)
+
+    return job
+
+
+def job_callback_payload(job):
+    """Build the body POSTed to a job's callback_url"""
+    return {
+        'job_id': job.pk,
+        'merchant_id': job.merchant_id,
+        'status': job.status,
+        'result': job.result,
+        'error': job.error,
+        'completed_at': job.completed_at.isoformat() if job.completed_at else None,
+    }
+
+
+def notify_job_callback(job):
+    """
+    POST a finished job to its callback URL.
+
+    The body is signed with an HMAC-SHA256 in the X-EMVS-Signature header when
+    VERIFICATION_JOB_WEBHOOK_SECRET is set. The URL is checked again before
+    sending (see webhooks.check_callback_url). Delivery is best effort;
+    clients can always fall back to polling the job.
+
+    Args:
+        job (VerificationJob): The finished job
+
+    Returns:
+        bool: Whether the callback was accepted
+    """
+    body = json.dumps(job_callback_payload(job)).encode('utf-8')
+    headers = {'Content-Type': 'application/json'}
+
+    secret = settings.VERIFICATION_JOB_WEBHOOK_SECRET
+    if secret:
+        headers['X-EMVS-Signature'] = hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+
+    try:
+        post_webhook(job.callback_url, body, headers, API_TIMEOUT)
+        return True
+    except (UnsafeCallbackURL, requests.RequestException) as e:
+        logger.warning(f"Callback for verification job {job.pk} failed: {str(e)}")
+        return False
+
+
+def run_worker(poll_interval=1.0, max_jobs=None):
+    """
+    Claim and run jobs until interrupted.
+
+    Args:
+        poll_interval (float): Seconds to sleep when the queue is empty
+        max_jobs (int): Stop after this many jobs or once the queue is empty;
+            with None, run forever
+
+    Returns:
+        int: Number of jobs run
+    """
+    processed = 0
+    while max_jobs is None or processed < max_jobs:
+        job = claim_next_job()
+        if job is None:
+            if max_jobs is not None:
+                break
+            time.sleep(poll_interval)
+            continue
+
+        run_verification_job(job)
+        processed += 1
+
+    return processed
@@ -0,0 +1,230 @@
+"""
+Precomputed verification snapshots.
+This module keeps the external check, risk assessment and transaction analysis
+shown on a merchant's verification page in a stored snapshot. Snapshots are
+marked stale when their inputs change and refreshed in the background, so the
+page renders without running the checks on every request.
+"""
+
+import json
+import time
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, F
+from django.utils import timezone
+from rest_framework.utils import encoders
+
+from ..models import Merchant, VerificationSnapshot
+from ..ml_models.risk_assessment import assess_merchant_risk
+from ..ml_models.transaction_analysis import analyze_transaction_patterns
+from .coalescing import coalesce
+from .external_api import verify_merchant_external
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _json_safe(data):
+    # Normalize numpy and Decimal values so they fit in a JSONField
+    return json.loads(json.dumps(data, cls=encoders.JSONEncoder))
+
+
+def mark_snapshot_stale(merchant_id):
+    """
+    Mark a merchant's snapshot as needing a refresh.
+
+    Args:
+        merchant_id (int): ID of the merchant whose inputs changed
+    """
+    VerificationSnapshot.objects.filter(merchant_id=merchant_id).update(
+        is_stale=True,
+        input_version=F('input_version') + 1
+    )
+
+
+def mark_snapshots_stale(merchant_ids):
+    """
+    Mark the snapshots of many merchants as needing a refresh.
+
+    Args:
+        merchant_ids (list): IDs of the merchants whose inputs changed
+    """
+    VerificationSnapshot.objects.filter(merchant_id__in=merchant_ids).update(
+        is_stale=True,
+        input_version=F('input_version') + 1
+    )
+
+
+def snapshot_needs_refresh(snapshot):
+    """
+    Check whether a snapshot is stale or older than VERIFICATION_SNAPSHOT_MAX_AGE.
+
+    Args:
+        snapshot (VerificationSnapshot): The snapshot to check
+
+    Returns:
+        bool: Whether the snapshot should be recomputed
+    """
+    if snapshot.is_stale or snapshot.computed_at is None:
+        return True
+    age = timezone.now() - snapshot.computed_at
+    return age.total_seconds() > settings.VERIFICATION_SNAPSHOT_MAX_AGE
+
+
+def compute_verification_snapshot(merchant):
+    """
+    Run the verification checks for a merchant and store the results.
+
+    Args:
+        merchant (Merchant): The merchant to check
+
+    Returns:
+        VerificationSnapshot: The refreshed snapshot
+    """
+    snapshot, _ = VerificationSnapshot.objects.get_or_create(merchant=merchant)
+    input_version = snapshot.input_version
+
+    external_data = coalesce('external', merchant, verify_merchant_external)
+    risk_data = assess_merchant_risk(merchant)
+    transaction_data = coalesce('transactions', merchant, analyze_transaction_patterns)
+
+    snapshot.risk_data = _json_safe(risk_data)
+    snapshot.external_data = _json_safe(external_data)
+    snapshot.transaction_data = _json_safe(transaction_data)
+    snapshot.computed_at = timezone.now()
+    snapshot.refresh_started_at = None
+
+    values = {
+        'risk_data': snapshot.risk_data,
+        'external_data': snapshot.external_data,
+        'transaction_data': snapshot.transaction_data,
+        'computed_at': snapshot.computed_at,
+        'refresh_started_at': None,
+    }
+
+    # Only a snapshot whose inputs did not change while it ran is fresh
+    fresh = VerificationSnapshot.objects.filter(
+        pk=snapshot.pk, input_version=input_version
+    ).update(is_stale=False, **values)
+    if not fresh:
+        VerificationSnapshot.objects.filter(pk=snapshot.pk).update(**values)
+    snapshot.is_stale = not fresh
+
+    return snapshot
+
+
+def get_verification_snapshot(merchant):
+    """
+    Get a merchant's snapshot, computing it inline only if it never ran.
+
+    Args:
+        merchant (Merchant): The merchant being verified
+
+    Returns:
+        VerificationSnapshot: The stored snapshot, possibly stale
+    """
+    snapshot = VerificationSnapshot.objects.filter(merchant=merchant).first()
+    if snapshot is None or snapshot.computed_at is None:
+        snapshot = compute_verification_snapshot(merchant)
+    return snapshot
+
+
+def stale_snapshots():
+    """
+    Get the snapshots due for a background refresh.
+
+    Returns:
+        QuerySet: Stale or expired snapshots not already being refreshed
+    """
+    now = timezone.now()
+    expired = now - timezone.timedelta(seconds=settings.VERIFICATION_SNAPSHOT_MAX_AGE)
+    abandoned = now - timezone.timedelta(seconds=settings.VERIFICATION_JOB_TIMEOUT)
+
+    return VerificationSnapshot.objects.filter(
+        Q(is_stale=True) | Q(computed_at__lt=expired)
+    ).filter(
+        Q(refresh_started_at__isnull=True) | Q(refresh_started_at__lt=abandoned)
+    )
+
+
+def claim_stale_snapshots(batch_size):
+    """
+    Claim a batch of snapshots for this refresher.
+
+    Merchants without a snapshot, such as bulk imports, get one first. Rows
+    locked by other refreshers are skipped.
+
+    Args:
+        batch_size (int): Maximum number of snapshots to claim
+
+    Returns:
+        list: IDs of the merchants whose snapshots were claimed
+    """
+    missing = Merchant.objects.filter(verification_snapshot__isnull=True).values_list('id', flat=True)[:batch_size]
+    VerificationSnapshot.objects.bulk_create(
+        [VerificationSnapshot(merchant_id=merchant_id) for merchant_id in missing],
+        ignore_conflicts=True
+    )
+
+    with transaction.atomic():
+        claimed = list(stale_snapshots().select_for_update(skip_locked=True).order_by(
+            F('computed_at').asc(nulls_first=True)
+        ).values_list('id', 'merchant_id')[:batch_size])
+
+        VerificationSnapshot.objects.filter(id__in=[pk for pk, _ in claimed]).update(
+            refresh_started_at=timezone.now()
+        )
+
+    return [merchant_id for _, merchant_id in claimed]
+
+
+def refresh_stale_snapshots(batch_size=50):
+    """
+    Refresh one batch of stale, expired or missing snapshots.
+
+    Args:
+        batch_size (int): Maximum number of snapshots to refresh
+
+    Returns:
+        int: Number of snapshots refreshed
+    """
+    merchant_ids = claim_stale_snapshots(batch_size)
+    refreshed = 0
+
+    for merchant in Merchant.objects.filter(id__in=merchant_ids):
+        try:
+            compute_verification_snapshot(merchant)
+            refreshed += 1
+        except Exception as e:
+            # Released for another attempt once VERIFICATION_JOB_TIMEOUT passes
+            logger.error(f"Error refreshing verification snapshot for merchant {merchant.pk}: {str(e)}")
+
+    return refreshed
+
+
+def run_snapshot_refresher(poll_interval=5.0, batch_size=50, once=False):
+    """
+    Refresh snapshots until interrupted.
+
+    Args:
+        poll_interval (float): Seconds to sleep when nothing needs a refresh
+        batch_size (int): Snapshots claimed per batch
+        once (bool): Stop once nothing needs a refresh
+
+    Returns:
+        int: Number of snapshots refreshed
+    """
+    total = 0
+    while True:
+        refreshed = refresh_stale_snapshots(batch_size)
+        total += refreshed
+        if refreshed:
+            continue
+        if once:
+            break
+        time.sleep(poll_interval)
+
+    return total
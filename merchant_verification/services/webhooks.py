@@ -0,0 +1,129 @@
+"""
+Outgoing webhooks to client-supplied URLs.
+Callback URLs come from API callers, so notifications are sent through a plain
+session that carries none of the provider credentials, only over HTTPS, and
+only to hosts on the public internet or listed in WEBHOOK_ALLOWED_HOSTS.
+"""
+
+import socket
+import ipaddress
+import threading
+import logging
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from django.http.request import validate_host
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class UnsafeCallbackURL(ValueError):
+    """Raised when a callback URL may not be notified"""
+
+
+def _check_address(address):
+    ip = ipaddress.ip_address(address.split('%', 1)[0])
+    if not ip.is_global:
+        raise UnsafeCallbackURL(f"Callback host resolves to a non-public address ({ip})")
+
+
+def check_callback_url(url, resolve=False):
+    """
+    Check that a callback URL points at an HTTPS endpoint we may notify.
+
+    Hosts in WEBHOOK_ALLOWED_HOSTS (Django ALLOWED_HOSTS patterns, e.g.
+    '.partner.com') are trusted as configured. When the list is empty, any
+    host is accepted unless it is, or resolves to, a loopback, private,
+    link-local or otherwise non-public address.
+
+    Args:
+        url (str): The callback URL
+        resolve (bool): Also resolve the host name and check its addresses;
+            done before each delivery, as DNS may have changed since the URL
+            was accepted
+
+    Raises:
+        UnsafeCallbackURL: If the URL may not be notified
+    """
+    parts = urlsplit(url)
+    if parts.scheme != 'https':
+        raise UnsafeCallbackURL("Callback URLs must use https")
+
+    host = (parts.hostname or '').rstrip('.').lower()
+    if not host:
+        raise UnsafeCallbackURL("Callback URL has no host")
+
+    allowed_hosts = settings.WEBHOOK_ALLOWED_HOSTS
+    if allowed_hosts:
+        if not validate_host(host, allowed_hosts):
+            raise UnsafeCallbackURL(f"Callback host {host} is not allowed")
+        return
+
+    if host == 'localhost' or host.endswith('.localhost'):
+        raise UnsafeCallbackURL("Callback URLs may not point at localhost")
+
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        pass
+    else:
+        _check_address(host)
+        return
+
+    if resolve:
+        try:
+            addresses = socket.getaddrinfo(host, parts.port or 443, proto=socket.IPPROTO_TCP)
+        except socket.gaierror as e:
+            raise UnsafeCallbackURL(f"Could not resolve callback host {host}: {e}")
+        for *_, sockaddr in addresses:
+            _check_address(sockaddr[0])
+
+
+def get_webhook_session():
+    """
+    Get the session used for outgoing webhooks.
+
+    Unlike external_api.get_session, it sends no provider credentials.
+
+    Returns:
+        requests.Session: The shared webhook session
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+    return _session
+
+
+def post_webhook(url, body, headers, timeout):
+    """
+    POST a notification to a client-supplied callback URL.
+
+    Redirects are not followed, so a callback cannot be bounced to a host
+    that was never checked.
+
+    Args:
+        url (str): The callback URL
+        body (bytes): Request body
+        headers (dict): Request headers
+        timeout (float): Request timeout in seconds
+
+    Returns:
+        requests.Response: The callback's response
+
+    Raises:
+        UnsafeCallbackURL: If the URL may not be notified
+        requests.RequestException: If the request fails, is rejected or redirected
+    """
+    check_callback_url(url, resolve=True)
+    response = get_webhook_session().post(url, data=body, headers=headers, timeout=timeout, allow_redirects=False)
+    response.raise_for_status()
+    if response.is_redirect:
+        raise requests.HTTPError(f"Callback redirected to {response.headers.get('Location')}", response=response)
+    return response
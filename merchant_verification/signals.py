@@ -0,0 +1,194 @@
+"""
+Signal handlers for the merchant verification app.
+"""
+
+from collections import Counter
+
+from django.conf import settings
+from django.db.models.signals import post_init, pre_save, post_save, post_delete
+
+from .models import Merchant, TransactionPattern, VerificationFlag, VerificationReport
+from .services.data_version import bump_data_version
+from .services.dashboard import merchant_counter_keys, apply_counter_deltas
+from .services.verification_snapshots import mark_snapshot_stale
+from .services.review_queue import update_flag_priority, adjust_priorities_for_risk_score
+from .services.merchant_aggregates import (
+    adjust_open_flag_counts,
+    recount_open_flags,
+    point_to_latest_pattern,
+    repoint_latest_pattern
+)
+
+# Models whose changes invalidate cached API responses
+VERSIONED_MODELS = (Merchant, TransactionPattern, VerificationFlag, VerificationReport)
+
+
+def mark_data_changed(sender, **kwargs):
+    """Bump the global data version when a versioned model is written"""
+    if not kwargs.get('raw'):
+        bump_data_version()
+
+
+for model in VERSIONED_MODELS:
+    post_save.connect(mark_data_changed, sender=model, dispatch_uid=f'data_version_save_{model.__name__}')
+    post_delete.connect(mark_data_changed, sender=model, dispatch_uid=f'data_version_delete_{model.__name__}')
+
+
+# Dashboard counters are maintained from the values an instance was loaded
+# with, so a save only touches the counters whose dimension changed. Writes
+# that bypass save() (queryset.update, bulk_update) must adjust the counters
+# themselves or be followed by rebuild_dashboard_counters. Instances loaded
+# with the counted fields deferred, or while the counters are disabled, are
+# not tracked.
+
+def _merchant_keys(merchant):
+    values = merchant.__dict__
+    if not all(field in values for field in ('status', 'risk_level', 'business_type')):
+        return None
+    return merchant_counter_keys(values['status'], values['risk_level'], values['business_type'])
+
+
+def _flag_keys(flag):
+    if 'status' not in flag.__dict__:
+        return None
+    return ['open_flags'] if flag.status in VerificationFlag.OPEN_STATUSES else []
+
+
+COUNTER_KEYS = {Merchant: _merchant_keys, VerificationFlag: _flag_keys}
+
+
+def remember_counter_keys(sender, instance, **kwargs):
+    # Runs for every loaded row, so it costs nothing while counters are off
+    if settings.DASHBOARD_COUNTERS_ENABLED:
+        instance._counter_keys = COUNTER_KEYS[sender](instance)
+
+
+def update_counters_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw or not settings.DASHBOARD_COUNTERS_ENABLED:
+        return
+
+    new_keys = COUNTER_KEYS[sender](instance)
+    loaded_keys = getattr(instance, '_counter_keys', None)
+    if new_keys is None or (not created and loaded_keys is None):
+        return
+
+    deltas = Counter(new_keys)
+    if not created:
+        deltas.subtract(loaded_keys)
+
+    apply_counter_deltas(deltas)
+    instance._counter_keys = new_keys
+
+
+def update_counters_on_delete(sender, instance, **kwargs):
+    if not settings.DASHBOARD_COUNTERS_ENABLED or getattr(instance, '_counter_keys', None) is None:
+        return
+
+    apply_counter_deltas({key: -1 for key in instance._counter_keys})
+
+
+for model in COUNTER_KEYS:
+    post_init.connect(remember_counter_keys, sender=model, dispatch_uid=f'counters_init_{model.__name__}')
+    post_save.connect(update_counters_on_save, sender=model, dispatch_uid=f'counters_save_{model.__name__}')
+    post_delete.connect(update_counters_on_delete, sender=model, dispatch_uid=f'counters_delete_{model.__name__}')
+
+
+# Verification snapshots are recomputed in the background once the merchant
+# or its transaction patterns change
+
+def mark_merchant_snapshot_stale(sender, instance, created=False, raw=False, **kwargs):
+    if raw or (sender is Merchant and created):
+        return
+    mark_snapshot_stale(instance.pk if sender is Merchant else instance.merchant_id)
+
+
+for model in (Merchant, TransactionPattern):
+    post_save.connect(mark_merchant_snapshot_stale, sender=model, dispatch_uid=f'snapshot_save_{model.__name__}')
+post_delete.connect(mark_merchant_snapshot_stale, sender=TransactionPattern, dispatch_uid='snapshot_delete_TransactionPattern')
+
+
+# Review queue priorities are computed when a flag is saved and shifted when
+# its merchant's risk score changes. As with the counters, writes that bypass
+# save() must keep them up to date themselves.
+
+_UNTRACKED = object()
+
+
+def set_flag_priority(sender, instance, raw=False, **kwargs):
+    if not raw:
+        update_flag_priority(instance)
+
+
+def remember_risk_score(sender, instance, **kwargs):
+    instance._loaded_risk_score = instance.__dict__.get('risk_score', _UNTRACKED)
+
+
+def reprioritize_flags(sender, instance, created, raw=False, **kwargs):
+    loaded = instance._loaded_risk_score
+    current = instance._loaded_risk_score = instance.__dict__.get('risk_score', _UNTRACKED)
+    if raw or created or _UNTRACKED in (loaded, current) or loaded == current:
+        return
+    adjust_priorities_for_risk_score(instance.pk, loaded, current)
+
+
+pre_save.connect(set_flag_priority, sender=VerificationFlag, dispatch_uid='review_queue_flag_priority')
+post_init.connect(remember_risk_score, sender=Merchant, dispatch_uid='review_queue_risk_score_init')
+post_save.connect(reprioritize_flags, sender=Merchant, dispatch_uid='review_queue_risk_score_save')
+
+
+# Merchant.open_flag_count follows the merchant and status a flag was loaded
+# with, like the dashboard counters; latest_transaction_pattern follows
+# pattern saves and deletes. Writes that bypass save() must adjust them or be
+# followed by repair_merchant_aggregates.
+
+def _open_flag_merchant(flag):
+    values = flag.__dict__
+    if 'status' not in values or 'merchant_id' not in values:
+        return _UNTRACKED
+    return values['merchant_id'] if values['status'] in VerificationFlag.OPEN_STATUSES else None
+
+
+def remember_open_flag_merchant(sender, instance, **kwargs):
+    instance._open_flag_merchant = _open_flag_merchant(instance)
+
+
+def update_open_flag_count_on_save(sender, instance, created, raw=False, **kwargs):
+    loaded = None if created else instance._open_flag_merchant
+    current = instance._open_flag_merchant = _open_flag_merchant(instance)
+    if raw or loaded == current:
+        return
+
+    if _UNTRACKED in (loaded, current):
+        recount_open_flags(instance.merchant_id)
+        return
+
+    deltas = Counter()
+    if loaded is not None:
+        deltas[loaded] -= 1
+    if current is not None:
+        deltas[current] += 1
+    adjust_open_flag_counts(deltas)
+
+
+def update_open_flag_count_on_delete(sender, instance, **kwargs):
+    loaded = instance._open_flag_merchant
+    if loaded is _UNTRACKED:
+        recount_open_flags(instance.merchant_id)
+    elif loaded is not None:
+        adjust_open_flag_counts({loaded: -1})
+
+
+def update_latest_pattern_on_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        point_to_latest_pattern(instance)
+
+
+def update_latest_pattern_on_delete(sender, instance, **kwargs):
+    repoint_latest_pattern(instance.merchant_id)
+
+
+post_init.connect(remember_open_flag_merchant, sender=VerificationFlag, dispatch_uid='aggregates_flag_init')
+post_save.connect(update_open_flag_count_on_save, sender=VerificationFlag, dispatch_uid='aggregates_flag_save')
+post_delete.connect(update_open_flag_count_on_delete, sender=VerificationFlag, dispatch_uid='aggregates_flag_delete')
+post_save.connect(update_latest_pattern_on_save, sender=TransactionPattern, dispatch_uid='aggregates_pattern_save')
+post_delete.connect(update_latest_pattern_on_delete, sender=TransactionPattern, dispatch_uid='aggregates_pattern_delete')
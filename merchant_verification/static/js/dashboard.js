@@ -202,14 +202,65 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
     
-    // Update the dashboard data periodically (every 30 seconds)
+    // Keep the dashboard counts live
     if (document.querySelector('.dashboard-container')) {
-        setInterval(function() {
-            updateDashboardStats();
-        }, 30000);
+        subscribeToDashboardStats();
     }
 });
 
+// Count displays updated from the dashboard statistics
+const DASHBOARD_COUNT_ELEMENTS = {
+    total_merchants: 'totalMerchantsCount',
+    verified_merchants: 'verifiedMerchantsCount',
+    flagged_merchants: 'flaggedMerchantsCount',
+    pending_merchants: 'pendingMerchantsCount',
+    high_risk_merchants: 'highRiskMerchantsCount',
+    open_flags: 'openFlagsCount'
+};
+
+/**
+ * Updates the count displays present in a full or partial set of statistics
+ */
+function applyDashboardStats(data) {
+    Object.entries(DASHBOARD_COUNT_ELEMENTS).forEach(([key, elementId]) => {
+        const element = document.getElementById(elementId);
+        if (element && key in data) {
+            element.textContent = data[key];
+        }
+    });
+}
+
+/**
+ * Receives dashboard statistics as they change over server-sent events,
+ * falling back to polling when the stream is unavailable
+ */
+function subscribeToDashboardStats() {
+    if (!window.EventSource) {
+        startDashboardPolling();
+        return;
+    }
+    
+    const source = new EventSource('/api/dashboard/stream/');
+    const handleEvent = event => applyDashboardStats(JSON.parse(event.data));
+    source.addEventListener('stats', handleEvent);
+    source.addEventListener('delta', handleEvent);
+    source.onerror = function() {
+        // EventSource reconnects by itself unless the server refused the stream
+        if (source.readyState === EventSource.CLOSED) {
+            startDashboardPolling();
+        }
+    };
+}
+
+/**
+ * Polls the dashboard statistics every 30 seconds
+ */
+function startDashboardPolling() {
+    setInterval(function() {
+        updateDashboardStats();
+    }, 30000);
+}
+
 /**
  * Fetches updated dashboard statistics from the API
  */
@@ -223,12 +274,7 @@ function updateDashboardStats() {
         })
         .then(data => {
             // Update the count displays
-            document.getElementById('totalMerchantsCount').textContent = data.total_merchants;
-            document.getElementById('verifiedMerchantsCount').textContent = data.verified_merchants;
-            document.getElementById('flaggedMerchantsCount').textContent = data.flagged_merchants;
-            document.getElementById('pendingMerchantsCount').textContent = data.pending_merchants;
-            document.getElementById('highRiskMerchantsCount').textContent = data.high_risk_merchants;
-            document.getElementById('openFlagsCount').textContent = data.open_flags;
+            applyDashboardStats(data);
         })
         .catch(error => {
             console.error('Error updating dashboard stats:', error);
@@ -224,16 +224,22 @@ function initRiskGauges() {
     });
 }
 
+// Aborts the previous typeahead request when a newer query is sent
+let searchController = null;
+
 /**
- * Perform merchant search using API
+ * Perform merchant search using the typeahead API
  */
 function performSearch(query) {
     const resultsContainer = document.getElementById('searchResults');
     if (!resultsContainer) return;
     
-    resultsContainer.innerHTML = '<div class="text-center"><i class="fas fa-spinner fa-spin"></i> Searching...</div>';
+    if (searchController) {
+        searchController.abort();
+    }
+    searchController = new AbortController();
     
-    fetch(`/api/merchants/?name=${encodeURIComponent(query)}`)
+    fetch(`/api/merchants/typeahead/?q=${encodeURIComponent(query)}`, {signal: searchController.signal})
         .then(response => {
             if (!response.ok) {
                 throw new Error('Search request failed');
@@ -241,9 +247,10 @@ function performSearch(query) {
             return response.json();
         })
         .then(data => {
-            displaySearchResults(data, resultsContainer);
+            displaySearchResults(data.results, resultsContainer);
         })
         .catch(error => {
+            if (error.name === 'AbortError') return;
             console.error('Error performing search:', error);
             resultsContainer.innerHTML = '<div class="alert alert-danger">Error performing search. Please try again.</div>';
         });
@@ -273,14 +280,12 @@ function displaySearchResults(data, container) {
             statusBadgeClass = 'bg-info';
         }
         
+        const statusLabel = merchant.status.charAt(0).toUpperCase() + merchant.status.slice(1);
+        
         html += `
-            <a href="/merchants/${merchant.id}/" class="list-group-item list-group-item-action">
-                <div class="d-flex w-100 justify-content-between">
-                    <h5 class="mb-1">${merchant.name}</h5>
-                    <span class="badge ${statusBadgeClass}">${merchant.status_display}</span>
-                </div>
-                <p class="mb-1">${merchant.business_type_display} - ${merchant.country || 'Unknown Location'}</p>
-                <small>Registration: ${merchant.registration_number}</small>
+            <a href="/merchants/${merchant.id}/" class="list-group-item list-group-item-action d-flex justify-content-between align-items-center">
+                <span>${escapeHtml(merchant.name)}</span>
+                <span class="badge ${statusBadgeClass}">${statusLabel}</span>
             </a>
         `;
     });
@@ -535,3 +540,12 @@ function getCsrfToken() {
     }
     return cookieValue;
 }
+
+/**
+ * Escape text for insertion into HTML
+ */
+function escapeHtml(text) {
+    const div = document.createElement('div');
+    div.textContent = text;
+    return div.innerHTML;
+}
@@ -20,9 +20,12 @@ urlpatterns = [
     path('merchants/<int:merchant_id>/', views.merchant_detail, name='merchant_detail'),
     path('merchants/<int:merchant_id>/edit/', views.edit_merchant, name='edit_merchant'),
     path('merchants/<int:merchant_id>/verify/', views.verify_merchant, name='verify_merchant'),
+    path('merchants/<int:merchant_id>/verify/refresh/', views.refresh_verification_snapshot, name='refresh_verification_snapshot'),
     
     # Flags
     path('flags/', views.flagged_merchants, name='flagged_merchants'),
+    path('flags/claim-next/', views.claim_next_flag, name='claim_next_flag'),
+    path('flags/bulk-resolve/', views.bulk_resolve_flags_view, name='bulk_resolve_flags'),
     path('merchants/<int:merchant_id>/flag/', views.flag_merchant, name='flag_merchant'),
     path('flags/<int:flag_id>/resolve/', views.resolve_flag, name='resolve_flag'),
     
@@ -5,28 +5,37 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse, HttpResponse
-from django.db.models import Count, Q, Avg, Sum, F
+from django.conf import settings
+from django.db.models import Q, Avg, Sum, F, Func, OuterRef, Subquery, IntegerField, Prefetch, prefetch_related_objects
 from django.views.decorators.http import require_POST
-from django.core.paginator import Paginator
+from django.core.paginator import Paginator, Page
 
 from .models import (
     Merchant, 
-    TransactionPattern, 
     VerificationFlag, 
     VerificationReport,
     AuditLog
 )
+from .pagination import ApproximatePaginator
 from .forms import (
     MerchantForm, 
     MerchantVerificationForm, 
     FlagMerchantForm,
     ResolveFlagForm,
+    BulkResolveFlagsForm,
     VerificationReportForm,
     MerchantFilterForm
 )
 from .ml_models.risk_assessment import assess_merchant_risk
-from .ml_models.transaction_analysis import analyze_transaction_patterns
-from .services.external_api import verify_merchant_external
+from .services.dashboard import get_dashboard_stats
+from .services.search import search_merchants
+from .services.review_queue import review_queue, claim_flags
+from .services.flag_resolution import bulk_resolve_flags
+from .services.verification_snapshots import (
+    get_verification_snapshot,
+    compute_verification_snapshot,
+    snapshot_needs_refresh
+)
 
 
 def get_client_ip(request):
@@ -53,19 +62,8 @@ def create_audit_log(request, merchant, action, details=None):
 @login_required
 def dashboard(request):
     """Dashboard view with verification statistics and charts"""
-    # Statistics for dashboard
-    total_merchants = Merchant.objects.count()
-    verified_merchants = Merchant.objects.filter(status='verified').count()
-    flagged_merchants = Merchant.objects.filter(status='flagged').count()
-    pending_merchants = Merchant.objects.filter(status='pending').count()
-    rejected_merchants = Merchant.objects.filter(status='rejected').count()
-    
-    # Get merchants by risk level
-    risk_levels = Merchant.objects.filter(
-        risk_level__isnull=False
-    ).values('risk_level').annotate(
-        count=Count('id')
-    ).order_by('risk_level')
+    # Statistics for dashboard, shared with the stats API
+    stats = get_dashboard_stats()
     
     # Recent merchants
     recent_merchants = Merchant.objects.all().order_by('-created_at')[:5]
@@ -73,23 +71,18 @@ def dashboard(request):
     # Recent verification flags
     recent_flags = VerificationFlag.objects.filter(
         status='open'
-    ).order_by('-created_at')[:5]
-    
-    # Business type distribution
-    business_types = Merchant.objects.values('business_type').annotate(
-        count=Count('id')
-    ).order_by('business_type')
+    ).select_related('merchant').order_by('-created_at')[:5]
     
     context = {
-        'total_merchants': total_merchants,
-        'verified_merchants': verified_merchants,
-        'flagged_merchants': flagged_merchants,
-        'pending_merchants': pending_merchants,
-        'rejected_merchants': rejected_merchants,
-        'risk_levels': list(risk_levels),
+        'total_merchants': stats['total_merchants'],
+        'verified_merchants': stats['verified_merchants'],
+        'flagged_merchants': stats['flagged_merchants'],
+        'pending_merchants': stats['pending_merchants'],
+        'rejected_merchants': stats['rejected_merchants'],
+        'risk_levels': stats['risk_levels'],
         'recent_merchants': recent_merchants,
         'recent_flags': recent_flags,
-        'business_types': list(business_types),
+        'business_types': stats['business_types'],
     }
     
     return render(request, 'dashboard.html', context)
@@ -127,7 +120,7 @@ def merchant_list(request):
             merchants = merchants.filter(created_at__lte=data['date_to'])
     
     # Pagination
-    paginator = Paginator(merchants.order_by('-created_at'), 10)
+    paginator = ApproximatePaginator(merchants.order_by('-created_at'), 10)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
@@ -142,34 +135,80 @@ def merchant_list(request):
 @login_required
 def merchant_detail(request, merchant_id):
     """Display detailed information about a merchant"""
-    merchant = get_object_or_404(Merchant, id=merchant_id)
-    
-    # Get the transaction pattern if it exists
-    try:
-        transaction_pattern = merchant.transaction_patterns.latest('analysis_date')
-    except TransactionPattern.DoesNotExist:
-        transaction_pattern = None
-    
-    # Get all verification flags
-    flags = merchant.verification_flags.all().order_by('-created_at')
-    
-    # Get all verification reports
-    reports = merchant.verification_reports.all().order_by('-report_date')
+    # The section totals ride along with the merchant as scalar subqueries
+    merchant = get_object_or_404(
+        Merchant.objects.select_related('created_by', 'verified_by', 'latest_transaction_pattern').annotate(
+            flag_total=_related_count(VerificationFlag),
+            report_total=_related_count(VerificationReport),
+            audit_log_total=_related_count(AuditLog),
+        ),
+        id=merchant_id
+    )
     
-    # Get audit logs
-    audit_logs = merchant.audit_logs.all().order_by('-timestamp')[:10]
+    flags_page = _section_page(request, 'flags_page', merchant.flag_total)
+    reports_page = _section_page(request, 'reports_page', merchant.report_total)
+    audit_logs_page = _section_page(request, 'audit_page', merchant.audit_log_total)
+    
+    # One query per section, however many rows the merchant has
+    prefetch_related_objects(
+        [merchant],
+        Prefetch(
+            'verification_flags',
+            queryset=_page_slice(
+                VerificationFlag.objects.select_related('created_by', 'resolved_by').order_by('-created_at'),
+                flags_page
+            ),
+            to_attr='flags_page_rows'
+        ),
+        Prefetch(
+            'verification_reports',
+            queryset=_page_slice(
+                VerificationReport.objects.select_related('generated_by').order_by('-report_date'),
+                reports_page
+            ),
+            to_attr='reports_page_rows'
+        ),
+        Prefetch(
+            'audit_logs',
+            queryset=_page_slice(
+                AuditLog.objects.select_related('user').order_by('-timestamp'),
+                audit_logs_page
+            ),
+            to_attr='audit_logs_page_rows'
+        ),
+    )
     
     context = {
         'merchant': merchant,
-        'transaction_pattern': transaction_pattern,
-        'flags': flags,
-        'reports': reports,
-        'audit_logs': audit_logs,
+        'transaction_pattern': merchant.latest_transaction_pattern,
+        'flags': Page(merchant.flags_page_rows, flags_page.number, flags_page.paginator),
+        'reports': Page(merchant.reports_page_rows, reports_page.number, reports_page.paginator),
+        'audit_logs': Page(merchant.audit_logs_page_rows, audit_logs_page.number, audit_logs_page.paginator),
     }
     
     return render(request, 'merchant_detail.html', context)
 
 
+def _related_count(model):
+    """Scalar subquery counting a merchant's rows in a related table"""
+    count = model.objects.filter(merchant=OuterRef('pk')).order_by().annotate(
+        count=Func(F('id'), function='COUNT')
+    ).values('count')
+    return Subquery(count, output_field=IntegerField())
+
+
+def _section_page(request, param, total):
+    """Get the requested page of a merchant detail section from its total"""
+    paginator = Paginator(range(total), settings.MERCHANT_DETAIL_PAGE_SIZE)
+    return paginator.get_page(request.GET.get(param))
+
+
+def _page_slice(queryset, page):
+    """Limit a queryset to the rows of a page"""
+    offset = (page.number - 1) * page.paginator.per_page
+    return queryset[offset:offset + page.paginator.per_page]
+
+
 @login_required
 def add_merchant(request):
     """Add a new merchant to the system"""
@@ -243,15 +282,16 @@ def verify_merchant(request, merchant_id):
             messages.success(request, f"Merchant '{merchant.name}' has been verified successfully.")
             return redirect('merchant_detail', merchant_id=merchant.id)
     else:
-        # Get data from external API for verification
-        external_data = verify_merchant_external(merchant)
-        
-        # Get risk assessment from ML model
-        risk_data = assess_merchant_risk(merchant)
-        
-        # Analyze transaction patterns if available
-        transaction_data = analyze_transaction_patterns(merchant)
-        
+        form = None
+    
+    # Render the checks from the stored snapshot; the background refresher
+    # recomputes it when the merchant changes or it ages out
+    snapshot = get_verification_snapshot(merchant)
+    risk_data = snapshot.risk_data
+    external_data = snapshot.external_data
+    transaction_data = snapshot.transaction_data
+    
+    if form is None:
         # Pre-populate the form with suggested values
         merchant.risk_level = risk_data['suggested_risk_level']
         merchant.external_api_response = external_data
@@ -263,26 +303,85 @@ def verify_merchant(request, merchant_id):
         'merchant': merchant,
         'risk_data': risk_data,
         'external_data': external_data,
-        'transaction_data': transaction_data
+        'transaction_data': transaction_data,
+        'snapshot': snapshot,
+        'snapshot_refreshing': snapshot_needs_refresh(snapshot),
     }
     
     return render(request, 'verify_merchant.html', context)
 
 
+@login_required
+@require_POST
+def refresh_verification_snapshot(request, merchant_id):
+    """Recompute a merchant's verification checks immediately"""
+    merchant = get_object_or_404(Merchant, id=merchant_id)
+    compute_verification_snapshot(merchant)
+    
+    messages.success(request, f"Verification checks for '{merchant.name}' have been refreshed.")
+    return redirect('verify_merchant', merchant_id=merchant.id)
+
+
 @login_required
 def flagged_merchants(request):
     """Display all merchants that have been flagged for review"""
-    # Get all open flags
-    flags = VerificationFlag.objects.filter(
-        status__in=['open', 'investigating']
-    ).select_related('merchant').order_by('-created_at')
+    # Get all open flags, highest review priority first
+    flags = review_queue().select_related('merchant', 'claimed_by')
     
     # Pagination
-    paginator = Paginator(flags, 10)
+    paginator = ApproximatePaginator(flags, 10)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
-    return render(request, 'flagged_merchants.html', {'page_obj': page_obj})
+    return render(request, 'flagged_merchants.html', {
+        'page_obj': page_obj,
+        'bulk_form': BulkResolveFlagsForm()
+    })
+
+
+@login_required
+@require_POST
+def bulk_resolve_flags_view(request):
+    """Resolve or dismiss the flags selected on the flagged merchants page"""
+    form = BulkResolveFlagsForm(request.POST)
+    flag_ids = [int(value) for value in request.POST.getlist('flag_ids') if value.isdigit()]
+    
+    if not flag_ids:
+        messages.warning(request, "Select at least one flag to resolve.")
+    elif form.is_valid():
+        result = bulk_resolve_flags(
+            flag_ids[:settings.BULK_FLAG_RESOLUTION_MAX_FLAGS],
+            request.user,
+            status=form.cleaned_data['status'],
+            notes=form.cleaned_data['resolution_notes'],
+            ip_address=get_client_ip(request)
+        )
+        messages.success(
+            request,
+            f"{len(result['closed'])} flags {form.cleaned_data['status']}; "
+            f"{len(result['verified_merchants'])} merchants verified."
+        )
+        if result['claimed']:
+            messages.warning(
+                request,
+                f"{len(result['claimed'])} flags were left open because another analyst is reviewing them."
+            )
+    else:
+        messages.error(request, "Invalid resolution status.")
+    
+    return redirect('flagged_merchants')
+
+
+@login_required
+@require_POST
+def claim_next_flag(request):
+    """Claim the highest priority open flag and open it for review"""
+    claimed = claim_flags(request.user)
+    if not claimed:
+        messages.info(request, "There are no open flags waiting for review.")
+        return redirect('flagged_merchants')
+    
+    return redirect('resolve_flag', flag_id=claimed[0].id)
 
 
 @login_required
@@ -337,13 +436,11 @@ def resolve_flag(request, flag_id):
             flag.resolved_at = datetime.now()
             flag.save()
             
-            # Check if there are any more open flags for this merchant
-            open_flags = merchant.verification_flags.filter(
-                status__in=['open', 'investigating']
-            ).exists()
+            # The flag save updated the merchant's open flag count
+            merchant.refresh_from_db(fields=['open_flag_count'])
             
             # If no more open flags, update merchant status to verified
-            if not open_flags and merchant.status == 'flagged':
+            if not merchant.open_flag_count and merchant.status == 'flagged':
                 merchant.status = 'verified'
                 merchant.save()
             
@@ -377,7 +474,7 @@ def reports(request):
     ).order_by('-report_date')
     
     # Pagination
-    paginator = Paginator(reports, 10)
+    paginator = ApproximatePaginator(reports, 10)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
@@ -411,15 +508,15 @@ def generate_report(request, merchant_id):
             }
             
             # Add transaction pattern data if available
-            try:
-                transaction_pattern = merchant.transaction_patterns.latest('analysis_date')
+            transaction_pattern = merchant.latest_transaction_pattern
+            if transaction_pattern is not None:
                 report_data['transaction_pattern'] = {
                     'average_transaction_amount': str(transaction_pattern.average_transaction_amount),
                     'monthly_transaction_volume': transaction_pattern.monthly_transaction_volume,
                     'high_risk_countries_percentage': transaction_pattern.high_risk_countries_percentage,
                     'chargeback_rate': transaction_pattern.chargeback_rate,
                 }
-            except TransactionPattern.DoesNotExist:
+            else:
                 report_data['transaction_pattern'] = None
             
             # Add flags
@@ -513,18 +610,11 @@ def search(request):
     """Search for merchants by name, registration number, or website"""
     query = request.GET.get('q', '')
     
-    if query:
-        merchants = Merchant.objects.filter(
-            Q(name__icontains=query) |
-            Q(registration_number__icontains=query) |
-            Q(website__icontains=query) |
-            Q(email__icontains=query)
-        ).order_by('-created_at')
-    else:
-        merchants = Merchant.objects.none()
+    # Best matches first, served by the search indexes on PostgreSQL
+    merchants = search_merchants(Merchant.objects.all(), query)
     
     # Pagination
-    paginator = Paginator(merchants, 10)
+    paginator = ApproximatePaginator(merchants, 10)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
@@ -1,21 +1,41 @@
 import pytest
 import json
-from django.test import TestCase, Client
+import hmac
+import hashlib
+from decimal import Decimal
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.test import TestCase, Client, AsyncClient, override_settings
 from django.urls import reverse
+from django.core.cache import cache
+from django.db import connection, DatabaseError
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient
 from merchant_verification.models import (
     Merchant,
     TransactionPattern,
     VerificationFlag,
-    VerificationReport
+    VerificationReport,
+    PendingVerification,
+    AuditLog
 )
+from merchant_verification.serializers import MerchantSerializer
+from merchant_verification.api.renderers import FastJSONRenderer, msgpack
+from merchant_verification.services.verification_jobs import run_worker
+from merchant_verification.services.typeahead import merchant_index
+from merchant_verification.api import streams
+from merchant_verification.ml_models.risk_assessment import assess_merchant_risk
 
 
 class APITestCase(TestCase):
     """Test cases for the API endpoints"""
     
     def setUp(self):
+        cache.clear()
+        
         # Create a test user
         self.user = User.objects.create_user(
             username='testuser',
@@ -106,7 +126,7 @@ class APITestCase(TestCase):
         response = self.client.get(reverse('api_merchant_list'))
         
         self.assertEqual(response.status_code, 200)
-        data = response.json()
+        data = response.json()['results']
         
         # Check that we get both merchants
         self.assertEqual(len(data), 2)
@@ -121,9 +141,175 @@ class APITestCase(TestCase):
         # Test filtering
         response = self.client.get(reverse('api_merchant_list') + '?status=flagged')
         self.assertEqual(response.status_code, 200)
-        data = response.json()
+        data = response.json()['results']
         self.assertEqual(len(data), 1)
         self.assertEqual(data[0]['name'], 'Test Merchant 2')
+        
+        # Test search
+        response = self.client.get(reverse('api_merchant_list'), {'q': self.merchant1.registration_number})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['results']
+        self.assertEqual([m['name'] for m in data], ['Test Merchant 1'])
+    
+    @mock.patch.object(merchant_index, 'background', False)
+    def test_merchant_typeahead_api(self):
+        """Test the typeahead endpoint suggests merchants by name and registration number"""
+        merchant_index.clear()
+        url = reverse('api_merchant_typeahead')
+        
+        response = self.client.get(url, {'q': 'merchant 2'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [
+            {'id': self.merchant2.id, 'name': 'Test Merchant 2', 'status': 'flagged'}
+        ])
+        
+        response = self.client.get(url, {'q': self.merchant1.registration_number[:6].lower()})
+        self.assertEqual([m['id'] for m in response.json()['results']], [self.merchant1.id])
+        
+        response = self.client.get(url, {'q': 'test', 'limit': 1})
+        self.assertEqual(len(response.json()['results']), 1)
+        
+        self.assertEqual(self.client.get(url, {'q': 'test', 'limit': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'q': ' - '}).json()['results'], [])
+    
+    def test_dashboard_stream_api(self):
+        """Test the live dashboard stream sends the current stats first"""
+        url = reverse('api_dashboard_stream')
+        
+        # Streams need the ASGI handler
+        self.assertEqual(self.client.get(url).status_code, 501)
+        
+        async def open_stream():
+            client = AsyncClient()
+            unauthenticated = await client.get(url)
+            
+            await client.aforce_login(self.user)
+            response = await client.get(url)
+            chunks = response.streaming_content
+            try:
+                retry = await anext(chunks)
+                event = await anext(chunks)
+            finally:
+                await chunks.aclose()
+                for queue in list(streams.dashboard_broadcaster.subscribers):
+                    streams.dashboard_broadcaster.unsubscribe(queue)
+            return unauthenticated, response, retry, event
+        
+        unauthenticated, response, retry, event = async_to_sync(open_stream)()
+        
+        self.assertEqual(unauthenticated.status_code, 403)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(retry, b'retry: 5000\n\n')
+        
+        name, data = event.decode().strip().split('\n')
+        self.assertEqual(name, 'event: stats')
+        stats = json.loads(data[len('data: '):])
+        self.assertEqual(stats['total_merchants'], 2)
+        self.assertEqual(set(stats), set(streams.dashboard_broadcaster.keys))
+    
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+    
+    def add_merchants_with_flags(self, count):
+        for i in range(count):
+            merchant = Merchant.objects.create(
+                name=f'Extra Merchant {i}',
+                business_type='retail',
+                registration_number=f'EXTRA{i}X99',
+                email=f'extra{i}@test.com',
+                phone='+1234567890',
+                address='789 Extra Street',
+                city='Test City',
+                state='Test State',
+                country='United States',
+                postal_code='12345',
+                created_by=self.user
+            )
+            VerificationFlag.objects.create(
+                merchant=merchant,
+                flag_type='missing_info',
+                description='Missing documents.',
+                severity='low',
+                created_by=self.user
+            )
+    
+    def test_merchant_list_query_count(self):
+        """Test that the merchant list query count does not grow with rows"""
+        url = reverse('api_merchant_list')
+        baseline = self.count_queries(url)
+        
+        self.add_merchants_with_flags(10)
+        self.assertEqual(self.count_queries(url), baseline)
+        
+        # Open flag counts come from the annotation
+        data = self.client.get(url + '?status=flagged').json()['results']
+        self.assertEqual(data[0]['flag_count'], 1)
+    
+    def test_flag_and_report_list_query_count(self):
+        """Test that flag and report list query counts do not grow with rows"""
+        flags_url = reverse('api_merchant_flags', args=[self.merchant2.id])
+        reports_url = reverse('api_merchant_reports', args=[self.merchant1.id])
+        flags_baseline = self.count_queries(flags_url)
+        reports_baseline = self.count_queries(reports_url)
+        
+        for i in range(10):
+            VerificationFlag.objects.create(
+                merchant=self.merchant2,
+                flag_type='other',
+                description=f'Flag {i}',
+                severity='low',
+                created_by=self.user,
+                resolved_by=self.user
+            )
+            VerificationReport.objects.create(
+                merchant=self.merchant1,
+                generated_by=self.user,
+                report_data={},
+                risk_assessment=f'Assessment {i}',
+                recommendations='None'
+            )
+        
+        self.assertEqual(self.count_queries(flags_url), flags_baseline)
+        self.assertEqual(self.count_queries(reports_url), reports_baseline)
+    
+    def test_merchant_list_pagination(self):
+        """Test keyset pagination of the merchant list"""
+        self.add_merchants_with_flags(5)
+        url = reverse('api_merchant_list')
+        expected = list(Merchant.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        
+        seen = []
+        next_url = url + '?page_size=3'
+        while next_url:
+            data = self.client.get(next_url).json()
+            self.assertLessEqual(len(data['results']), 3)
+            seen.extend(m['id'] for m in data['results'])
+            next_url = data['next']
+            
+            # Rows inserted while paging do not shift later pages
+            if len(seen) == 3:
+                Merchant.objects.create(
+                    name='Late Merchant',
+                    business_type='retail',
+                    registration_number='LATE123456',
+                    email='late@test.com',
+                    phone='+1234567890',
+                    address='1 Late Street',
+                    city='Test City',
+                    state='Test State',
+                    country='United States',
+                    postal_code='12345'
+                )
+        
+        self.assertEqual(seen, expected)
+        
+        # Invalid cursors are rejected
+        response = self.client.get(url + '?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
     
     def test_merchant_detail_api(self):
         """Test the merchant detail API endpoint"""
@@ -144,6 +330,69 @@ class APITestCase(TestCase):
         self.assertEqual(len(data['transaction_patterns']), 1)
         self.assertEqual(data['transaction_patterns'][0]['average_transaction_amount'], '125.00')
     
+    def test_fast_json_renderer_matches_stdlib(self):
+        """Test that the fast JSON renderer produces the same bytes as DRF's"""
+        payload = {
+            'merchant': MerchantSerializer(self.merchant1).data,
+            'amount': Decimal('125.00'),
+            'generated_at': timezone.now(),
+            'histogram': {9: 3, 17: 5},
+            'note': 'line\u2028separator \u00e9',
+        }
+        
+        self.assertEqual(FastJSONRenderer().render(payload), JSONRenderer().render(payload))
+        
+        # Integers beyond 64 bits are rendered by the stdlib encoder
+        payload = {'reference': 2 ** 70}
+        self.assertEqual(FastJSONRenderer().render(payload), JSONRenderer().render(payload))
+    
+    def test_content_negotiation(self):
+        """Test that the response format follows the Accept header"""
+        url = reverse('api_merchant_detail', args=[self.merchant1.id])
+        
+        response = self.client.get(url, HTTP_ACCEPT='application/json')
+        self.assertEqual(response['Content-Type'], 'application/json')
+        
+        if msgpack is None:
+            return
+        
+        response = self.client.get(url, HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content), self.client.get(url).json())
+        
+        response = self.client.post(
+            reverse('api_merchant_bulk_verify'),
+            msgpack.packb({'merchant_ids': [self.merchant1.id]}),
+            content_type='application/msgpack',
+            HTTP_ACCEPT='application/msgpack'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(msgpack.unpackb(response.content)['results']), 1)
+    
+    def test_merchant_sparse_fieldsets(self):
+        """Test ?fields= and ?expand= on merchant and report endpoints"""
+        url = reverse('api_merchant_detail', args=[self.merchant2.id])
+        
+        data = self.client.get(url + '?fields=id,name,status').json()
+        self.assertEqual(set(data), {'id', 'name', 'status'})
+        
+        data = self.client.get(url + '?fields=id,name&expand=verification_flags').json()
+        self.assertEqual(set(data), {'id', 'name', 'verification_flags'})
+        self.assertEqual(len(data['verification_flags']), 1)
+        
+        # Nested relations are only prefetched when expanded
+        self.assertLess(self.count_queries(url + '?fields=id,name'), self.count_queries(url))
+        
+        data = self.client.get(reverse('api_merchant_list') + '?fields=id,name').json()
+        self.assertEqual(set(data['results'][0]), {'id', 'name'})
+        
+        reports_url = reverse('api_merchant_reports', args=[self.merchant1.id])
+        data = self.client.get(reports_url + '?fields=id,risk_assessment').json()
+        self.assertEqual(set(data['results'][0]), {'id', 'risk_assessment'})
+        
+        data = self.client.get(reports_url + '?fields=id&expand=report_data').json()
+        self.assertEqual(data['results'][0]['report_data']['merchant_info']['name'], 'Test Merchant 1')
+    
     def test_merchant_verification_api(self):
         """Test the merchant verification API endpoint"""
         verification_data = {
@@ -176,6 +425,231 @@ class APITestCase(TestCase):
         self.assertEqual(self.merchant2.risk_score, 2.5)
         self.assertEqual(self.merchant2.verified_by, self.user)
     
+    def test_background_verification_job(self):
+        """Test queueing a verification job and polling it to completion"""
+        url = reverse('api_merchant_verify', args=[self.merchant2.id])
+        response = self.client.post(
+            url + '?async=true',
+            {'status': 'verified', 'risk_level': 'medium', 'callback_url': 'https://partner.example.com/hook'},
+            format='json'
+        )
+        
+        self.assertEqual(response.status_code, 202)
+        job = response.json()
+        self.assertEqual(job['status'], 'queued')
+        self.assertTrue(response['Location'].endswith(reverse('api_verification_job', args=[job['id']])))
+        
+        # Nothing changes until a worker runs the job
+        self.merchant2.refresh_from_db()
+        self.assertEqual(self.merchant2.status, 'flagged')
+        
+        with mock.patch('merchant_verification.services.webhooks.get_webhook_session') as get_webhook_session, \
+                mock.patch('merchant_verification.services.webhooks.socket.getaddrinfo',
+                           return_value=[(None, None, None, '', ('93.184.215.14', 443))]):
+            get_webhook_session.return_value.post.return_value.is_redirect = False
+            self.assertEqual(run_worker(max_jobs=10), 1)
+        
+        # The callback goes out without the provider credentials
+        callback = get_webhook_session.return_value.post.call_args
+        self.assertEqual(callback.args[0], 'https://partner.example.com/hook')
+        self.assertEqual(json.loads(callback.kwargs['data'])['status'], 'completed')
+        self.assertNotIn('Authorization', callback.kwargs['headers'])
+        
+        job = self.client.get(response['Location']).json()
+        self.assertEqual(job['status'], 'completed')
+        self.assertEqual(job['result']['merchant']['status'], 'verified')
+        
+        self.merchant2.refresh_from_db()
+        self.assertEqual(self.merchant2.status, 'verified')
+        self.assertEqual(self.merchant2.verified_by, self.user)
+        self.assertTrue(AuditLog.objects.filter(merchant=self.merchant2, action='verify').exists())
+        
+        # Invalid requests are rejected before queueing, Prefer header also selects async
+        response = self.client.post(url, {'status': 'unknown'}, format='json', HTTP_PREFER='respond-async')
+        self.assertEqual(response.status_code, 400)
+        
+        # Callbacks to internal or plain-HTTP endpoints are refused
+        for callback_url in ['http://partner.example.com/hook', 'https://169.254.169.254/latest', 'https://localhost/hook']:
+            response = self.client.post(
+                url + '?async=true', {'status': 'verified', 'callback_url': callback_url}, format='json'
+            )
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('callback_url', response.json())
+    
+    def test_bulk_merchant_verification_api(self):
+        """Test the bulk merchant verification API endpoint"""
+        response = self.client.post(
+            reverse('api_merchant_bulk_verify'),
+            {'merchant_ids': [self.merchant2.id, 999999, self.merchant1.id]},
+            format='json'
+        )
+        
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        
+        # Results come back in input order with per-merchant errors
+        self.assertEqual([r['merchant_id'] for r in results], [self.merchant2.id, 999999, self.merchant1.id])
+        self.assertIn('external_verification', results[0])
+        self.assertIn('error', results[1])
+        
+        # Check that the external responses were persisted
+        self.merchant1.refresh_from_db()
+        self.merchant2.refresh_from_db()
+        self.assertEqual(self.merchant1.external_api_response, results[2]['external_verification'])
+        self.assertEqual(self.merchant2.external_api_response, results[0]['external_verification'])
+        
+        # Test validation of the request
+        response = self.client.post(reverse('api_merchant_bulk_verify'), {'merchant_ids': []}, format='json')
+        self.assertEqual(response.status_code, 400)
+    
+    def test_bulk_merchant_verification_is_atomic(self):
+        """Test that results are not saved when their audit trail cannot be"""
+        previous = self.merchant1.external_api_response
+        
+        with mock.patch.object(AuditLog.objects, 'bulk_create', side_effect=DatabaseError('audit insert failed')):
+            with self.assertRaises(DatabaseError):
+                self.client.post(reverse('api_merchant_bulk_verify'), {'merchant_ids': [self.merchant1.id]}, format='json')
+        
+        self.merchant1.refresh_from_db()
+        self.assertEqual(self.merchant1.external_api_response, previous)
+    
+    def test_merchant_import_api(self):
+        """Test bulk-importing merchants from CSV and NDJSON"""
+        url = reverse('api_merchant_import')
+        header = 'name,business_type,registration_number,email,phone,address,city,state,country,postal_code,website'
+        rows = [
+            'Import One,retail,IMP001,one@import.com,+111,1 Import Way,City,State,Canada,A1A,',
+            'Import Two,online,IMP002,two@import.com,+222,2 Import Way,City,State,Canada,B2B,https://two.example.com',
+            'Bad Type,casino,IMP003,three@import.com,+333,3 Import Way,City,State,Canada,C3C,',
+            'Duplicate,retail,TEST123456,dup@import.com,+444,4 Import Way,City,State,Canada,D4D,',
+            'Repeat,retail,IMP001,repeat@import.com,+555,5 Import Way,City,State,Canada,E5E,',
+        ]
+        
+        with override_settings(MERCHANT_IMPORT_CHUNK_SIZE=2):
+            response = self.client.generic('POST', url, '\n'.join([header] + rows), content_type='text/csv')
+        
+        self.assertEqual(response.status_code, 200)
+        summary = response.json()
+        self.assertEqual(summary['total_rows'], 5)
+        self.assertEqual(summary['created'], 2)
+        self.assertEqual([error['row'] for error in summary['errors']], [3, 4, 5])
+        self.assertIn('business_type', summary['errors'][0]['errors'])
+        
+        merchant = Merchant.objects.get(registration_number='IMP002')
+        self.assertEqual(merchant.status, 'pending')
+        self.assertEqual(merchant.created_by, self.user)
+        self.assertEqual(AuditLog.objects.filter(action='create', merchant__registration_number__startswith='IMP').count(), 2)
+        
+        records = [
+            json.dumps({'name': 'Line One', 'business_type': 'service', 'registration_number': 'NDJ001',
+                        'email': 'a@ndjson.com', 'phone': '+1', 'address': '1 Line', 'city': 'C',
+                        'state': 'S', 'country': 'Canada', 'postal_code': 'P'}),
+            '{not json',
+        ]
+        response = self.client.generic('POST', url, '\n'.join(records), content_type='application/x-ndjson')
+        summary = response.json()
+        self.assertEqual((summary['created'], summary['failed']), (1, 1))
+        
+        response = self.client.post(url, {'merchants': []}, format='json')
+        self.assertEqual(response.status_code, 415)
+    
+    def post_signed_callback(self, url, payload):
+        body = json.dumps(payload)
+        signature = hmac.new(b'webhook-secret', body.encode('utf-8'), hashlib.sha256).hexdigest()
+        return APIClient().post(url, body, content_type='application/json', HTTP_X_PROVIDER_SIGNATURE=signature)
+    
+    @override_settings(EXTERNAL_API_WEBHOOK_SECRET='webhook-secret')
+    def test_async_verification_api(self):
+        """Test submitting async checks and receiving provider callbacks"""
+        response = self.client.post(
+            reverse('api_merchant_verify_async', args=[self.merchant1.id]),
+            {'check_types': ['registry', 'license']},
+            format='json'
+        )
+        
+        self.assertEqual(response.status_code, 202)
+        data = response.json()
+        self.assertEqual([p['check_type'] for p in data], ['registry', 'license'])
+        self.assertTrue(all(p['status'] == 'pending' for p in data))
+        
+        # Deliver the provider callback for the registry check
+        pending = PendingVerification.objects.get(merchant=self.merchant1, check_type='registry')
+        callback_url = reverse('api_verification_callback', args=[pending.callback_token])
+        self.merchant1.external_api_response = {'verification_status': 'verified'}
+        self.merchant1.save()
+        risk = (self.merchant1.risk_score, self.merchant1.risk_level)
+        payload = {
+            'request_id': pending.provider_request_id,
+            'status': 'completed',
+            'result': {'verification_status': 'error', 'registry_information': {'status': 'Active'}}
+        }
+        
+        response = self.post_signed_callback(callback_url, payload)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'completed')
+        
+        # The result is stored with the check, beside the synchronous verification data
+        self.merchant1.refresh_from_db()
+        registry = self.merchant1.external_api_response['async_checks']['registry']
+        self.assertEqual(registry['result'], payload['result'])
+        self.assertEqual(registry['request_id'], pending.provider_request_id)
+        self.assertEqual(self.merchant1.external_api_response['verification_status'], 'verified')
+        self.assertEqual((self.merchant1.risk_score, self.merchant1.risk_level), risk)
+        
+        # Repeated callbacks are ignored
+        payload['result'] = {'registry_information': {'status': 'Dissolved'}}
+        self.post_signed_callback(callback_url, payload)
+        self.merchant1.refresh_from_db()
+        self.assertEqual(
+            self.merchant1.external_api_response['async_checks']['registry']['result']['registry_information'],
+            {'status': 'Active'}
+        )
+        
+        # Malformed results are rejected without completing the check
+        license_check = PendingVerification.objects.get(merchant=self.merchant1, check_type='license')
+        response = self.post_signed_callback(
+            reverse('api_verification_callback', args=[license_check.callback_token]),
+            {'status': 'completed', 'result': ['not', 'an', 'object']}
+        )
+        self.assertEqual(response.status_code, 400)
+        license_check.refresh_from_db()
+        self.assertEqual(license_check.status, 'pending')
+    
+    @override_settings(EXTERNAL_API_WEBHOOK_SECRET='webhook-secret')
+    def test_verification_callback_signature(self):
+        """Test that signed callbacks are required when a secret is configured"""
+        pending = PendingVerification.objects.create(
+            merchant=self.merchant1,
+            check_type='license',
+            callback_token='test-token'
+        )
+        callback_url = reverse('api_verification_callback', args=['test-token'])
+        body = json.dumps({'status': 'failed'})
+        
+        response = APIClient().post(callback_url, body, content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+        
+        signature = hmac.new(b'webhook-secret', body.encode('utf-8'), hashlib.sha256).hexdigest()
+        response = APIClient().post(
+            callback_url, body, content_type='application/json',
+            HTTP_X_PROVIDER_SIGNATURE=signature
+        )
+        self.assertEqual(response.status_code, 200)
+        pending.refresh_from_db()
+        self.assertEqual(pending.status, 'failed')
+    
+    def test_unsigned_callbacks_require_debug(self):
+        """Test that callbacks are refused outside DEBUG when no secret is configured"""
+        PendingVerification.objects.create(merchant=self.merchant1, check_type='license', callback_token='test-token')
+        callback_url = reverse('api_verification_callback', args=['test-token'])
+        
+        response = APIClient().post(callback_url, {'status': 'failed'}, format='json')
+        self.assertEqual(response.status_code, 403)
+        
+        with override_settings(DEBUG=True):
+            response = APIClient().post(callback_url, {'status': 'failed'}, format='json')
+        self.assertEqual(response.status_code, 200)
+    
     def test_transaction_pattern_api(self):
         """Test the transaction pattern API endpoint"""
         # Get transaction patterns
@@ -210,7 +684,7 @@ class APITestCase(TestCase):
         response = self.client.get(reverse('api_merchant_flags', args=[self.merchant2.id]))
         
         self.assertEqual(response.status_code, 200)
-        data = response.json()
+        data = response.json()['results']
         
         # Verify the data
         self.assertEqual(len(data), 1)
@@ -296,12 +770,81 @@ class APITestCase(TestCase):
         self.assertEqual(self.flag.resolution_notes, 'Website was thoroughly reviewed and found to be legitimate.')
         self.assertEqual(self.flag.resolved_by, self.user)
     
+    def test_flag_review_queue_api(self):
+        """Test listing, claiming and releasing flags in the review queue"""
+        critical = VerificationFlag.objects.create(
+            merchant=self.merchant2,
+            flag_type='regulatory',
+            description='Regulator inquiry.',
+            severity='critical',
+            created_by=self.user
+        )
+        other_user = User.objects.create_user(username='otheranalyst', password='testpassword')
+        
+        response = self.client.get(reverse('api_flag_queue') + '?page_size=1')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([flag['id'] for flag in data['results']], [critical.id])
+        data = self.client.get(data['next']).json()
+        self.assertEqual([flag['id'] for flag in data['results']], [self.flag.id])
+        self.assertIsNone(data['next'])
+        
+        response = self.client.post(reverse('api_claim_flags'), {'count': 1}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['id'], critical.id)
+        self.assertEqual(response.json()['results'][0]['claimed_by'], 'testuser')
+        
+        self.client.force_authenticate(user=other_user)
+        response = self.client.post(reverse('api_claim_flags'), {'count': 5}, format='json')
+        self.assertEqual([flag['id'] for flag in response.json()['results']], [self.flag.id])
+        response = self.client.post(reverse('api_release_flag', args=[critical.id]))
+        self.assertEqual(response.status_code, 409)
+        
+        response = self.client.post(reverse('api_claim_flags'), {'count': 0}, format='json')
+        self.assertEqual(response.status_code, 400)
+        
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(reverse('api_release_flag', args=[critical.id]))
+        self.assertEqual(response.status_code, 204)
+        critical.refresh_from_db()
+        self.assertIsNone(critical.claimed_by)
+    
+    def test_bulk_resolve_flags_api(self):
+        """Test resolving many flags in one request"""
+        response = self.client.post(
+            reverse('api_bulk_resolve_flags'),
+            {'flag_ids': [self.flag.id, 999999], 'status': 'dismissed', 'resolution_notes': 'Known false positive'},
+            format='json'
+        )
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'closed': [self.flag.id],
+            'skipped': [999999],
+            'claimed': [],
+            'verified_merchants': [self.merchant2.id]
+        })
+        self.flag.refresh_from_db()
+        self.assertEqual(self.flag.status, 'dismissed')
+        self.assertTrue(AuditLog.objects.filter(
+            merchant=self.merchant2, action='review', details__bulk=True, ip_address='127.0.0.1'
+        ).exists())
+        self.merchant2.refresh_from_db()
+        self.assertEqual(self.merchant2.status, 'verified')
+        
+        response = self.client.post(
+            reverse('api_bulk_resolve_flags'),
+            {'flag_ids': [self.flag.id], 'status': 'open'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+    
     def test_report_list_api(self):
         """Test the report list API endpoint"""
         response = self.client.get(reverse('api_merchant_reports', args=[self.merchant1.id]))
         
         self.assertEqual(response.status_code, 200)
-        data = response.json()
+        data = response.json()['results']
         
         # Verify the data
         self.assertEqual(len(data), 1)
@@ -342,6 +885,55 @@ class APITestCase(TestCase):
         self.assertTrue('merchant' in data)
         self.assertTrue('report_data' in data)
     
+    def test_streaming_exports(self):
+        """Test NDJSON and CSV exports with filters"""
+        response = self.client.get(reverse('api_export_merchants'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['id'] for row in rows], [self.merchant1.id, self.merchant2.id])
+        self.assertEqual(rows[0]['created_by'], 'testuser')
+        
+        response = self.client.get(reverse('api_export_merchants') + '?output=csv&status=flagged', HTTP_ACCEPT='text/csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('attachment; filename="merchants.csv"', response['Content-Disposition'])
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:3], ['id', 'name', 'business_type'])
+        self.assertEqual(len(lines), 2)
+        self.assertIn('Test Merchant 2', lines[1])
+        
+        response = self.client.get(reverse('api_export_flags') + f'?merchant={self.merchant2.id}&status=open')
+        rows = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(json.loads(rows[0])['flag_type'], 'suspicious_website')
+        
+        AuditLog.objects.create(user=self.user, merchant=self.merchant1, action='update', details={'field': 'name'})
+        response = self.client.get(reverse('api_export_audit_logs') + '?output=csv&since=2000-01-01')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertIn('"{""field"": ""name""}"', lines[1])
+        
+        response = self.client.get(reverse('api_export_audit_logs') + '?since=yesterday')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('api_export_flags') + '?output=xml')
+        self.assertEqual(response.status_code, 400)
+    
+    def test_streaming_exports_under_asgi(self):
+        """Test that ASGI exports are served from an async generator, one row first"""
+        async def export():
+            client = AsyncClient()
+            await client.aforce_login(self.user)
+            response = await client.get(reverse('api_export_merchants'))
+            chunks = [chunk async for chunk in response.streaming_content]
+            return response, chunks
+        
+        response, chunks = async_to_sync(export)()
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        self.assertEqual(json.loads(chunks[0])['id'], self.merchant1.id)
+        rows = [json.loads(line) for line in b''.join(chunks).decode().splitlines()]
+        self.assertEqual([row['id'] for row in rows], [self.merchant1.id, self.merchant2.id])
+    
     def test_dashboard_stats_api(self):
         """Test the dashboard stats API endpoint"""
         response = self.client.get(reverse('api_dashboard_stats'))
@@ -356,6 +948,77 @@ class APITestCase(TestCase):
         self.assertEqual(data['pending_merchants'], 0)
         self.assertEqual(data['high_risk_merchants'], 1)
     
+    def test_conditional_get(self):
+        """Test ETag revalidation on the merchant detail and dashboard endpoints"""
+        for url in [reverse('api_merchant_detail', args=[self.merchant2.id]), reverse('api_dashboard_stats')]:
+            response = self.client.get(url)
+            etag = response['ETag']
+            self.assertIn('Last-Modified', response)
+            
+            # An unchanged poll is answered from one validator query after authentication
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response['ETag'], etag)
+            baseline = len(context.captured_queries)
+            
+            # Changing a nested flag invalidates the cached copy
+            with self.captureOnCommitCallbacks(execute=True):
+                self.flag.status = 'investigating'
+                self.flag.save()
+            
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response['ETag'], etag)
+        
+        self.assertLessEqual(baseline, 3)
+    
+    def test_merchant_etag_ignores_other_merchants(self):
+        """Test that writes to other merchants keep a merchant's cached copy current"""
+        url = reverse('api_merchant_detail', args=[self.merchant2.id])
+        etag = self.client.get(url)['ETag']
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.merchant1.name = 'Renamed Merchant'
+            self.merchant1.save()
+            VerificationFlag.objects.create(
+                merchant=self.merchant1, flag_type='other', description='Elsewhere', severity='low'
+            )
+        
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+    
+    def test_conditional_get_varies_with_field_selection(self):
+        """Test that sparse and expanded responses do not share an ETag"""
+        url = reverse('api_merchant_detail', args=[self.merchant2.id])
+        full_etag = self.client.get(url)['ETag']
+        
+        response = self.client.get(url, {'fields': 'id,name'}, HTTP_IF_NONE_MATCH=full_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()), {'id', 'name'})
+        sparse_etag = response['ETag']
+        self.assertNotEqual(sparse_etag, full_etag)
+        
+        # The same selection in another order is the same representation
+        response = self.client.get(url, {'fields': 'name, id'}, HTTP_IF_NONE_MATCH=sparse_etag)
+        self.assertEqual(response.status_code, 304)
+        
+        response = self.client.get(url, {'fields': 'id,name', 'expand': 'verification_flags'}, HTTP_IF_NONE_MATCH=sparse_etag)
+        self.assertEqual(response.status_code, 200)
+    
+    def test_provider_rate_limit_api(self):
+        """Test the provider rate limit API endpoint"""
+        response = self.client.get(reverse('api_provider_rate_limits'))
+        
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        
+        # Every configured provider is reported with its token level
+        self.assertEqual({b['name'] for b in data}, {'verification', 'sanctions'})
+        for bucket in data:
+            self.assertEqual(bucket['tokens'], bucket['capacity'])
+            self.assertEqual(bucket['throttled_calls'], 0)
+    
     def test_risk_assessment_api(self):
         """Test the risk assessment API endpoint"""
         merchant_data = {
@@ -385,6 +1048,44 @@ class APITestCase(TestCase):
         # For gambling business type, risk should be higher
         self.assertGreaterEqual(data['risk_score'], 3.0)
     
+    def test_batch_risk_assessment_api(self):
+        """Test scoring a batch of prospects and stored merchants in one request"""
+        payload = {
+            'merchants': [
+                {'name': 'Prospect Casino', 'business_type': 'gambling', 'website': 'https://www.testcasino.com', 'country': 'Malta'},
+                {'name': 'Bad Prospect', 'business_type': 'weapons'},
+                'not an object',
+                {'id': self.merchant2.id},
+            ],
+            'merchant_ids': [self.merchant1.id, 999999],
+        }
+        
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(reverse('api_assess_risk'), payload, format='json')
+        
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual(len(results), 6)
+        
+        self.assertGreaterEqual(results[0]['risk_score'], 3.0)
+        self.assertIn('business_type', results[1]['error'])
+        self.assertIn('error', results[2])
+        self.assertIn('error', results[5])
+        
+        # Stored merchants match the single-merchant assessment
+        for result, merchant in [(results[3], self.merchant2), (results[4], self.merchant1)]:
+            self.assertEqual(result['merchant_id'], merchant.id)
+            expected = assess_merchant_risk(merchant)
+            self.assertAlmostEqual(result['risk_score'], expected['risk_score'])
+            self.assertEqual(result['risk_level'], expected['risk_level'])
+            self.assertEqual(result['high_risk_flags'], expected['high_risk_flags'])
+        
+        # Session, user, merchants and latest patterns: independent of batch size
+        self.assertLessEqual(len(context.captured_queries), 4)
+        
+        response = self.client.post(reverse('api_assess_risk'), {'merchants': []}, format='json')
+        self.assertEqual(response.status_code, 400)
+    
     def test_authentication_required(self):
         """Test that API endpoints require authentication"""
         # Create unauthenticated client
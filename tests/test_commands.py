@@ -0,0 +1,118 @@
+import threading
+import pytest
+import requests
+import os
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from merchant_verification.models import Merchant, VerificationFlag
+from merchant_verification.management.commands.run_provider_stub import (
+    ProviderStubServer,
+    sample_latency,
+    LATENCY_DISTRIBUTIONS
+)
+
+
+class ProviderStubTests(SimpleTestCase):
+    """Test cases for the local stand-in provider server"""
+    
+    def start_server(self, **options):
+        server = ProviderStubServer(('127.0.0.1', 0), latency_ms=0, jitter_ms=0, **options)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return f"http://127.0.0.1:{server.server_address[1]}/"
+    
+    def test_verification_and_sanctions_responses(self):
+        """Test that the stub serves the simulated response shapes"""
+        base_url = self.start_server()
+        
+        response = requests.get(f"{base_url}verify", params={
+            'business_name': 'Stub Merchant',
+            'registration_number': 'SM123456',
+            'country': 'Canada',
+            'business_type': 'retail'
+        })
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertIn(data['verification_status'], ['verified', 'unverified'])
+        self.assertEqual(data['business_details']['registration_number'], 'SM123456')
+        
+        response = requests.post(f"{base_url}verify/batch", json={'businesses': [
+            {'reference': '1', 'business_name': 'A', 'registration_number': 'AB12345', 'country': 'Canada'},
+            {'reference': '2', 'business_name': 'B', 'registration_number': 'BC12345', 'country': 'Canada'},
+        ]})
+        self.assertEqual([r['reference'] for r in response.json()['results']], ['1', '2'])
+        
+        response = requests.get(f"{base_url}check", params={'business_name': 'A', 'country': 'Canada'})
+        self.assertFalse(response.json()['is_sanctioned'])
+    
+    def test_errors_and_throttling(self):
+        """Test configured error rates and throttling"""
+        base_url = self.start_server(error_rate=1.0)
+        self.assertEqual(requests.get(f"{base_url}check").status_code, 503)
+        
+        base_url = self.start_server(rate_limit=1)
+        statuses = [requests.get(f"{base_url}check").status_code for _ in range(3)]
+        self.assertEqual(statuses[0], 200)
+        self.assertIn(429, statuses)
+
+        base_url = self.start_server(rate_limit=0.5)
+        statuses = [requests.get(f"{base_url}check").status_code for _ in range(2)]
+        self.assertEqual(statuses, [200, 429])
+    
+    def test_sample_latency(self):
+        """Test that every latency distribution yields non-negative delays"""
+        for distribution in LATENCY_DISTRIBUTIONS:
+            latency = sample_latency(distribution, 100, 20)
+            self.assertGreaterEqual(latency, 0)
+        
+        self.assertEqual(sample_latency('fixed', 100, 20), 0.1)
+
+
+class ImportMerchantsCommandTests(TestCase):
+    """Test cases for the bulk merchant import command"""
+    
+    def test_import_csv_file(self):
+        """Test importing merchants from a CSV file"""
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as csv_file:
+            csv_file.write('name,business_type,registration_number,email,phone,address,city,state,country,postal_code\n')
+            for i in range(25):
+                csv_file.write(f'File Merchant {i},retail,FILE{i:04d},m{i}@file.com,+1,1 File St,City,State,Canada,F{i}\n')
+            csv_file.write('Broken,retail,,broken@file.com,+1,1 File St,City,State,Canada,F\n')
+        self.addCleanup(os.remove, csv_file.name)
+        
+        out = StringIO()
+        call_command('import_merchants', csv_file.name, '--chunk-size', '10', stdout=out)
+        
+        self.assertEqual(Merchant.objects.filter(registration_number__startswith='FILE').count(), 25)
+        self.assertIn('Imported 25 of 26 rows (1 failed)', out.getvalue())
+
+
+class RepairMerchantAggregatesCommandTests(TestCase):
+    """Test cases for the merchant aggregate repair command"""
+
+    def test_repair_open_flag_counts(self):
+        """Test that drifted open flag counts are recomputed"""
+        merchant = Merchant.objects.create(
+            name='Drifted Merchant',
+            business_type='retail',
+            registration_number='DRIFT0001',
+            email='info@drift.com',
+            phone='+1234567890',
+            address='1 Drift Street',
+            city='Test City',
+            state='Test State',
+            country='Canada',
+            postal_code='12345'
+        )
+        VerificationFlag.objects.create(merchant=merchant, flag_type='other', description='Drift', severity='low')
+        Merchant.objects.update(open_flag_count=0)
+
+        out = StringIO()
+        call_command('repair_merchant_aggregates', '--batch-size', '10', stdout=out)
+
+        self.assertEqual(Merchant.objects.get(pk=merchant.pk).open_flag_count, 1)
+        self.assertIn('Repaired aggregates of 1 merchants', out.getvalue())
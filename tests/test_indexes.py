@@ -0,0 +1,157 @@
+import unittest
+from django.test import TestCase
+from django.db import connection, transaction
+from django.contrib.auth.models import User
+from merchant_verification.models import Merchant, VerificationFlag, AuditLog
+from merchant_verification.services.review_queue import review_queue
+from merchant_verification.services.search import search_merchants
+
+
+requires_postgresql = unittest.skipUnless(
+    connection.vendor == 'postgresql',
+    'SQLite cannot match partial or expression indexes against bound query parameters'
+)
+
+
+class QueryPlanTestMixin:
+    """EXPLAIN-based assertions about the indexes a query uses"""
+
+    def analyze(self):
+        """Refresh planner statistics after seeding rows"""
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def query_plan(self, queryset):
+        """
+        Get the database's plan for a queryset.
+
+        On PostgreSQL sequential scans are disabled while planning, so a
+        small test table does not hide whether an index can serve the query.
+        """
+        if connection.vendor != 'postgresql':
+            return queryset.explain()
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            return queryset.explain()
+
+    def assertUsesIndex(self, queryset, index_name, ordered=True):
+        """
+        Assert that a query is served by an index.
+
+        Args:
+            queryset (QuerySet): The query to plan
+            index_name (str): Name of the index expected in the plan
+            ordered (bool): Also assert that the index supplies the ordering,
+                so the plan has no separate sort step
+        """
+        plan = self.query_plan(queryset)
+        self.assertIn(index_name, plan, f'{index_name} not used:\n{plan}')
+        if ordered:
+            sort_markers = ['Sort Key'] if connection.vendor == 'postgresql' else ['TEMP B-TREE']
+            for marker in sort_markers:
+                self.assertNotIn(marker, plan, f'Query is sorted after the index scan:\n{plan}')
+
+
+class IndexUsageTests(QueryPlanTestMixin, TestCase):
+    """Test that the hot list, filter and ordering paths are index scans"""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='planner', password='password')
+        statuses = [status for status, _ in Merchant.VERIFICATION_STATUS_CHOICES]
+        risk_levels = [risk_level for risk_level, _ in Merchant.RISK_LEVEL_CHOICES]
+        business_types = [business_type for business_type, _ in Merchant.BUSINESS_TYPE_CHOICES]
+
+        merchants = Merchant.objects.bulk_create([
+            Merchant(
+                name=f'Plan Merchant {i}',
+                business_type=business_types[i % len(business_types)],
+                registration_number=f'PLAN{i:06d}',
+                email='info@plan.com',
+                phone='+1234567890',
+                address='1 Plan Street',
+                city='Test City',
+                state='Test State',
+                country=['United States', 'Canada', 'Germany', 'Brazil'][i % 4],
+                postal_code='12345',
+                status=statuses[i % len(statuses)],
+                risk_level=risk_levels[i % len(risk_levels)],
+                created_by=user
+            )
+            for i in range(400)
+        ])
+        cls.merchant = merchants[0]
+
+        # Most flags are closed; the review queue is a small slice of the table
+        VerificationFlag.objects.bulk_create([
+            VerificationFlag(
+                merchant=merchants[i % len(merchants)],
+                flag_type='other',
+                description='Plan flag',
+                severity='medium',
+                status='open' if i % 20 == 0 else 'resolved',
+                priority=i
+            )
+            for i in range(2000)
+        ])
+        AuditLog.objects.bulk_create([
+            AuditLog(merchant=merchants[i % len(merchants)], user=user, action='update')
+            for i in range(2000)
+        ])
+
+    def setUp(self):
+        self.analyze()
+
+    def test_merchant_list_filters(self):
+        """Test that each merchant list filter is an ordered index range"""
+        newest = Merchant.objects.order_by('-created_at')
+        self.assertUsesIndex(newest.filter(status='flagged')[:10], 'merchant_status_created_idx')
+        self.assertUsesIndex(newest.filter(risk_level='high')[:10], 'merchant_risk_created_idx')
+        self.assertUsesIndex(newest.filter(business_type='online')[:10], 'merchant_type_created_idx')
+
+    def test_merchant_keyset_page(self):
+        """Test that the unfiltered merchant list pages along its keyset index"""
+        self.assertUsesIndex(Merchant.objects.order_by('-created_at', '-id')[:10], 'merchant_created_id_idx')
+
+    def test_flags_by_status(self):
+        """Test that flags filtered by status come newest first from an index"""
+        flags = VerificationFlag.objects.filter(status='resolved').order_by('-created_at')[:10]
+        self.assertUsesIndex(flags, 'flag_status_created_idx')
+
+    def test_merchant_audit_trail(self):
+        """Test that a merchant's audit trail is read newest first from an index"""
+        logs = AuditLog.objects.filter(merchant=self.merchant).order_by('-timestamp', '-id')[:10]
+        self.assertUsesIndex(logs, 'audit_merchant_time_id_idx')
+
+    @requires_postgresql
+    def test_review_queue(self):
+        """Test that the top of the review queue is one partial index range scan"""
+        self.assertUsesIndex(review_queue()[:10], 'flag_open_priority_idx')
+
+    @requires_postgresql
+    def test_open_flags_of_merchant(self):
+        """Test that open flag checks only read the open flags index"""
+        flags = VerificationFlag.objects.filter(merchant=self.merchant, status__in=VerificationFlag.OPEN_STATUSES)
+        self.assertUsesIndex(flags, 'flag_open_merchant_idx', ordered=False)
+
+    @requires_postgresql
+    def test_contact_substring_search(self):
+        """Test that substring search on emails and websites is a trigram index scan"""
+        for lookup, index_name in [('email', 'merchant_email_trgm_idx'), ('website', 'merchant_website_trgm_idx')]:
+            merchants = Merchant.objects.filter(**{f'{lookup}__icontains': 'plan'})
+            self.assertUsesIndex(merchants, index_name, ordered=False)
+
+    @requires_postgresql
+    def test_name_substring_search(self):
+        """Test that mid-word name fragments below the trigram similarity threshold still match"""
+        merchants = search_merchants(Merchant.objects.all(), 'rcha', ranked=False)
+        self.assertEqual(merchants.count(), Merchant.objects.count())
+        self.assertUsesIndex(merchants, 'merchant_name_trgm_idx', ordered=False)
+
+    @requires_postgresql
+    def test_country_filter(self):
+        """Test that the substring country filter uses the trigram index"""
+        merchants = Merchant.objects.filter(country__icontains='united')
+        self.assertUsesIndex(merchants, 'merchant_country_trgm_idx', ordered=False)
@@ -4,6 +4,7 @@ from django.contrib.auth.models import User
 from merchant_verification.models import Merchant, TransactionPattern
 from merchant_verification.ml_models.risk_assessment import (
     assess_merchant_risk,
+    assess_merchants_risk,
     analyze_website_risk,
     assess_information_completeness,
     assess_transaction_risk,
@@ -145,6 +146,35 @@ class RiskAssessmentTests(TestCase):
         # Incomplete merchant should have high completeness risk
         self.assertGreater(incomplete_assessment['risk_factors']['completeness_risk'], 3.5)
     
+    def test_batch_assessment_matches_single_assessment(self):
+        """Test that batch scoring gives exactly the single-merchant results"""
+        merchants = [self.low_risk_merchant, self.high_risk_merchant, self.incomplete_merchant]
+        for business_type in ['retail', 'online', 'financial', 'gambling', 'unknown']:
+            for country in ['Canada', 'Iran', '']:
+                for website in ['', 'https://shop.example.com', 'https://play.example.poker', 'https://bestbet.com']:
+                    for missing in [(), ('phone',), ('phone', 'address', 'city', 'state')]:
+                        merchant = Merchant(
+                            name='Prospect',
+                            business_type=business_type,
+                            registration_number='P123',
+                            website=website,
+                            email='info@example.com',
+                            phone='+1234567890',
+                            address='1 Main Street',
+                            city='City',
+                            state='State',
+                            country=country
+                        )
+                        for field in missing:
+                            setattr(merchant, field, '')
+                        merchants.append(merchant)
+        
+        batch = assess_merchants_risk(merchants)
+        
+        self.assertEqual(len(batch), len(merchants))
+        for merchant, assessment in zip(merchants, batch):
+            self.assertEqual(assessment, assess_merchant_risk(merchant))
+    
     def test_analyze_website_risk(self):
         """Test the website risk analysis function"""
         # Test a standard retail website
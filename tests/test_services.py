@@ -0,0 +1,1107 @@
+import asyncio
+import importlib
+import contextvars
+import threading
+import time
+import pytest
+from unittest import mock
+from asgiref.sync import async_to_sync, sync_to_async
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.core.cache import cache
+from django.contrib.auth.models import User
+from django.utils import timezone
+from merchant_verification.models import (
+    Merchant,
+    TransactionPattern,
+    VerificationFlag,
+    ProviderRateLimit,
+    DashboardCounter,
+    VerificationJob,
+    VerificationSnapshot,
+    AuditLog,
+    DataVersion
+)
+from merchant_verification.services import external_api
+from merchant_verification.services.coalescing import SingleFlight, coalesce
+from merchant_verification.services.rate_limiting import TokenBucket, RateLimitExceeded
+from merchant_verification.services.dashboard import (
+    compute_dashboard_stats,
+    get_dashboard_stats,
+    rebuild_dashboard_counters
+)
+from merchant_verification.services import verification_jobs
+from merchant_verification.services import webhooks
+from merchant_verification.services import dashboard_stream
+from merchant_verification.services.dashboard_stream import DashboardBroadcaster
+from merchant_verification.services import verification_snapshots
+from merchant_verification.services.search import search_merchants, build_prefix_tsquery
+from merchant_verification.services.typeahead import MerchantPrefixIndex
+from merchant_verification.services import review_queue
+from merchant_verification.services.flag_resolution import bulk_resolve_flags
+from merchant_verification.services.merchant_aggregates import repair_merchant_aggregates
+
+
+class SingleFlightTests(TestCase):
+    """Test cases for request coalescing of verification checks"""
+
+    def setUp(self):
+        cache.clear()
+
+        self.user = User.objects.create_user(
+            username='testuser',
+            password='testpassword'
+        )
+
+        self.merchant = Merchant.objects.create(
+            name='Coalesced Merchant',
+            business_type='retail',
+            registration_number='CM123456',
+            email='info@coalesced.com',
+            phone='+1234567890',
+            address='1 Shared Street',
+            city='Test City',
+            state='Test State',
+            country='United States',
+            postal_code='12345',
+            created_by=self.user
+        )
+
+    def test_concurrent_calls_share_one_computation(self):
+        """Test that concurrent callers with the same key share one call"""
+        flight = SingleFlight('test')
+        calls = []
+        results = []
+
+        def slow_check():
+            calls.append(1)
+            time.sleep(0.2)
+            return {'verification_status': 'verified'}
+
+        def worker():
+            results.append(flight.do('external:1', slow_check))
+
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(r == {'verification_status': 'verified'} for r in results))
+
+    def test_different_keys_are_not_coalesced(self):
+        """Test that different keys run independently"""
+        flight = SingleFlight('test')
+
+        self.assertEqual(flight.do('external:1', lambda: 1), 1)
+        self.assertEqual(flight.do('external:2', lambda: 2), 2)
+
+    def test_errors_are_shared_with_waiters(self):
+        """Test that an error in the shared call is raised to all callers"""
+        flight = SingleFlight('test')
+        errors = []
+
+        def failing_check():
+            time.sleep(0.1)
+            raise ValueError('provider unavailable')
+
+        def worker():
+            try:
+                flight.do('external:1', failing_check)
+            except ValueError as e:
+                errors.append(str(e))
+
+        threads = [threading.Thread(target=worker) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, ['provider unavailable'] * 3)
+
+    def test_leader_finishing_before_wait_does_not_block(self):
+        """Test that a waiter uses the result of a leader that finished before it could wait"""
+        flight = SingleFlight('test')
+        cache.set('single-flight:test:result:external:1', {'token': 'done', 'value': 'published'})
+        check = mock.Mock(return_value='recomputed')
+
+        with mock.patch('merchant_verification.services.coalescing.cache.add', return_value=False):
+            started = time.monotonic()
+            self.assertEqual(flight.do('external:1', check), 'published')
+            cache.delete('single-flight:test:result:external:1')
+            self.assertEqual(flight.do('external:1', check), 'recomputed')
+
+        self.assertLess(time.monotonic() - started, 1)
+        check.assert_called_once_with()
+
+    def test_expired_lock_of_later_leader_is_kept(self):
+        """Test that a leader whose lock expired does not release another leader's lock"""
+        flight = SingleFlight('test')
+        lock_key = 'single-flight:test:lock:external:1'
+
+        def slow_check():
+            # Our lock expired and another worker took it over
+            cache.set(lock_key, 'other-leader')
+            return 'result'
+
+        self.assertEqual(flight.do('external:1', slow_check), 'result')
+        self.assertEqual(cache.get(lock_key), 'other-leader')
+
+    def test_coalesce_merchant_check(self):
+        """Test coalescing a check for saved and unsaved merchants"""
+        result = coalesce('external', self.merchant, lambda m: m.registration_number)
+        self.assertEqual(result, 'CM123456')
+
+        unsaved = Merchant(name='Prospect', registration_number='PR123456')
+        result = coalesce('external', unsaved, lambda m: m.registration_number)
+        self.assertEqual(result, 'PR123456')
+
+
+class BulkExternalVerificationTests(TestCase):
+    """Test cases for bulk external verification"""
+
+    def setUp(self):
+        self.merchants = [
+            Merchant.objects.create(
+                name=f'Bulk Merchant {i}',
+                business_type='retail',
+                registration_number=f'BULK{i}X123',
+                email=f'info{i}@bulk.com',
+                phone='+1234567890',
+                address='1 Bulk Street',
+                city='Test City',
+                state='Test State',
+                country='United States',
+                postal_code='12345'
+            )
+            for i in range(5)
+        ]
+
+    def test_simulated_bulk_verification(self):
+        """Test that every merchant gets a simulated verification result"""
+        results = external_api.verify_merchants_external_bulk(self.merchants)
+
+        self.assertEqual(set(results), {m.pk for m in self.merchants})
+        for merchant in self.merchants:
+            self.assertEqual(
+                results[merchant.pk]['business_details']['registration_number'],
+                merchant.registration_number
+            )
+
+    def test_provider_batches(self):
+        """Test that merchants are grouped into provider batch requests"""
+        session = mock.Mock()
+
+        def post(url, json, timeout):
+            response = mock.Mock()
+            response.json.return_value = {'results': [
+                {'reference': b['reference'], 'verification_status': 'verified'}
+                for b in json['businesses']
+            ]}
+            return response
+
+        session.post.side_effect = post
+
+        with mock.patch.object(external_api, 'API_MODE', 'http'), \
+                mock.patch.object(external_api, 'API_SUPPORTS_BATCH', True), \
+                mock.patch.object(external_api, 'API_BATCH_SIZE', 2), \
+                mock.patch.object(external_api, 'get_session', return_value=session):
+            results = external_api.verify_merchants_external_bulk(self.merchants)
+
+        self.assertEqual(session.post.call_count, 3)
+        self.assertTrue(all(r['verification_status'] == 'verified' for r in results.values()))
+
+    def test_pool_threads_close_their_connections(self):
+        """Test that each concurrent verification closes its thread's database connection"""
+        with mock.patch.object(external_api, 'API_MODE', 'http'), \
+                mock.patch.object(external_api, 'verify_merchant_external', return_value={}), \
+                mock.patch.object(external_api, 'connection') as worker_connection:
+            results = external_api.verify_merchants_external_bulk(self.merchants)
+
+        self.assertEqual(len(results), 5)
+        self.assertEqual(worker_connection.close.call_count, 5)
+
+    @override_settings(
+        PROVIDER_RATE_LIMIT_TIMEOUT=5,
+        PROVIDER_RATE_LIMITS={'verification': {'capacity': 2, 'refill_rate': 1}}
+    )
+    def test_pooled_calls_wait_for_tokens_across_the_batch(self):
+        """Test that pooled calls share a token deadline covering the whole batch"""
+        timeouts = []
+
+        def verify(merchant, rate_limit_timeout=None):
+            timeouts.append(rate_limit_timeout)
+            return {}
+
+        with mock.patch.object(external_api, 'API_MODE', 'http'), \
+                mock.patch.object(external_api, 'verify_merchant_external', side_effect=verify), \
+                mock.patch.object(external_api, 'connection'):
+            external_api.verify_merchants_external_bulk(self.merchants)
+
+        # 5 merchants with a burst of 2 need 3 more seconds of refill
+        self.assertEqual(len(timeouts), 5)
+        self.assertTrue(all(7 < timeout <= 8 for timeout in timeouts))
+
+    def test_sanctions_errors_are_reported(self):
+        """Test that a throttled or failing sanctions provider yields an error result"""
+        bucket = mock.Mock()
+        bucket.acquire.side_effect = RateLimitExceeded('sanctions quota exhausted')
+
+        with mock.patch.object(external_api, 'API_MODE', 'http'), \
+                mock.patch.object(external_api, 'get_bucket', return_value=bucket):
+            result = external_api.check_business_sanctions(self.merchants[0])
+
+        self.assertIsNone(result['is_sanctioned'])
+        self.assertIn('sanctions quota exhausted', result['error'])
+
+
+class TokenBucketTests(TestCase):
+    """Test cases for the shared provider rate limiter"""
+
+    def test_bucket_allows_burst_then_throttles(self):
+        """Test that the bucket allows its capacity and then throttles"""
+        bucket = TokenBucket('test-provider', capacity=2, refill_rate=0.01)
+
+        bucket.acquire(timeout=0)
+        bucket.acquire(timeout=0)
+
+        with self.assertRaises(RateLimitExceeded):
+            bucket.acquire(timeout=0)
+
+        level = bucket.level()
+        self.assertLess(level['tokens'], 1)
+        self.assertEqual(level['allowed_calls'], 2)
+        self.assertEqual(level['throttled_calls'], 1)
+
+    def test_bucket_requires_a_refill_rate(self):
+        """Test that a bucket that never refills is rejected"""
+        with self.assertRaises(ValueError):
+            TokenBucket('test-provider', capacity=2, refill_rate=0)
+
+    def test_bucket_refills_over_time(self):
+        """Test that callers wait until a token is refilled"""
+        bucket = TokenBucket('test-provider', capacity=1, refill_rate=20)
+
+        bucket.acquire(timeout=0)
+        self.assertGreater(bucket.try_acquire(), 0)
+
+        # A token is refilled within 50ms, well inside the deadline
+        bucket.acquire(timeout=1)
+        self.assertEqual(ProviderRateLimit.objects.get(name='test-provider').allowed_calls, 2)
+
+    def test_throttled_provider_call_returns_error(self):
+        """Test that a throttled verification call returns an error response"""
+        merchant = Merchant(name='Throttled Merchant', registration_number='TM123456', country='Canada')
+        bucket = mock.Mock()
+        bucket.acquire.side_effect = RateLimitExceeded('Rate limit exceeded for provider verification')
+
+        with mock.patch.object(external_api, 'API_MODE', 'http'), \
+                mock.patch.object(external_api, 'get_bucket', return_value=bucket):
+            result = external_api.verify_merchant_external(merchant)
+
+        self.assertEqual(result['verification_status'], 'error')
+        self.assertIn('Rate limit exceeded', result['error'])
+
+
+class DashboardStatsTests(TestCase):
+    """Test cases for the shared dashboard statistics"""
+
+    def setUp(self):
+        cache.clear()
+
+        for i, (status, risk_level, business_type) in enumerate([
+            ('verified', 'low', 'retail'),
+            ('flagged', 'high', 'online'),
+            ('flagged', 'extreme', 'online'),
+            ('pending', None, 'gambling'),
+        ]):
+            merchant = Merchant.objects.create(
+                name=f'Stats Merchant {i}',
+                business_type=business_type,
+                registration_number=f'STATS{i}X123',
+                email=f'info{i}@stats.com',
+                phone='+1234567890',
+                address='1 Stats Street',
+                city='Test City',
+                state='Test State',
+                country='United States',
+                postal_code='12345',
+                status=status,
+                risk_level=risk_level
+            )
+            if status == 'flagged':
+                VerificationFlag.objects.create(
+                    merchant=merchant,
+                    flag_type='other',
+                    description='Needs review',
+                    severity='medium'
+                )
+
+    def assert_expected_stats(self, stats):
+        self.assertEqual(stats['total_merchants'], 4)
+        self.assertEqual(stats['verified_merchants'], 1)
+        self.assertEqual(stats['flagged_merchants'], 2)
+        self.assertEqual(stats['pending_merchants'], 1)
+        self.assertEqual(stats['rejected_merchants'], 0)
+        self.assertEqual(stats['recent_merchants'], 4)
+        self.assertEqual(stats['open_flags'], 2)
+        self.assertEqual(stats['high_risk_merchants'], 2)
+        self.assertEqual(stats['risk_levels'], [
+            {'risk_level': 'extreme', 'count': 1},
+            {'risk_level': 'high', 'count': 1},
+            {'risk_level': 'low', 'count': 1},
+        ])
+        self.assertEqual(stats['business_types'], [
+            {'business_type': 'gambling', 'count': 1},
+            {'business_type': 'online', 'count': 2},
+            {'business_type': 'retail', 'count': 1},
+        ])
+
+    def test_stats_in_one_query(self):
+        """Test that every dashboard count comes from a single query"""
+        with self.assertNumQueries(1):
+            stats = compute_dashboard_stats()
+        self.assert_expected_stats(stats)
+
+    def test_stats_are_cached_per_data_version(self):
+        """Test that repeated reads only look up the data version"""
+        self.assert_expected_stats(get_dashboard_stats())
+
+        with self.assertNumQueries(1):
+            self.assert_expected_stats(get_dashboard_stats())
+
+    def test_recent_merchants_window_starts_at_midnight(self):
+        """Test that recent merchants only age out of the window when the date changes"""
+        start_of_window = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0) - timezone.timedelta(days=30)
+        Merchant.objects.filter(registration_number='STATS0X123').update(created_at=start_of_window)
+        Merchant.objects.filter(registration_number='STATS1X123').update(created_at=start_of_window - timezone.timedelta(seconds=1))
+
+        self.assertEqual(compute_dashboard_stats()['recent_merchants'], 3)
+
+    @override_settings(DASHBOARD_COUNTERS_ENABLED=True)
+    def test_counters_follow_writes(self):
+        """Test that the counters table is maintained by model saves"""
+        rebuild_dashboard_counters()
+        self.assert_expected_stats(get_dashboard_stats())
+
+        merchant = Merchant.objects.get(registration_number='STATS3X123')
+        merchant.status = 'rejected'
+        merchant.risk_level = 'high'
+        merchant.save()
+        merchant.verification_flags.create(flag_type='other', description='Late flag', severity='low')
+        VerificationFlag.objects.filter(merchant__status='flagged').first().delete()
+
+        counters = dict(DashboardCounter.objects.values_list('name', 'value'))
+        self.assertEqual(counters, rebuild_dashboard_counters())
+
+        stats = get_dashboard_stats()
+        self.assertEqual(stats['rejected_merchants'], 1)
+        self.assertEqual(stats['pending_merchants'], 0)
+        self.assertEqual(stats['high_risk_merchants'], 3)
+        self.assertEqual(stats['open_flags'], 2)
+
+    def test_disabled_counters_skip_tracking(self):
+        """Test that loaded rows are not tracked while the counters are disabled"""
+        merchant = Merchant.objects.get(registration_number='STATS3X123')
+        self.assertFalse(hasattr(merchant, '_counter_keys'))
+
+        merchant.status = 'rejected'
+        merchant.save()
+        merchant.delete()
+        self.assertFalse(DashboardCounter.objects.exists())
+
+
+class DashboardBroadcasterTests(TestCase):
+    """Test cases for the shared live dashboard producer"""
+
+    def setUp(self):
+        cache.clear()
+
+    def add_flagged_merchant(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Merchant.objects.create(
+                name='Live Merchant',
+                business_type='retail',
+                registration_number='LM123456',
+                email='info@live.com',
+                phone='+1234567890',
+                address='1 Live Street',
+                city='Test City',
+                state='Test State',
+                country='United States',
+                postal_code='12345',
+                status='flagged'
+            )
+
+    def test_only_changed_stats_are_published(self):
+        """Test that subscribers get full stats once, then deltas on change"""
+        broadcaster = DashboardBroadcaster(['total_merchants', 'flagged_merchants', 'open_flags'], poll_interval=60)
+
+        async def scenario():
+            first_queue = await broadcaster.subscribe()
+            second_queue = await broadcaster.subscribe()
+            unchanged = await broadcaster.refresh()
+
+            await sync_to_async(self.add_flagged_merchant)()
+            delta = await broadcaster.refresh()
+            broadcaster.publish(delta)
+
+            events = [first_queue.get_nowait(), first_queue.get_nowait(), second_queue.get_nowait()]
+            broadcaster.unsubscribe(first_queue)
+            broadcaster.unsubscribe(second_queue)
+            return unchanged, delta, events
+
+        unchanged, delta, events = async_to_sync(scenario)()
+
+        self.assertEqual(unchanged, {})
+        self.assertEqual(delta, {'total_merchants': 1, 'flagged_merchants': 1})
+        self.assertEqual(events[0], ('stats', {'total_merchants': 0, 'flagged_merchants': 0, 'open_flags': 0}))
+        self.assertEqual(events[1], ('delta', delta))
+        self.assertEqual(events[2][0], 'stats')
+        self.assertIsNone(broadcaster.task)
+
+    def test_producer_runs_outside_the_request_context(self):
+        """Test that the producer does not inherit the first subscriber's context and closes connections per poll"""
+        broadcaster = DashboardBroadcaster(['total_merchants'], poll_interval=0.01)
+        request_marker = contextvars.ContextVar('request_marker')
+        seen = []
+
+        async def refresh():
+            seen.append(request_marker.get(None))
+            return {}
+
+        async def scenario():
+            request_marker.set('first request')
+            queue = await broadcaster.subscribe()
+            while len(seen) < 3:
+                await asyncio.sleep(0.01)
+            broadcaster.unsubscribe(queue)
+
+        with mock.patch.object(broadcaster, 'refresh', side_effect=refresh), \
+                mock.patch.object(dashboard_stream, 'close_old_connections') as close_old_connections:
+            async_to_sync(scenario)()
+
+        # The subscriber's own refresh runs in its request, the polls do not
+        self.assertEqual(seen[0], 'first request')
+        self.assertEqual(set(seen[1:]), {None})
+        self.assertGreaterEqual(close_old_connections.call_count, 2)
+
+
+class VerificationJobTests(TestCase):
+    """Test cases for background verification jobs"""
+
+    def setUp(self):
+        self.merchant = Merchant.objects.create(
+            name='Queued Merchant',
+            business_type='retail',
+            registration_number='QM123456',
+            email='info@queued.com',
+            phone='+1234567890',
+            address='1 Queue Street',
+            city='Test City',
+            state='Test State',
+            country='United States',
+            postal_code='12345'
+        )
+
+    @override_settings(VERIFICATION_JOB_MAX_ATTEMPTS=2)
+    def test_failed_attempts_are_retried(self):
+        """Test that a failing job is requeued until it runs out of attempts"""
+        job = verification_jobs.enqueue_verification_job(self.merchant, {'status': 'verified'}, None)
+
+        with mock.patch.object(verification_jobs, 'perform_merchant_verification',
+                               side_effect=RuntimeError('provider unavailable')):
+            self.assertEqual(verification_jobs.run_worker(max_jobs=1), 1)
+            job.refresh_from_db()
+            self.assertEqual(job.status, 'queued')
+
+            self.assertEqual(verification_jobs.run_worker(max_jobs=1), 1)
+            job.refresh_from_db()
+
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(job.error, 'provider unavailable')
+        self.assertIsNone(verification_jobs.claim_next_job())
+
+    def test_abandoned_jobs_are_reclaimed(self):
+        """Test that a running job past its timeout is claimed again"""
+        job = verification_jobs.enqueue_verification_job(self.merchant, {}, None)
+        self.assertEqual(verification_jobs.claim_next_job().pk, job.pk)
+        self.assertIsNone(verification_jobs.claim_next_job())
+
+        VerificationJob.objects.filter(pk=job.pk).update(
+            started_at=timezone.now() - timezone.timedelta(hours=1)
+        )
+        reclaimed = verification_jobs.claim_next_job()
+        self.assertEqual(reclaimed.pk, job.pk)
+        self.assertEqual(reclaimed.attempts, 2)
+
+    @override_settings(VERIFICATION_JOB_MAX_ATTEMPTS=2)
+    def test_abandoned_jobs_fail_without_attempts_left(self):
+        """Test that a job whose workers keep dying is failed instead of reclaimed forever"""
+        job = verification_jobs.enqueue_verification_job(
+            self.merchant, {}, None, callback_url='https://partner.example.com/hook'
+        )
+
+        def abandon():
+            VerificationJob.objects.filter(pk=job.pk).update(started_at=timezone.now() - timezone.timedelta(hours=1))
+
+        verification_jobs.claim_next_job()
+        abandon()
+        self.assertEqual(verification_jobs.claim_next_job().attempts, 2)
+        abandon()
+
+        with mock.patch.object(verification_jobs, 'notify_job_callback') as notify:
+            self.assertIsNone(verification_jobs.claim_next_job())
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+        self.assertIsNotNone(job.completed_at)
+        self.assertIn('did not finish', job.error)
+        self.assertEqual(notify.call_args.args[0].pk, job.pk)
+
+
+class WebhookTests(TestCase):
+    """Test cases for client-supplied callback URL checks"""
+
+    def resolve_to(self, address):
+        return mock.patch.object(webhooks.socket, 'getaddrinfo', return_value=[(None, None, None, '', (address, 443))])
+
+    def test_check_callback_url(self):
+        """Test that only public HTTPS hosts are accepted"""
+        webhooks.check_callback_url('https://partner.example.com/hook')
+        webhooks.check_callback_url('https://93.184.215.14/hook')
+
+        for url in [
+            'http://partner.example.com/hook',
+            'https://127.0.0.1/hook',
+            'https://10.0.0.5/hook',
+            'https://[::1]/hook',
+            'https://169.254.169.254/latest/meta-data',
+            'https://api.localhost/hook',
+        ]:
+            with self.assertRaises(webhooks.UnsafeCallbackURL):
+                webhooks.check_callback_url(url)
+
+    def test_resolved_addresses_are_checked(self):
+        """Test that a public name resolving to an internal address is refused"""
+        with self.resolve_to('192.168.1.10'), self.assertRaises(webhooks.UnsafeCallbackURL):
+            webhooks.check_callback_url('https://partner.example.com/hook', resolve=True)
+
+        with self.resolve_to('93.184.215.14'):
+            webhooks.check_callback_url('https://partner.example.com/hook', resolve=True)
+
+    @override_settings(WEBHOOK_ALLOWED_HOSTS=['.partner.example.com'])
+    def test_allowed_hosts(self):
+        """Test that a configured allowlist replaces the address checks"""
+        webhooks.check_callback_url('https://hooks.partner.example.com/job', resolve=True)
+
+        with self.assertRaises(webhooks.UnsafeCallbackURL):
+            webhooks.check_callback_url('https://other.example.com/job')
+
+
+class VerificationSnapshotTests(TestCase):
+    """Test cases for precomputed verification snapshots"""
+
+    def setUp(self):
+        cache.clear()
+
+        self.merchant = Merchant.objects.create(
+            name='Snapshot Merchant',
+            business_type='retail',
+            registration_number='SM123456',
+            email='info@snapshot.com',
+            phone='+1234567890',
+            address='1 Snapshot Street',
+            city='Test City',
+            state='Test State',
+            country='United States',
+            postal_code='12345'
+        )
+
+        patches = {
+            'verify_merchant_external': {'verification_status': 'verified', 'confidence_score': 0.9},
+            'assess_merchant_risk': {'risk_score': 1.5, 'suggested_risk_level': 'low'},
+            'analyze_transaction_patterns': {'monthly_transaction_volume': 10},
+        }
+        self.checks = {}
+        for name, value in patches.items():
+            patcher = mock.patch.object(verification_snapshots, name, return_value=value)
+            self.checks[name] = patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_snapshot_is_reused_until_inputs_change(self):
+        """Test that the snapshot is computed once and marked stale on writes"""
+        snapshot = verification_snapshots.get_verification_snapshot(self.merchant)
+        self.assertFalse(snapshot.is_stale)
+        self.assertEqual(snapshot.risk_data['suggested_risk_level'], 'low')
+
+        verification_snapshots.get_verification_snapshot(self.merchant)
+        self.assertEqual(self.checks['assess_merchant_risk'].call_count, 1)
+
+        TransactionPattern.objects.create(merchant=self.merchant)
+        snapshot = verification_snapshots.get_verification_snapshot(self.merchant)
+        self.assertTrue(snapshot.is_stale)
+        self.assertTrue(verification_snapshots.snapshot_needs_refresh(snapshot))
+        self.assertEqual(self.checks['assess_merchant_risk'].call_count, 1)
+
+    def test_refresher_recomputes_stale_and_missing_snapshots(self):
+        """Test that the background refresher builds and refreshes snapshots"""
+        self.assertEqual(verification_snapshots.run_snapshot_refresher(once=True), 1)
+        snapshot = VerificationSnapshot.objects.get(merchant=self.merchant)
+        self.assertFalse(snapshot.is_stale)
+
+        self.merchant.status = 'flagged'
+        self.merchant.save()
+        self.assertEqual(verification_snapshots.run_snapshot_refresher(once=True), 1)
+        self.assertEqual(verification_snapshots.run_snapshot_refresher(once=True), 0)
+
+        with override_settings(VERIFICATION_SNAPSHOT_MAX_AGE=60):
+            VerificationSnapshot.objects.update(computed_at=timezone.now() - timezone.timedelta(minutes=2))
+            self.assertEqual(verification_snapshots.run_snapshot_refresher(once=True), 1)
+
+    def test_change_during_refresh_keeps_snapshot_stale(self):
+        """Test that a write while the checks run leaves the snapshot stale"""
+        VerificationSnapshot.objects.create(merchant=self.merchant)
+        self.checks['assess_merchant_risk'].side_effect = lambda merchant: (
+            verification_snapshots.mark_snapshot_stale(merchant.pk) or {'suggested_risk_level': 'low'}
+        )
+
+        snapshot = verification_snapshots.compute_verification_snapshot(self.merchant)
+
+        self.assertTrue(snapshot.is_stale)
+        self.assertIsNotNone(VerificationSnapshot.objects.get(pk=snapshot.pk).risk_data)
+
+
+class MerchantSearchTests(TestCase):
+    """Test cases for merchant search"""
+
+    def setUp(self):
+        for name, registration_number, email in [
+            ('Acme Books', 'AB100', 'info@acme.com'),
+            ('Acme', 'AC200', 'hello@acme.com'),
+            ('Books and Acme', 'BA300', 'shop@books.com'),
+            ('Unrelated Store', 'US400', 'info@unrelated.com'),
+        ]:
+            Merchant.objects.create(
+                name=name,
+                business_type='retail',
+                registration_number=registration_number,
+                email=email,
+                phone='+1234567890',
+                address='1 Search Street',
+                city='Test City',
+                state='Test State',
+                country='United States',
+                postal_code='12345'
+            )
+
+    def test_results_are_ranked(self):
+        """Test that exact and prefix name matches come first"""
+        results = search_merchants(Merchant.objects.all(), 'acme')
+        self.assertEqual([m.name for m in results], ['Acme', 'Acme Books', 'Books and Acme'])
+
+    def test_search_fields(self):
+        """Test matching on registration number and email, and empty queries"""
+        self.assertEqual([m.name for m in search_merchants(Merchant.objects.all(), 'us400')], ['Unrelated Store'])
+        self.assertEqual(search_merchants(Merchant.objects.all(), 'shop@books.com').count(), 1)
+        self.assertEqual(search_merchants(Merchant.objects.all(), '   ').count(), 0)
+
+    def test_substring_matches(self):
+        """Test that parts of emails, websites and registration numbers match"""
+        Merchant.objects.filter(registration_number='US400').update(website='https://www.unrelated-example.com/shop')
+
+        def search(query):
+            return [m.name for m in search_merchants(Merchant.objects.all(), query)]
+
+        self.assertEqual(search('books.com'), ['Books and Acme'])
+        self.assertEqual(search('unrelated-example'), ['Unrelated Store'])
+        self.assertEqual(search('S40'), ['Unrelated Store'])
+
+    def test_prefix_tsquery_quotes_terms(self):
+        """Test that search terms cannot inject tsquery syntax"""
+        self.assertEqual(build_prefix_tsquery("o'brien  & shop"), "'o''brien':* & '&':* & 'shop':*")
+
+
+class MerchantPrefixIndexTests(TestCase):
+    """Test cases for the in-memory typeahead index"""
+
+    def create_merchant(self, name, registration_number):
+        return Merchant.objects.create(
+            name=name,
+            business_type='retail',
+            registration_number=registration_number,
+            email='info@typeahead.com',
+            phone='+1234567890',
+            address='1 Prefix Street',
+            city='Test City',
+            state='Test State',
+            country='United States',
+            postal_code='12345'
+        )
+
+    def test_prefix_matching(self):
+        """Test matching on any word of the name, ignoring accents and separators"""
+        cafe = self.create_merchant('Café Zürich', 'CH-100-200')
+        self.create_merchant('Zebra Stores', 'ZS300')
+        index = MerchantPrefixIndex(background=False)
+
+        self.assertEqual([m['id'] for m in index.search('cafe')], [cafe.id])
+        self.assertEqual([m['name'] for m in index.search('zu')], ['Café Zürich'])
+        self.assertEqual([m['id'] for m in index.search('ch100')], [cafe.id])
+        self.assertEqual([m['name'] for m in index.search('z')], ['Zebra Stores', 'Café Zürich'])
+
+    @override_settings(TYPEAHEAD_VERSION_CHECK_INTERVAL=0)
+    def test_sync_applies_changes(self):
+        """Test that a data version change syncs renamed and new merchants"""
+        merchant = self.create_merchant('Old Name', 'ON100')
+        index = MerchantPrefixIndex(background=False)
+        self.assertEqual(len(index.search('old')), 1)
+        published = index._name_keys
+        published_keys = list(published)
+
+        merchant.name = 'New Name'
+        merchant.status = 'verified'
+        with self.captureOnCommitCallbacks(execute=True):
+            merchant.save()
+            newer = self.create_merchant('Newer Name', 'NN200')
+
+        self.assertEqual(index.search('old'), [])
+        self.assertEqual(index.search('new'), [
+            {'id': merchant.id, 'name': 'New Name', 'status': 'verified'},
+            {'id': newer.id, 'name': 'Newer Name', 'status': 'pending'},
+        ])
+        self.assertEqual(len(index._name_keys), 4)
+        # Lookups still holding the old arrays see them unchanged
+        self.assertEqual(published, published_keys)
+
+    def test_background_refresh_serves_current_arrays(self):
+        """Test that lookups do not wait for a refresh and check the version at most once a second"""
+        self.create_merchant('Prefix Merchant', 'PM100')
+        index = MerchantPrefixIndex()
+        started = threading.Event()
+
+        with mock.patch.object(threading, 'Thread') as thread:
+            thread.return_value.start.side_effect = started.set
+            self.assertEqual(index.search('prefix'), [])
+        self.assertTrue(started.is_set())
+
+        # The refresh in progress holds the lock; further lookups do not start another
+        with mock.patch.object(threading, 'Thread') as thread:
+            index.search('prefix')
+        thread.assert_not_called()
+
+        # Run the refresh the thread would have run
+        index.refresh()
+        index._lock.release()
+        self.assertEqual(len(index.search('prefix')), 1)
+
+        with self.assertNumQueries(0):
+            index.search('prefix')
+            index.search('merchant')
+
+
+
+class ReviewQueueTests(TestCase):
+    """Test cases for the prioritized flag review queue"""
+
+    def setUp(self):
+        self.analyst = User.objects.create_user(username='analyst', password='password')
+        self.other_analyst = User.objects.create_user(username='other', password='password')
+        self.low_risk = self.create_merchant('Low Risk Merchant', 'LR100', 1.0)
+        self.high_risk = self.create_merchant('High Risk Merchant', 'HR200', 4.0)
+
+    def create_merchant(self, name, registration_number, risk_score):
+        return Merchant.objects.create(
+            name=name,
+            business_type='retail',
+            registration_number=registration_number,
+            email='info@queue.com',
+            phone='+1234567890',
+            address='1 Queue Street',
+            city='Test City',
+            state='Test State',
+            country='United States',
+            postal_code='12345',
+            risk_score=risk_score
+        )
+
+    def create_flag(self, merchant, severity, age_hours=0):
+        flag = VerificationFlag.objects.create(
+            merchant=merchant,
+            flag_type='other',
+            description='Needs review',
+            severity=severity
+        )
+        if age_hours:
+            # created_at is set on insert; age the flag and save to reprioritize
+            flag.created_at = timezone.now() - timezone.timedelta(hours=age_hours)
+            flag.save()
+        return flag
+
+    def queue_ids(self):
+        return list(review_queue.review_queue().values_list('id', flat=True))
+
+    @override_settings(REVIEW_QUEUE_SEVERITY_HOURS=24, REVIEW_QUEUE_RISK_HOURS=12)
+    def test_priority_orders_by_severity_risk_and_age(self):
+        """Test that severity, risk score and age all raise a flag's priority"""
+        critical = self.create_flag(self.low_risk, 'critical')
+        high_risky = self.create_flag(self.high_risk, 'high')
+        old_low = self.create_flag(self.low_risk, 'low', age_hours=100)
+        new_low = self.create_flag(self.low_risk, 'low')
+        resolved = self.create_flag(self.high_risk, 'critical')
+        resolved.resolve(self.analyst, 'Checked')
+
+        # critical: 72 + 12; high on high risk: 48 + 48; old low: 12 + 100
+        self.assertEqual(self.queue_ids(), [old_low.id, high_risky.id, critical.id, new_low.id])
+        self.assertAlmostEqual(review_queue.current_priority(critical), 84, delta=0.1)
+
+    def test_saving_a_flag_does_not_load_its_merchant(self):
+        """Test that the priority reads only the risk score of a merchant that is not loaded"""
+        flag = VerificationFlag.objects.get(pk=self.create_flag(self.high_risk, 'high').pk)
+        flag.severity = 'critical'
+        flag.save()
+
+        self.assertFalse(VerificationFlag.merchant.is_cached(flag))
+        self.assertAlmostEqual(review_queue.current_priority(flag), 72 + 48, delta=0.1)
+
+    def test_migration_backfill_matches_priority(self):
+        """Test that the frozen formula in migration 0010 matches the service"""
+        migration = importlib.import_module('merchant_verification.migrations.0010_review_queue')
+        created_at = timezone.now() - timezone.timedelta(hours=5)
+        self.assertAlmostEqual(
+            migration.flag_priority('high', 3.5, created_at),
+            review_queue.flag_priority('high', 3.5, created_at)
+        )
+
+    @override_settings(REVIEW_QUEUE_SEVERITY_HOURS=24, REVIEW_QUEUE_RISK_HOURS=12)
+    def test_risk_score_change_reprioritizes_open_flags(self):
+        """Test that rescoring a merchant shifts its open flags in the queue"""
+        low_risk_flag = self.create_flag(self.low_risk, 'high')
+        high_risk_flag = self.create_flag(self.high_risk, 'high')
+        self.assertEqual(self.queue_ids(), [high_risk_flag.id, low_risk_flag.id])
+
+        self.low_risk.risk_score = 5.0
+        self.low_risk.save()
+
+        self.assertEqual(self.queue_ids(), [low_risk_flag.id, high_risk_flag.id])
+        low_risk_flag.refresh_from_db()
+        self.assertAlmostEqual(review_queue.current_priority(low_risk_flag), 48 + 60, delta=0.1)
+
+    def test_claims_do_not_collide(self):
+        """Test that analysts are leased different flags until leases expire"""
+        first = self.create_flag(self.high_risk, 'critical')
+        second = self.create_flag(self.low_risk, 'medium')
+
+        self.assertEqual([f.id for f in review_queue.claim_flags(self.analyst)], [first.id])
+        self.assertEqual([f.id for f in review_queue.claim_flags(self.other_analyst)], [second.id])
+        self.assertEqual(review_queue.claim_flags(self.other_analyst, 5)[0].id, second.id)
+        self.assertTrue(VerificationFlag.objects.get(pk=first.pk).is_claimed)
+
+        self.assertFalse(review_queue.release_flag(first.id, self.other_analyst))
+        self.assertTrue(review_queue.release_flag(first.id, self.analyst))
+        self.assertEqual([f.id for f in review_queue.claim_flags(self.other_analyst, 5)], [first.id, second.id])
+
+        VerificationFlag.objects.update(claimed_until=timezone.now() - timezone.timedelta(seconds=1))
+        self.assertEqual(len(review_queue.claim_flags(self.analyst, 5)), 2)
+
+
+class BulkFlagResolutionTests(TestCase):
+    """Test cases for set-based bulk flag resolution"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='analyst', password='password')
+        self.merchants = {}
+        for status in ('cleared', 'partial', 'rejected'):
+            self.merchants[status] = Merchant.objects.create(
+                name=f'{status.title()} Merchant',
+                business_type='online',
+                registration_number=f'BULK{status.upper()}',
+                email='info@bulk.com',
+                phone='+1234567890',
+                address='1 Bulk Street',
+                city='Test City',
+                state='Test State',
+                country='United States',
+                postal_code='12345',
+                status='rejected' if status == 'rejected' else 'flagged',
+                risk_level='high'
+            )
+
+    def add_flags(self, merchant, count):
+        return [
+            VerificationFlag.objects.create(
+                merchant=merchant,
+                flag_type='transaction_pattern',
+                description=f'Alert {i}',
+                severity='medium'
+            ).id
+            for i in range(count)
+        ]
+
+    @override_settings(DASHBOARD_COUNTERS_ENABLED=True)
+    def test_bulk_resolve_closes_flags_and_verifies_cleared_merchants(self):
+        """Test that merchants are only verified once none of their flags are open"""
+        cleared = self.add_flags(self.merchants['cleared'], 2)
+        partial = self.add_flags(self.merchants['partial'], 2)
+        rejected = self.add_flags(self.merchants['rejected'], 1)
+        closed = self.add_flags(self.merchants['partial'], 1)
+        VerificationFlag.objects.filter(id__in=closed).update(status='dismissed')
+        VerificationSnapshot.objects.create(merchant=self.merchants['cleared'], is_stale=False)
+        rebuild_dashboard_counters()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            result = bulk_resolve_flags(
+                cleared + partial[:1] + rejected + closed + [999999],
+                self.user,
+                status='dismissed',
+                notes='False positive wave'
+            )
+
+        self.assertEqual(result['closed'], sorted(cleared + partial[:1] + rejected))
+        self.assertEqual(result['skipped'], closed + [999999])
+        self.assertEqual(result['claimed'], [])
+        self.assertEqual(result['verified_merchants'], [self.merchants['cleared'].id])
+
+        statuses = dict(Merchant.objects.values_list('registration_number', 'status'))
+        self.assertEqual(statuses, {'BULKCLEARED': 'verified', 'BULKPARTIAL': 'flagged', 'BULKREJECTED': 'rejected'})
+        self.assertIsNotNone(Merchant.objects.get(pk=self.merchants['cleared'].pk).last_verified_at)
+
+        flag = VerificationFlag.objects.get(pk=cleared[0])
+        self.assertEqual((flag.status, flag.resolved_by, flag.resolution_notes), ('dismissed', self.user, 'False positive wave'))
+        self.assertEqual(AuditLog.objects.filter(action='review', details__bulk=True).count(), 4)
+        self.assertTrue(VerificationSnapshot.objects.get(merchant=self.merchants['cleared']).is_stale)
+        self.assertTrue(DataVersion.objects.exists())
+
+        counters = dict(DashboardCounter.objects.values_list('name', 'value'))
+        self.assertEqual(counters, rebuild_dashboard_counters())
+
+    def test_query_count_does_not_grow_with_flags(self):
+        """Test that resolving more flags runs the same statements"""
+        def count_queries(flag_ids):
+            with CaptureQueriesContext(connection) as queries:
+                bulk_resolve_flags(flag_ids, self.user)
+            return len(queries)
+
+        small = count_queries(self.add_flags(self.merchants['cleared'], 2))
+        large = count_queries(self.add_flags(self.merchants['partial'], 20) + self.add_flags(self.merchants['rejected'], 20))
+        self.assertEqual(small, large)
+
+    def test_invalid_status(self):
+        """Test that only closing statuses are accepted"""
+        with self.assertRaises(ValueError):
+            bulk_resolve_flags(self.add_flags(self.merchants['cleared'], 1), self.user, status='open')
+
+    def test_flags_claimed_by_another_analyst_are_left_open(self):
+        """Test that bulk resolution does not override another analyst's review lease"""
+        other = User.objects.create_user('reviewer')
+        own, leased, expired = self.add_flags(self.merchants['cleared'], 3)
+        lease_until = timezone.now() + timezone.timedelta(minutes=30)
+        VerificationFlag.objects.filter(pk=own).update(claimed_by=self.user, claimed_until=lease_until)
+        VerificationFlag.objects.filter(pk=leased).update(claimed_by=other, claimed_until=lease_until)
+        VerificationFlag.objects.filter(pk=expired).update(claimed_by=other, claimed_until=timezone.now() - timezone.timedelta(minutes=1))
+
+        result = bulk_resolve_flags([expired, 999999, leased, own], self.user)
+
+        self.assertEqual(result['closed'], [own, expired])
+        self.assertEqual(result['claimed'], [leased])
+        self.assertEqual(result['skipped'], [999999])
+        self.assertEqual(result['verified_merchants'], [])
+        flag = VerificationFlag.objects.get(pk=leased)
+        self.assertEqual((flag.status, flag.claimed_by), ('open', other))
+        self.assertEqual(Merchant.objects.get(pk=self.merchants['cleared'].pk).status, 'flagged')
+
+
+class MerchantAggregatesTests(TestCase):
+    """Test cases for the open flag counts and latest patterns stored on merchants"""
+
+    def setUp(self):
+        self.merchant, self.other = [
+            Merchant.objects.create(
+                name=f'Aggregate Merchant {i}',
+                business_type='online',
+                registration_number=f'AGG{i}',
+                email='info@aggregate.com',
+                phone='+1234567890',
+                address='1 Aggregate Street',
+                city='Test City',
+                state='Test State',
+                country='United States',
+                postal_code='12345'
+            )
+            for i in range(2)
+        ]
+
+    def add_flag(self, merchant, status='open'):
+        return VerificationFlag.objects.create(
+            merchant=merchant,
+            flag_type='other',
+            description='Aggregate flag',
+            severity='medium',
+            status=status
+        )
+
+    def open_flag_counts(self):
+        return [Merchant.objects.get(pk=merchant.pk).open_flag_count for merchant in (self.merchant, self.other)]
+
+    def test_open_flag_count_follows_flag_changes(self):
+        """Test that creating, closing, reopening, moving and deleting flags keep counts current"""
+        flag = self.add_flag(self.merchant)
+        self.add_flag(self.merchant, status='investigating')
+        self.add_flag(self.merchant, status='resolved')
+        self.assertEqual(self.open_flag_counts(), [2, 0])
+
+        flag.status = 'resolved'
+        flag.save()
+        self.assertEqual(self.open_flag_counts(), [1, 0])
+
+        flag.status = 'open'
+        flag.save()
+        flag.merchant = self.other
+        flag.save()
+        self.assertEqual(self.open_flag_counts(), [1, 1])
+
+        flag.delete()
+        self.assertEqual(self.open_flag_counts(), [1, 0])
+
+        bulk_resolve_flags(list(self.merchant.verification_flags.values_list('id', flat=True)), User.objects.create_user('bulk'))
+        self.assertEqual(self.open_flag_counts(), [0, 0])
+
+    def test_merchant_save_keeps_aggregates(self):
+        """Test that saving a stale merchant instance does not overwrite its aggregates"""
+        stale = Merchant.objects.get(pk=self.merchant.pk)
+        self.add_flag(self.merchant)
+        pattern = TransactionPattern.objects.create(merchant=self.merchant)
+
+        stale.name = 'Renamed Merchant'
+        stale.save()
+
+        merchant = Merchant.objects.get(pk=self.merchant.pk)
+        self.assertEqual(merchant.name, 'Renamed Merchant')
+        self.assertEqual(merchant.open_flag_count, 1)
+        self.assertEqual(merchant.latest_transaction_pattern, pattern)
+
+    def test_latest_pattern_follows_pattern_changes(self):
+        """Test that the pointer moves to new patterns and back when the latest is deleted"""
+        older = TransactionPattern.objects.create(merchant=self.merchant, monthly_transaction_volume=10)
+        newer = TransactionPattern.objects.create(merchant=self.merchant, monthly_transaction_volume=20)
+        self.assertEqual(Merchant.objects.get(pk=self.merchant.pk).latest_transaction_pattern, newer)
+
+        newer.delete()
+        self.assertEqual(Merchant.objects.get(pk=self.merchant.pk).latest_transaction_pattern, older)
+
+        older.delete()
+        self.assertIsNone(Merchant.objects.get(pk=self.merchant.pk).latest_transaction_pattern)
+
+    def test_repair_fixes_drift(self):
+        """Test that the repair recomputes aggregates changed behind the signals' back"""
+        self.add_flag(self.merchant)
+        pattern = TransactionPattern.objects.create(merchant=self.other)
+        Merchant.objects.update(open_flag_count=7, latest_transaction_pattern=None)
+        self.assertEqual(repair_merchant_aggregates(batch_size=1), 2)
+
+        self.assertEqual(self.open_flag_counts(), [1, 0])
+        self.assertEqual(Merchant.objects.get(pk=self.other.pk).latest_transaction_pattern, pattern)
@@ -1,13 +1,20 @@
 import pytest
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from unittest import mock
+from django.db import connection
 from django.urls import reverse
+from django.core.cache import cache
 from django.contrib.auth.models import User
+from merchant_verification import pagination
+from merchant_verification.pagination import ApproximatePaginator
 from merchant_verification.models import (
     Merchant,
     TransactionPattern,
     VerificationFlag,
     VerificationReport,
-    AuditLog
+    AuditLog,
+    VerificationSnapshot
 )
 
 
@@ -15,6 +22,8 @@ class ViewsTestCase(TestCase):
     """Test cases for views in the merchant verification app"""
     
     def setUp(self):
+        cache.clear()
+        
         # Create a test client
         self.client = Client()
         
@@ -119,6 +128,55 @@ class ViewsTestCase(TestCase):
         self.assertEqual(len(response.context['reports']), 1)
         self.assertEqual(response.context['reports'][0], self.report)
     
+    def test_merchant_detail_query_count_is_constant(self):
+        """Test the merchant detail page query count does not grow with related rows"""
+        url = reverse('merchant_detail', args=[self.merchant.id])
+        
+        with CaptureQueriesContext(connection) as baseline:
+            self.client.get(url)
+        
+        for i in range(15):
+            VerificationFlag.objects.create(
+                merchant=self.merchant,
+                flag_type='other',
+                description=f'Flag {i}',
+                created_by=self.user
+            )
+            VerificationReport.objects.create(
+                merchant=self.merchant,
+                generated_by=self.user,
+                report_data={}
+            )
+            AuditLog.objects.create(user=self.user, merchant=self.merchant, action='update')
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), len(baseline))
+    
+    @override_settings(MERCHANT_DETAIL_PAGE_SIZE=5)
+    def test_merchant_detail_section_pagination(self):
+        """Test each merchant detail section is paginated independently"""
+        for i in range(11):
+            VerificationFlag.objects.create(
+                merchant=self.merchant,
+                flag_type='other',
+                description=f'Flag {i}',
+                created_by=self.user
+            )
+        
+        response = self.client.get(reverse('merchant_detail', args=[self.merchant.id]), {'flags_page': 3})
+        
+        self.assertEqual(response.status_code, 200)
+        flags = response.context['flags']
+        self.assertEqual(flags.number, 3)
+        self.assertEqual(flags.paginator.count, 12)
+        self.assertEqual(len(flags), 2)
+        self.assertEqual(flags[-1], self.flag)
+        self.assertEqual(response.context['reports'].number, 1)
+        self.assertContains(response, 'Showing 11-12 of 12')
+    
     def test_add_merchant_view_get(self):
         """Test GET request to the add merchant view"""
         response = self.client.get(reverse('add_merchant'))
@@ -186,6 +244,18 @@ class ViewsTestCase(TestCase):
         self.assertIn('external_data', response.context)
         self.assertIn('transaction_data', response.context)
     
+    def test_refresh_verification_snapshot_view(self):
+        """Test the refresh now action recomputes the verification snapshot"""
+        url = reverse('refresh_verification_snapshot', args=[self.merchant.id])
+        self.assertEqual(self.client.get(url).status_code, 405)
+        
+        response = self.client.post(url)
+        
+        self.assertRedirects(response, reverse('verify_merchant', args=[self.merchant.id]), fetch_redirect_response=False)
+        snapshot = VerificationSnapshot.objects.get(merchant=self.merchant)
+        self.assertFalse(snapshot.is_stale)
+        self.assertIn('suggested_risk_level', snapshot.risk_data)
+    
     def test_flag_merchant_view(self):
         """Test the flag merchant view"""
         response = self.client.get(reverse('flag_merchant', args=[self.merchant.id]))
@@ -314,6 +384,38 @@ class ViewsTestCase(TestCase):
         self.assertIn('page_obj', response.context)
         self.assertEqual(len(response.context['page_obj']), 1)
     
+    def test_claim_next_flag_view(self):
+        """Test that Review Next claims the top flag and opens it"""
+        response = self.client.post(reverse('claim_next_flag'))
+        self.assertRedirects(response, reverse('resolve_flag', args=[self.flag.id]))
+        
+        self.flag.refresh_from_db()
+        self.assertEqual(self.flag.claimed_by, self.user)
+        self.assertContains(self.client.get(reverse('flagged_merchants')), 'testuser until')
+        
+        self.flag.resolve(self.user, 'Checked')
+        response = self.client.post(reverse('claim_next_flag'))
+        self.assertRedirects(response, reverse('flagged_merchants'))
+    
+    def test_bulk_resolve_flags_view(self):
+        """Test closing the flags selected on the flagged merchants page"""
+        self.merchant.status = 'flagged'
+        self.merchant.save()
+        
+        response = self.client.post(reverse('bulk_resolve_flags'), {
+            'flag_ids': [str(self.flag.id)],
+            'status': 'resolved',
+            'resolution_notes': 'Reviewed in bulk'
+        })
+        
+        self.assertRedirects(response, reverse('flagged_merchants'))
+        self.flag.refresh_from_db()
+        self.assertEqual(self.flag.status, 'resolved')
+        self.assertEqual(self.flag.resolution_notes, 'Reviewed in bulk')
+        self.merchant.refresh_from_db()
+        self.assertEqual(self.merchant.status, 'verified')
+        self.assertTrue(AuditLog.objects.filter(merchant=self.merchant, action='review', ip_address='127.0.0.1').exists())
+    
     def test_reports_view(self):
         """Test the reports view"""
         response = self.client.get(reverse('reports'))
@@ -346,6 +448,80 @@ class ViewsTestCase(TestCase):
         self.assertIn('page_obj', response.context)
         self.assertEqual(len(response.context['page_obj']), 0)
     
+    def test_paginator_counts_small_results_exactly(self):
+        """Test that results below the threshold get an exact, cached total"""
+        paginator = ApproximatePaginator(Merchant.objects.order_by('-created_at'), 10)
+        
+        self.assertEqual(paginator.count, 1)
+        self.assertFalse(paginator.is_approximate)
+        self.assertEqual(paginator.display_count, '1')
+        
+        with self.assertNumQueries(1):
+            # Only the data version lookup; the count comes from the cache
+            self.assertEqual(ApproximatePaginator(Merchant.objects.order_by('-created_at'), 10).count, 1)
+        
+        self.assertEqual(ApproximatePaginator(Merchant.objects.none(), 10).count, 0)
+    
+    def test_paginator_uses_planner_estimate(self):
+        """Test that large estimated results show an approximate total"""
+        for i in range(14):
+            Merchant.objects.create(
+                name=f'Listed Merchant {i}',
+                business_type='retail',
+                registration_number=f'LIST{i:06d}',
+                email='info@listed.com',
+                phone='+1234567890',
+                address='1 List Street',
+                city='Test City',
+                state='Test State',
+                country='Test Country',
+                postal_code='12345',
+                created_by=self.user
+            )
+        
+        with mock.patch.object(pagination, 'estimate_count', return_value=12):
+            paginator = ApproximatePaginator(Merchant.objects.order_by('-created_at'), 10, threshold=5)
+            
+            self.assertTrue(paginator.is_approximate)
+            self.assertEqual(paginator.display_count, 'about 12')
+            self.assertEqual(paginator.num_pages, 2)
+            
+            # The estimate is low; the last real page is still reachable
+            page = paginator.get_page(2)
+            self.assertEqual(len(page), 5)
+            self.assertFalse(page.has_next())
+            self.assertEqual(page.end_index(), 15)
+            
+            page = paginator.get_page(1)
+            self.assertTrue(page.has_next())
+            self.assertEqual(list(page.nearby_pages), [1, 2])
+        
+        cache.clear()
+        with mock.patch.object(pagination, 'estimate_count', return_value=100):
+            paginator = ApproximatePaginator(Merchant.objects.order_by('-created_at'), 10, threshold=5)
+            
+            # The estimate is high; links stop at the next real page
+            self.assertEqual(paginator.num_pages, 10)
+            self.assertEqual(list(paginator.get_page(1).nearby_pages), [1, 2])
+            self.assertEqual(list(paginator.get_page(2).nearby_pages), [1, 2])
+            
+            # Pages past the data fall back to the first
+            page = paginator.get_page(7)
+            self.assertEqual(page.number, 1)
+            self.assertEqual(len(page), 10)
+            
+            cache.clear()
+            with override_settings(APPROXIMATE_COUNT_THRESHOLD=5):
+                response = self.client.get(reverse('merchant_list'))
+            self.assertContains(response, 'about 100')
+            self.assertNotContains(response, 'aria-label="Last"')
+        
+        # Below the default threshold the list is counted exactly
+        cache.clear()
+        response = self.client.get(reverse('merchant_list'))
+        self.assertContains(response, 'All Merchants')
+        self.assertContains(response, '(15)')
+    
     def test_login_required(self):
         """Test that views require login"""
         # Logout the test user